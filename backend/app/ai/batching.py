@@ -0,0 +1,80 @@
+import asyncio
+import logging
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Set
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class _PendingRequest:
+    payload: Any
+    future: asyncio.Future
+
+
+class MicroBatcher:
+    """Coalesce concurrent requests with the same batch key into one batched call.
+
+    Requests are collected per key for up to ``window_ms`` milliseconds (or until
+    ``max_batch_size`` requests are waiting) and handed to ``run_batch`` together.
+    ``run_batch`` must return one result per payload, in the same order.
+    """
+
+    def __init__(
+        self,
+        run_batch: Callable[[Hashable, List[Any]], Awaitable[List[Any]]],
+        max_batch_size: int = 4,
+        window_ms: int = 50
+    ):
+        self.run_batch = run_batch
+        self.max_batch_size = max(1, max_batch_size)
+        self.window = max(0, window_ms) / 1000
+        self._pending: Dict[Hashable, List[_PendingRequest]] = {}
+        self._timers: Dict[Hashable, asyncio.TimerHandle] = {}
+        self._tasks: Set[asyncio.Task] = set()
+
+    async def submit(self, key: Hashable, payload: Any) -> Any:
+        """Queue a payload under ``key`` and wait for its individual result."""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        bucket = self._pending.setdefault(key, [])
+        bucket.append(_PendingRequest(payload=payload, future=future))
+
+        if len(bucket) >= self.max_batch_size or self.window == 0:
+            self._flush(key)
+        elif len(bucket) == 1:
+            self._timers[key] = loop.call_later(self.window, self._flush, key)
+
+        return await future
+
+    def _flush(self, key: Hashable):
+        """Dispatch everything queued under ``key`` as one batch."""
+        timer = self._timers.pop(key, None)
+        if timer is not None:
+            timer.cancel()
+
+        batch = self._pending.pop(key, [])
+        if not batch:
+            return
+
+        task = asyncio.ensure_future(self._run(key, batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, key: Hashable, batch: List[_PendingRequest]):
+        logger.debug(f"Running batch of {len(batch)} for key {key}")
+        try:
+            results = await self.run_batch(key, [request.payload for request in batch])
+            if len(results) != len(batch):
+                raise RuntimeError(
+                    f"Batch returned {len(results)} results for {len(batch)} requests"
+                )
+        except Exception as e:
+            for request in batch:
+                if not request.future.done():
+                    request.future.set_exception(e)
+            return
+
+        for request, result in zip(batch, results):
+            if not request.future.done():
+                request.future.set_result(result)
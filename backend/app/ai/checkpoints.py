@@ -0,0 +1,62 @@
+import hashlib
+import logging
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+import torch
+from diffusers import UNet2DConditionModel
+from ..core.config import settings
+from .quantization import load_cached_quantized, quantize_dynamic_int8
+
+logger = logging.getLogger(__name__)
+
+BASE_VERSION = "base"
+
+
+@dataclass(frozen=True)
+class UnetVersion:
+    """A UNet that can be served: the base model's (``path`` None) or a fine-tuned checkpoint's."""
+    path: Optional[str]
+    version: str
+
+
+BASE_UNET = UnetVersion(path=None, version=BASE_VERSION)
+
+
+def resolve_checkpoint(name: str) -> Path:
+    """Resolve a checkpoint name (e.g. ``checkpoint-500``) inside ``CHECKPOINT_ROOT``.
+
+    Raises FileNotFoundError for names outside the root or without a UNet.
+    """
+    root = Path(settings.CHECKPOINT_ROOT).resolve()
+    path = (root / name).resolve()
+    if root not in path.parents or not (path / "unet" / "config.json").is_file():
+        raise FileNotFoundError(f"No checkpoint named '{name}' in {settings.CHECKPOINT_ROOT}")
+    return path
+
+
+def checkpoint_version(path: Path) -> UnetVersion:
+    """Identify a checkpoint by name and weight file stats, so a rewritten checkpoint gets a new version."""
+    digest = hashlib.sha256(str(path).encode())
+    for weights in sorted((path / "unet").iterdir()):
+        stat = weights.stat()
+        digest.update(f"{weights.name}:{stat.st_size}:{stat.st_mtime_ns}".encode())
+    return UnetVersion(path=str(path), version=f"{path.name}-{digest.hexdigest()[:10]}")
+
+
+def load_unet(version: UnetVersion) -> torch.nn.Module:
+    """Load (and quantize, if configured) the UNet for ``version`` on the CPU."""
+    if version.path is None and settings.SD_QUANTIZE_INT8:
+        cached = load_cached_quantized(settings.SD_MODEL_ID).get("unet")
+        if cached is not None:
+            return cached
+
+    logger.info(f"Loading UNet {version.version}")
+    unet = UNet2DConditionModel.from_pretrained(
+        version.path or settings.SD_MODEL_ID,
+        subfolder="unet",
+        torch_dtype=torch.float32
+    )
+    if settings.SD_QUANTIZE_INT8:
+        unet = quantize_dynamic_int8(unet)
+    return unet.eval()
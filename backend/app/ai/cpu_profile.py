@@ -0,0 +1,131 @@
+import fcntl
+import logging
+import os
+import tempfile
+import threading
+from typing import List, Optional
+import torch
+from ..core.config import settings
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_applied = False
+_slot_file = None  # held open for the life of the process to keep the slot
+_intra_op_threads = None
+_pinned_cores: Optional[List[int]] = None
+
+
+def _workers_per_node() -> int:
+    return settings.CPU_WORKERS_PER_NODE or int(os.getenv("WEB_CONCURRENCY", "1"))
+
+
+def _available_cores() -> List[int]:
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+def _claim_worker_slot(workers: int) -> Optional[int]:
+    """Claim a free worker slot on this node via an exclusive lock file.
+
+    Uvicorn/gunicorn workers are not told their index, so each worker takes the
+    first slot nobody else holds; the lock is released when the process exits.
+    """
+    global _slot_file
+    for slot in range(workers):
+        path = os.path.join(tempfile.gettempdir(), f"indira-cpu-slot-{slot}.lock")
+        f = open(path, "w")
+        try:
+            fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            f.close()
+            continue
+        _slot_file = f
+        return slot
+    return None
+
+
+def apply_cpu_profile():
+    """Apply the process-wide CPU execution profile once.
+
+    Splits the node's cores between the configured number of workers: each
+    worker gets an equal share of intra-op threads and, with ``CPU_PIN_CORES``,
+    is pinned to its own disjoint set of cores so workers do not thrash.
+
+    Affinity is per thread on Linux: call this from the main thread at
+    startup, before any pools spawn, so later threads inherit it; threads
+    that already exist are pinned by ``configure_thread``.
+    """
+    global _applied, _intra_op_threads, _pinned_cores
+    with _lock:
+        if _applied:
+            return
+        _applied = True
+
+        workers = max(1, _workers_per_node())
+        cores = _available_cores()
+        share = max(1, len(cores) // workers)
+
+        if settings.CPU_PIN_CORES and hasattr(os, "sched_setaffinity"):
+            slot = _claim_worker_slot(workers)
+            if slot is None:
+                logger.warning("No free CPU slot to pin this worker to; running unpinned")
+            else:
+                _pinned_cores = cores[slot * share:(slot + 1) * share]
+                os.sched_setaffinity(0, _pinned_cores)
+                logger.info(f"Pinned worker slot {slot} to cores {_pinned_cores}")
+
+        _intra_op_threads = settings.TORCH_INTRA_OP_THREADS or share
+        torch.set_num_threads(_intra_op_threads)
+        try:
+            torch.set_num_interop_threads(settings.TORCH_INTER_OP_THREADS)
+        except RuntimeError as e:
+            # Only settable before the first inter-op parallel region runs
+            logger.warning(f"Could not set inter-op threads: {str(e)}")
+
+        if settings.TORCH_COMPILE:
+            os.makedirs(settings.TORCH_COMPILE_CACHE_DIR, exist_ok=True)
+            os.environ.setdefault("TORCHINDUCTOR_CACHE_DIR", settings.TORCH_COMPILE_CACHE_DIR)
+            os.environ.setdefault("TORCHINDUCTOR_FX_GRAPH_CACHE", "1")
+
+        logger.info(
+            f"CPU profile: {workers} worker(s) over {len(cores)} cores, "
+            f"{_intra_op_threads} intra-op / {settings.TORCH_INTER_OP_THREADS} inter-op threads"
+        )
+
+
+def configure_thread():
+    """Apply the core pinning and intra-op thread count to the calling thread (executor initializer)."""
+    apply_cpu_profile()
+    if _pinned_cores:
+        os.sched_setaffinity(0, _pinned_cores)
+    torch.set_num_threads(_intra_op_threads)
+
+
+def optimize_pipeline(pipeline):
+    """Apply channels_last and optional torch.compile to the UNet and VAE decoder."""
+    pipeline.unet = optimize_unet(pipeline.unet)
+
+    if settings.CPU_CHANNELS_LAST:
+        pipeline.vae.to(memory_format=torch.channels_last)
+
+    if settings.TORCH_COMPILE:
+        logger.info(f"Compiling VAE decoder (mode={settings.TORCH_COMPILE_MODE})")
+        pipeline.vae.decoder = compile_module(pipeline.vae.decoder)
+
+
+def optimize_unet(unet: torch.nn.Module) -> torch.nn.Module:
+    """Apply channels_last and optional torch.compile to a UNet."""
+    if settings.CPU_CHANNELS_LAST:
+        unet.to(memory_format=torch.channels_last)
+
+    if settings.TORCH_COMPILE:
+        logger.info(f"Compiling UNet (mode={settings.TORCH_COMPILE_MODE})")
+        unet = compile_module(unet)
+    return unet
+
+
+def compile_module(module: torch.nn.Module) -> torch.nn.Module:
+    """Wrap ``module`` with torch.compile using the configured mode."""
+    return torch.compile(module, mode=settings.TORCH_COMPILE_MODE)
@@ -0,0 +1,52 @@
+import asyncio
+import functools
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable
+from ..core.config import settings
+from .cpu_profile import configure_thread
+
+logger = logging.getLogger(__name__)
+
+
+class InferenceExecutor:
+    """Dedicated thread pool for blocking model inference.
+
+    Diffusion pipelines release the GIL inside torch kernels, so running them on
+    a small dedicated pool keeps the event loop free for other requests. The pool
+    is kept separate from the loop's default executor so short blocking calls
+    (Redis, image encoding) never queue behind a multi-second render.
+    """
+
+    def __init__(self, max_workers: int = 1):
+        self.max_workers = max(1, max_workers)
+        self._executor = None
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_workers,
+                thread_name_prefix="inference",
+                initializer=configure_thread
+            )
+        return self._executor
+
+    async def run(self, func: Callable[..., Any], *args, **kwargs) -> Any:
+        """Run ``func`` on the inference pool and await its result."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self.executor,
+            functools.partial(func, *args, **kwargs)
+        )
+
+    def shutdown(self, wait: bool = True):
+        """Stop the pool, optionally waiting for running renders to finish."""
+        if self._executor is not None:
+            logger.info("Shutting down inference executor")
+            self._executor.shutdown(wait=wait)
+            self._executor = None
+
+
+# Global instance
+inference_executor = InferenceExecutor(max_workers=settings.INFERENCE_WORKERS)
@@ -0,0 +1,137 @@
+import logging
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, List, Optional
+import torch
+from diffusers import StableDiffusionPipeline
+from ..core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# File written by StableDiffusionPipeline.save_lora_weights
+LORA_WEIGHT_NAME = "pytorch_lora_weights.safetensors"
+
+
+def find_style_adapters(lora_dir: str) -> List[Path]:
+    """Return the per-style adapter directories (``<lora_dir>/<style>/``) that hold weights."""
+    root = Path(lora_dir)
+    if not root.is_dir():
+        return []
+    return sorted(path.parent for path in root.glob(f"*/{LORA_WEIGHT_NAME}"))
+
+
+class LoraAdapters:
+    """Per-style LoRA adapters loaded once into a UNet and switched per request.
+
+    The UNet is shared by every derived pipeline, so only one style can be
+    active at a time. ``activate(style)`` lets any number of
+    renders of the active style run together; a render for another style
+    waits until they finish, then switches. With ``fuse`` the active adapter
+    is merged into the UNet weights so renders pay no LoRA overhead.
+    """
+
+    def __init__(self, unet: torch.nn.Module, styles: List[str], fuse: bool = True, scale: float = 1.0):
+        # Adapters are managed on the eager module underneath torch.compile
+        self.unet = getattr(unet, "_orig_mod", unet)
+        self.styles = styles
+        self.fuse = fuse
+        self.scale = scale
+        self.switches = 0
+        self._current: Optional[str] = None
+        self._active = 0
+        self._fused = False
+        self._cond = threading.Condition()
+
+    @classmethod
+    def load(cls, unet: torch.nn.Module, lora_dir: str, fuse: bool = True, scale: float = 1.0) -> "LoraAdapters":
+        """Load every style adapter under ``lora_dir`` into ``unet``.
+
+        Must run before the UNet is compiled. Adapters the UNet already has
+        (e.g. a rolled-back UNet) are not loaded again.
+        """
+        loaded = getattr(unet, "peft_config", None) or {}
+        styles = []
+        for path in find_style_adapters(lora_dir):
+            style = path.name
+            if style not in loaded:
+                state_dict, network_alphas = StableDiffusionPipeline.lora_state_dict(str(path))
+                StableDiffusionPipeline.load_lora_into_unet(
+                    state_dict, network_alphas, unet=unet, adapter_name=style
+                )
+                logger.info(f"Loaded LoRA adapter for style {style}")
+            styles.append(style)
+        if styles:
+            unet.disable_lora()
+        return cls(unet, styles, fuse=fuse, scale=scale)
+
+    def resolve(self, style: Optional[str]) -> Optional[str]:
+        """Map a requested style to the adapter that serves it (None: the base weights)."""
+        return style if style in self.styles else None
+
+    @contextmanager
+    def activate(self, style: Optional[str]) -> Iterator[None]:
+        """Run the block with ``style``'s adapter (or none) active."""
+        style = self.resolve(style)
+        with self._cond:
+            while self._active and self._current != style:
+                self._cond.wait()
+            if self._current != style:
+                self._switch(style)
+            self._active += 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._active -= 1
+                self._cond.notify_all()
+
+    @contextmanager
+    def exclusive(self) -> Iterator[None]:
+        """Wait for renders to finish, restore the base weights and hold off new renders for the block."""
+        with self._cond:
+            while self._active:
+                self._cond.wait()
+            if self._current is not None:
+                self._switch(None)
+            yield
+
+    def _switch(self, style: Optional[str]):
+        if self._fused:
+            self.unet.unfuse_lora()
+            self._fused = False
+        if style is None:
+            self.unet.disable_lora()
+        else:
+            self.unet.enable_lora()
+            self.unet.set_adapters([style], weights=[self.scale])
+            if self.fuse:
+                self.unet.fuse_lora()
+                self._fused = True
+        self._current = style
+        self.switches += 1
+        logger.info(f"Switched LoRA adapter to {style or 'none'}")
+
+    def stats(self) -> dict:
+        return {
+            "styles": self.styles,
+            "active": self._current,
+            "switches": self.switches,
+        }
+
+
+def load_style_adapters(unet: torch.nn.Module) -> LoraAdapters:
+    """Load the configured style adapters into ``unet``, or none where LoRA cannot apply."""
+    if not settings.LORA_ENABLED:
+        return LoraAdapters(unet, [])
+    if settings.SD_QUANTIZE_INT8:
+        # peft cannot wrap dynamically quantized Linear layers
+        if find_style_adapters(settings.LORA_DIR):
+            logger.warning("LoRA adapters are not supported with SD_QUANTIZE_INT8; serving base weights")
+        return LoraAdapters(unet, [])
+    return LoraAdapters.load(
+        unet,
+        settings.LORA_DIR,
+        fuse=settings.LORA_FUSE,
+        scale=settings.LORA_SCALE
+    )
@@ -0,0 +1,200 @@
+import gc
+import logging
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+import torch
+from ..core.config import settings
+from .model_utils import format_bytes, module_nbytes, pipeline_component_sizes
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class _ModelSpec:
+    loader: Callable[[], Any]
+    unloader: Optional[Callable[[Any], None]] = None
+
+
+@dataclass
+class _LoadedModel:
+    model: Any
+    nbytes: int
+    in_use: int = 0
+
+
+def model_nbytes(model: Any) -> int:
+    """Resident size of a pipeline (sum of its torch components) or a single module."""
+    if isinstance(model, torch.nn.Module):
+        return module_nbytes(model)
+    if hasattr(model, "components"):
+        return sum(pipeline_component_sizes(model).values())
+    return 0
+
+
+class ModelRegistry:
+    """Loads registered models on demand within a shared memory budget.
+
+    Models are used through ``use(name)``, which loads the model on first use
+    (one loader per name at a time; other callers wait for it) and pins it
+    while the block runs. When a load would exceed ``max_bytes``, the least
+    recently used idle models are evicted first. A model larger than the
+    whole budget still loads, after everything idle has been evicted.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._specs: Dict[str, _ModelSpec] = {}
+        self._loaded: "OrderedDict[str, _LoadedModel]" = OrderedDict()
+        self._last_sizes: Dict[str, int] = {}
+        self._load_locks: Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def register(
+        self,
+        name: str,
+        loader: Callable[[], Any],
+        unloader: Optional[Callable[[Any], None]] = None
+    ):
+        """Register how to load (and drop references to) the model called ``name``."""
+        with self._lock:
+            self._specs[name] = _ModelSpec(loader, unloader)
+            self._load_locks.setdefault(name, threading.Lock())
+
+    def is_loaded(self, name: str) -> bool:
+        with self._lock:
+            return name in self._loaded
+
+    @contextmanager
+    def use(self, name: str) -> Iterator[Any]:
+        """Yield the model called ``name``, loading it if needed; it cannot be evicted meanwhile."""
+        model = self._acquire(name)
+        try:
+            yield model
+        finally:
+            with self._lock:
+                self._loaded[name].in_use -= 1
+
+    def _pin(self, name: str) -> Optional[Any]:
+        entry = self._loaded.get(name)
+        if entry is None:
+            return None
+        entry.in_use += 1
+        self._loaded.move_to_end(name)
+        return entry.model
+
+    def _acquire(self, name: str) -> Any:
+        with self._lock:
+            if name not in self._specs:
+                raise KeyError(f"Unknown model: {name}")
+            model = self._pin(name)
+            if model is not None:
+                return model
+            load_lock = self._load_locks[name]
+
+        with load_lock:
+            # Another caller may have finished loading while we waited
+            with self._lock:
+                model = self._pin(name)
+                if model is not None:
+                    return model
+                # Make room up front when the size is known from a previous load
+                evicted = self._evict_to_fit(self._last_sizes.get(name, 0))
+            self._unload(evicted)
+
+            logger.info(f"Loading model {name}")
+            spec = self._specs[name]
+            model = spec.loader()
+            nbytes = model_nbytes(model)
+
+            with self._lock:
+                self._loaded[name] = _LoadedModel(model, nbytes, in_use=1)
+                self._last_sizes[name] = nbytes
+                evicted = self._evict_to_fit(0)
+            self._unload(evicted)
+            logger.info(f"Loaded model {name} ({format_bytes(nbytes)}, {format_bytes(self.resident_bytes)} resident)")
+            return model
+
+    @property
+    def resident_bytes(self) -> int:
+        return sum(entry.nbytes for entry in self._loaded.values())
+
+    def _evict_to_fit(self, incoming_bytes: int) -> List[Tuple[str, Any]]:
+        """Pop least recently used idle models until ``incoming_bytes`` more fits (lock held)."""
+        evicted = []
+        for name in list(self._loaded):
+            if self.resident_bytes + incoming_bytes <= self.max_bytes:
+                break
+            entry = self._loaded[name]
+            if entry.in_use:
+                continue
+            del self._loaded[name]
+            evicted.append((name, entry.model))
+        if self.resident_bytes + incoming_bytes > self.max_bytes:
+            logger.warning(
+                f"Model memory budget {format_bytes(self.max_bytes)} exceeded: "
+                f"{format_bytes(self.resident_bytes + incoming_bytes)} needed by models in use"
+            )
+        return evicted
+
+    def _unload(self, evicted: List[Tuple[str, Any]]):
+        if not evicted:
+            return
+        for name, model in evicted:
+            logger.info(f"Evicting model {name}")
+            unloader = self._specs[name].unloader
+            if unloader is not None:
+                unloader(model)
+            self.evictions += 1
+        # Drop our references so the weights are actually freed
+        del model
+        evicted.clear()
+        gc.collect()
+        if torch.cuda.is_available():
+            torch.cuda.empty_cache()
+
+    def update_size(self, name: str, nbytes: int):
+        """Record a new resident size for a loaded model (e.g. after swapping a component)."""
+        with self._lock:
+            entry = self._loaded.get(name)
+            if entry is not None:
+                entry.nbytes = nbytes
+                self._last_sizes[name] = nbytes
+
+    def evict(self, name: str) -> bool:
+        """Unload ``name`` now unless it is in use; returns whether it was unloaded."""
+        with self._lock:
+            entry = self._loaded.get(name)
+            if entry is None or entry.in_use:
+                return False
+            del self._loaded[name]
+            evicted = [(name, entry.model)]
+            del entry
+        self._unload(evicted)
+        return True
+
+    def clear(self):
+        """Unload every idle model."""
+        with self._lock:
+            names = list(self._loaded)
+        for name in names:
+            self.evict(name)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "max_bytes": self.max_bytes,
+                "resident_bytes": self.resident_bytes,
+                "evictions": self.evictions,
+                "loaded": {
+                    name: {"bytes": entry.nbytes, "in_use": entry.in_use}
+                    for name, entry in self._loaded.items()
+                },
+            }
+
+
+# Global instance
+model_registry = ModelRegistry(max_bytes=settings.MODEL_MEMORY_BUDGET_MB * 1024 * 1024)
@@ -0,0 +1,41 @@
+import logging
+from typing import Dict
+import torch
+
+logger = logging.getLogger(__name__)
+
+
+def module_nbytes(module: torch.nn.Module) -> int:
+    """Return the number of bytes held by a module's parameters and buffers."""
+    total = 0
+    for tensor in list(module.parameters()) + list(module.buffers()):
+        total += tensor.numel() * tensor.element_size()
+    # Dynamically quantized Linear layers keep their weights in packed params,
+    # which are neither parameters nor buffers
+    for submodule in module.modules():
+        if type(submodule).__name__ == "LinearPackedParams":
+            for tensor in submodule._weight_bias():
+                if tensor is not None:
+                    total += tensor.numel() * tensor.element_size()
+    return total
+
+
+def pipeline_component_sizes(pipeline) -> Dict[str, int]:
+    """Return the resident size in bytes of each torch module in a pipeline."""
+    return {
+        name: module_nbytes(component)
+        for name, component in pipeline.components.items()
+        if isinstance(component, torch.nn.Module)
+    }
+
+
+def format_bytes(num_bytes: int) -> str:
+    """Format a byte count for log output."""
+    return f"{num_bytes / (1024 * 1024):.1f} MiB"
+
+
+def log_component_sizes(name: str, sizes: Dict[str, int]):
+    """Log a per-component memory report for a loaded pipeline."""
+    for component, num_bytes in sorted(sizes.items()):
+        logger.info(f"{name}: {component} loaded ({format_bytes(num_bytes)})")
+    logger.info(f"{name}: total {format_bytes(sum(sizes.values()))}")
@@ -0,0 +1,71 @@
+import threading
+from collections import OrderedDict
+from typing import Dict, Hashable, Optional
+import torch
+
+
+class PromptEmbeddingCache:
+    """LRU cache of text encoder outputs, bounded by total tensor bytes.
+
+    Accessed from the inference threads, so all bookkeeping happens under a lock.
+    Cached tensors are shared between requests and must not be modified in place.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: "OrderedDict[Hashable, torch.Tensor]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _nbytes(tensor: torch.Tensor) -> int:
+        return tensor.numel() * tensor.element_size()
+
+    def get(self, key: Hashable) -> Optional[torch.Tensor]:
+        with self._lock:
+            tensor = self._entries.get(key)
+            if tensor is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return tensor
+
+    def put(self, key: Hashable, tensor: torch.Tensor):
+        size = self._nbytes(tensor)
+        if size > self.max_bytes:
+            return
+
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.current_bytes -= self._nbytes(previous)
+
+            self._entries[key] = tensor
+            self.current_bytes += size
+
+            while self.current_bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.current_bytes -= self._nbytes(evicted)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self.current_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0
+            }
@@ -0,0 +1,73 @@
+import logging
+import time
+from pathlib import Path
+from typing import Dict
+import torch
+from ..core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Components whose Linear layers dominate CPU time and are safe to quantize.
+# The VAE is conv-heavy and quality-sensitive, so it stays in fp32.
+QUANTIZED_COMPONENTS = ("unet", "text_encoder")
+
+
+def quantize_dynamic_int8(module: torch.nn.Module) -> torch.nn.Module:
+    """Apply dynamic int8 quantization to every Linear layer of ``module``."""
+    module.eval()
+    return torch.ao.quantization.quantize_dynamic(
+        module,
+        {torch.nn.Linear},
+        dtype=torch.qint8
+    )
+
+
+def _cache_dir(model_id: str) -> Path:
+    return Path(settings.QUANTIZED_MODEL_DIR) / model_id.replace("/", "--")
+
+
+def _cache_path(model_id: str, component: str) -> Path:
+    # Pickled quantized modules are tied to the torch version that produced them
+    return _cache_dir(model_id) / f"{component}.int8.torch-{torch.__version__}.pt"
+
+
+def load_cached_quantized(model_id: str) -> Dict[str, torch.nn.Module]:
+    """Load previously quantized components for ``model_id`` from disk."""
+    components = {}
+    for component in QUANTIZED_COMPONENTS:
+        path = _cache_path(model_id, component)
+        if not path.exists():
+            continue
+        try:
+            components[component] = torch.load(path, map_location="cpu", weights_only=False)
+            logger.info(f"Loaded quantized {component} from {path}")
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable quantized cache {path}: {str(e)}")
+    return components
+
+
+def quantize_pipeline(pipeline, model_id: str, cached: Dict[str, torch.nn.Module] = None):
+    """Quantize the pipeline's UNet and text encoder in place, caching the result.
+
+    Components already present in ``cached`` were passed to ``from_pretrained``
+    and are skipped; the rest are converted and written to the cache so the
+    next start can skip both the fp32 load and the conversion.
+    """
+    cached = cached or {}
+    for component in QUANTIZED_COMPONENTS:
+        if component in cached:
+            continue
+
+        start = time.perf_counter()
+        quantized = quantize_dynamic_int8(getattr(pipeline, component))
+        setattr(pipeline, component, quantized)
+        logger.info(f"Quantized {component} to int8 in {time.perf_counter() - start:.1f}s")
+
+        path = _cache_path(model_id, component)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_suffix(".tmp")
+            torch.save(quantized, tmp_path)
+            tmp_path.replace(path)
+        except Exception as e:
+            logger.warning(f"Could not cache quantized {component}: {str(e)}")
@@ -0,0 +1,37 @@
+import hashlib
+import json
+import secrets
+from typing import Optional
+
+# Pipelines need dimensions divisible by the VAE scale factor
+DIMENSION_MULTIPLE = 8
+
+MAX_SEED = 2 ** 32
+
+
+def normalize_prompt(text: Optional[str]) -> str:
+    """Collapse whitespace and case-fold a prompt.
+
+    The CLIP tokenizer lower-cases and splits on whitespace anyway, so the
+    normalized prompt conditions the model exactly like the original one.
+    """
+    return " ".join((text or "").split()).casefold()
+
+
+def snap_dimension(value: int, multiple: int = DIMENSION_MULTIPLE) -> int:
+    """Round a width/height down to the nearest supported multiple."""
+    return max(multiple, (int(value) // multiple) * multiple)
+
+
+def new_seed() -> int:
+    return secrets.randbelow(MAX_SEED)
+
+
+def canonical_cache_key(kind: str, **params) -> str:
+    """Hash fully-resolved request parameters into a cache key.
+
+    Callers must pass values after defaults, clamping and normalization have
+    been applied, so equivalent requests map to the same key.
+    """
+    canonical = json.dumps({"kind": kind, **params}, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode()).hexdigest()
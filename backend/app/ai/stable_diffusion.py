@@ -2,22 +2,110 @@ from diffusers import StableDiffusionPipeline, StableDiffusionImg2ImgPipeline
 import torch
 from PIL import Image
 import io
+import json
 import logging
+import uuid
 from ..core.config import settings
-import boto3
-from typing import Optional, Union, BinaryIO
+from ..core.cache import TieredCache, MemoryTier, RedisTier, DiskTier
+from ..core.single_flight import SingleFlight
+from typing import Optional, Union, BinaryIO, List, Tuple
 import redis
-import json
-import hashlib
+import redis.asyncio
+import asyncio
+import functools
+import struct
+import threading
+from dataclasses import asdict, dataclass
+from .batching import MicroBatcher
+from .executor import inference_executor
+from .model_registry import model_registry, model_nbytes
+from .model_utils import module_nbytes
+from .lora import LoraAdapters, load_style_adapters, find_style_adapters
+from .checkpoints import UnetVersion, BASE_UNET, resolve_checkpoint, checkpoint_version, load_unet
+from .model_utils import pipeline_component_sizes, log_component_sizes
+from .prompt_cache import PromptEmbeddingCache
+from .cpu_profile import apply_cpu_profile, optimize_pipeline, optimize_unet
+from .quantization import load_cached_quantized, quantize_pipeline
+from .schedulers import DEFAULT_QUALITY_TIER, get_quality_tier, create_scheduler
+from .request_normalizer import normalize_prompt, snap_dimension, new_seed, canonical_cache_key
+from .tiling import tile_boxes, blend_tiles
+from ..utils.sketch_preprocessing import preprocess_sketch
+from ..utils.image_encoding import OutputFormat, PNG, encode_image, transcode
+from ..utils.image_hash import pixel_digest, dhash, hamming_distance
 
 logger = logging.getLogger(__name__)
 
+# Model lifecycle states reported by /health and /ready
+STATE_PENDING = "pending"
+STATE_LOADING = "loading"
+STATE_WARMING = "warming"
+STATE_READY = "ready"
+STATE_FAILED = "failed"
+STATE_DISABLED = "disabled"  # MODEL_WARMUP_ON_STARTUP off: this node does not serve generation
+
+# Checkpoint swap states reported by the admin API
+SWAP_IDLE = "idle"
+SWAP_LOADING = "loading"
+SWAP_FAILED = "failed"
+
+# UNet every worker should serve (and the one before it), and the channel
+# announcing changes to it
+MODEL_RECORD_KEY = "sd_model:unet"
+MODEL_SWAP_CHANNEL = "sd_model:swap"
+# Delay before resubscribing after the swap channel's connection drops
+MODEL_SWAP_RETRY_SECONDS = 5
+
+# Result cache entries start with the render's seed (big-endian uint32)
+SEED_SIZE = 4
+
+# Upper bound on denoising steps per request, whatever the tier or request asks
+MAX_INFERENCE_STEPS = 30
+
+def _uses_model(method):
+    """Pin the service's pipeline in the model registry (loading it if evicted) for the call."""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with model_registry.use(settings.SD_MODEL_ID):
+            return method(self, *args, **kwargs)
+    return wrapper
+
+@dataclass
+class GenerationResult:
+    image: bytes
+    seed: int
+    media_type: str = "image/png"
+
 class StableDiffusionService:
     def __init__(self):
         self.device = "cpu"  # Force CPU for deployment
         self.pipe = None
         self.img2img_pipe = None
-        self._initialize_pipeline()
+        self.component_sizes = {}
+        self.state = STATE_PENDING if settings.MODEL_WARMUP_ON_STARTUP else STATE_DISABLED
+        self.load_error = None
+        self.base_model_key = f"{settings.SD_MODEL_ID}:int8" if settings.SD_QUANTIZE_INT8 else settings.SD_MODEL_ID
+
+        # Served UNet, and the one it replaced (kept resident for rollback)
+        self.active_unet = BASE_UNET
+        self.previous_unet = None
+        self.previous_lora: Optional[LoraAdapters] = None
+        self.previous_version: Optional[UnetVersion] = None
+        self.swap_state = SWAP_IDLE
+        self.swap_error = None
+        self._swap_task = None
+        self._follow_task = None
+        # Tells this process's swap announcements apart from other workers'
+        self.worker_id = uuid.uuid4().hex
+        # Guards the served UNet, its adapters and version changing together
+        self._swap_lock = threading.Lock()
+
+        # Style adapters on the served UNet; the style names outlive evictions
+        # since they are part of result cache keys
+        self.lora: Optional[LoraAdapters] = None
+        self.lora_styles = [path.name for path in find_style_adapters(settings.LORA_DIR)] if settings.LORA_ENABLED else []
+        self.prompt_cache = PromptEmbeddingCache(
+            max_bytes=settings.PROMPT_EMBED_CACHE_MB * 1024 * 1024
+        )
         
         # Initialize Redis for caching
         self.redis_client = redis.Redis(
@@ -25,48 +113,683 @@ class StableDiffusionService:
             port=settings.REDIS_PORT,
             db=settings.REDIS_DB
         )
+        self.async_redis_client = redis.asyncio.Redis(
+            host=settings.REDIS_HOST,
+            port=settings.REDIS_PORT,
+            db=settings.REDIS_DB
+        )
         self.cache_ttl = 60 * 60 * 24  # 24 hours
 
-    def _initialize_pipeline(self):
+        # Result cache: in-process LRU, then Redis, then (optionally) local disk.
+        # Entries hold a compact encoding and are transcoded to PNG on a hit.
+        cache_tiers = [
+            MemoryTier(max_bytes=settings.RESULT_CACHE_MEMORY_MB * 1024 * 1024),
+            RedisTier(self.redis_client, prefix="sd_result:", ttl=self.cache_ttl),
+        ]
+        if settings.RESULT_CACHE_DISK_DIR:
+            cache_tiers.append(DiskTier(
+                settings.RESULT_CACHE_DISK_DIR,
+                max_bytes=settings.RESULT_CACHE_DISK_MB * 1024 * 1024
+            ))
+        self.result_cache = TieredCache(cache_tiers)
+
+        # Identical cache misses in flight at the same time (in this process or
+        # on other workers) share a single render
+        self.single_flight = SingleFlight(
+            self.redis_client,
+            prefix="sd_singleflight:",
+            lock_ttl=settings.SINGLE_FLIGHT_LOCK_TTL_SECONDS,
+            wait_timeout=settings.SINGLE_FLIGHT_WAIT_TIMEOUT_SECONDS,
+            async_redis_client=self.async_redis_client
+        )
+
+        # Coalesce concurrent text-to-image requests of the same shape
+        self.batcher = MicroBatcher(
+            self._run_text_batch,
+            max_batch_size=settings.GENERATION_BATCH_MAX_SIZE,
+            window_ms=settings.GENERATION_BATCH_WINDOW_MS
+        )
+
+        # Loaded on first use and unloaded when other models need the memory
+        model_registry.register(
+            settings.SD_MODEL_ID,
+            self._initialize_pipeline,
+            self._release_pipeline
+        )
+
+    @property
+    def is_ready(self) -> bool:
+        return self.state == STATE_READY
+
+    @property
+    def is_disabled(self) -> bool:
+        return self.state == STATE_DISABLED
+
+    @property
+    def model_key(self) -> str:
+        """Identifies the weights producing results, so a checkpoint swap invalidates cached renders."""
+        if self.active_unet.path is None:
+            return self.base_model_key
+        return f"{self.base_model_key}@{self.active_unet.version}"
+
+    def get_model_status(self) -> dict:
+        return {
+            "state": self.state,
+            "model_key": self.model_key,
+            "active": self.active_unet.version,
+            "previous": self.previous_version.version if self.previous_version else None,
+            "previous_resident": self.previous_unet is not None,
+            "swap_state": self.swap_state,
+            "swap_error": self.swap_error,
+            "lora": self.lora.stats() if self.lora else None,
+        }
+
+    async def begin_checkpoint_swap(self, name: str) -> UnetVersion:
+        """Start loading checkpoint ``name`` in the background; it is swapped in once loaded.
+
+        The new version is recorded in Redis and announced, so every worker
+        swaps to it. Raises FileNotFoundError for unknown checkpoints and
+        RuntimeError if this node does not serve a model or is already swapping.
+        """
+        self._check_can_swap()
+        version = checkpoint_version(resolve_checkpoint(name))
+        await self._publish_model(version, self.active_unet)
+        self._begin_swap(version)
+        return version
+
+    async def begin_rollback(self) -> UnetVersion:
+        """Swap the previous UNet back in on every worker, reloading it where it was evicted."""
+        self._check_can_swap()
+        record = await self._read_model_record()
+        version = record["previous"] if record else self.previous_version
+        if version is None:
+            raise RuntimeError("No previous model to roll back to")
+        await self._publish_model(version, self.active_unet)
+        self._begin_swap(version)
+        return version
+
+    def _check_can_swap(self):
+        if self.is_disabled:
+            raise RuntimeError("This node does not serve a model (MODEL_WARMUP_ON_STARTUP is off)")
+        if not self.is_ready:
+            raise RuntimeError(f"Model is {self.state}, not ready")
+        if self.swap_state == SWAP_LOADING:
+            raise RuntimeError("A model swap is already in progress")
+
+    def _begin_swap(self, version: UnetVersion):
+        self.swap_state = SWAP_LOADING
+        self.swap_error = None
+        self._swap_task = asyncio.create_task(self._swap_to(version))
+
+    @staticmethod
+    def _parse_model_record(raw) -> dict:
+        record = json.loads(raw)
+        return {
+            name: UnetVersion(**record[name]) if record.get(name) else None
+            for name in ("active", "previous")
+        }
+
+    async def _read_model_record(self) -> Optional[dict]:
+        raw = await self.async_redis_client.get(MODEL_RECORD_KEY)
+        return self._parse_model_record(raw) if raw else None
+
+    async def _publish_model(self, active: UnetVersion, previous: Optional[UnetVersion]):
+        """Record the UNet to serve and announce it to the other workers."""
+        record = json.dumps({
+            "active": asdict(active),
+            "previous": asdict(previous) if previous else None,
+            "origin": self.worker_id,
+        })
+        async with self.async_redis_client.pipeline(transaction=True) as pipe:
+            pipe.set(MODEL_RECORD_KEY, record)
+            pipe.publish(MODEL_SWAP_CHANNEL, record)
+            await pipe.execute()
+
+    async def _follow_model(self, version: UnetVersion):
+        """Swap to ``version`` unless it is already served, after any swap in progress."""
+        if self._swap_task is not None:
+            await self._swap_task
+        if version != self.active_unet:
+            self._begin_swap(version)
+            await self._swap_task
+
+    async def follow_model_swaps(self):
+        """Apply the UNet swaps other workers announce, until cancelled.
+
+        Subscribes before checking the recorded model, so an announcement made
+        in between is not missed.
+        """
+        while True:
+            pubsub = self.async_redis_client.pubsub(ignore_subscribe_messages=True)
+            try:
+                await pubsub.subscribe(MODEL_SWAP_CHANNEL)
+                await self.sync_recorded_model()
+                async for message in pubsub.listen():
+                    announced = json.loads(message["data"])
+                    if announced["origin"] != self.worker_id:
+                        await self._follow_model(UnetVersion(**announced["active"]))
+            except Exception as e:
+                logger.warning(f"Model swap subscription failed, retrying: {str(e)}")
+                await asyncio.sleep(MODEL_SWAP_RETRY_SECONDS)
+            finally:
+                await pubsub.aclose()
+
+    async def sync_recorded_model(self):
+        """Swap to the UNet recorded in Redis if this process serves another one."""
+        record = await self._read_model_record()
+        if record:
+            await self._follow_model(record["active"])
+
+    async def restore_recorded_model(self):
+        """Load the UNet recorded in Redis next, so a (re)started worker matches the fleet.
+
+        Only for a process whose pipeline is not loaded; use sync_recorded_model otherwise.
+        """
+        try:
+            record = await self._read_model_record()
+        except Exception as e:
+            logger.warning(f"Could not read the recorded model, serving {self.active_unet.version}: {str(e)}")
+            return
+        if record:
+            self.active_unet = record["active"]
+            self.previous_version = record["previous"]
+
+    async def _swap_to(self, version: UnetVersion):
+        try:
+            unet, lora = None, None
+            if version == self.previous_version:
+                # Rolling back: reuse the replaced UNet if it is still resident
+                unet, lora = self.previous_unet, self.previous_lora
+            if unet is None:
+                # Loaded off the inference executor so requests keep being served
+                unet, lora = await asyncio.to_thread(self._prepare_unet, version)
+            await inference_executor.run(self._swap_unet, unet, lora, version)
+            self.swap_state = SWAP_IDLE
+            logger.info(f"Now serving UNet {version.version}")
+        except Exception as e:
+            self.swap_state = SWAP_FAILED
+            self.swap_error = str(e)
+            logger.error(f"Swapping to UNet {version.version} failed: {str(e)}")
+
+    def _prepare_unet(self, version: UnetVersion) -> Tuple[torch.nn.Module, LoraAdapters]:
+        unet = load_unet(version).to(self.device)
+        # Style adapters go in before torch.compile wraps the UNet
+        lora = load_style_adapters(unet)
+        return optimize_unet(unet), lora
+
+    @_uses_model
+    def _swap_unet(self, unet: torch.nn.Module, lora: LoraAdapters, version: UnetVersion):
+        """Replace the served UNet, keeping the current one for rollback.
+
+        Runs on the inference executor between renders. Renders already in
+        progress hold their own pipeline objects and finish on the old UNet;
+        renders using a style adapter finish before it is unfused.
+        """
+        with self.lora.exclusive(), self._swap_lock:
+            self.previous_unet, self.previous_version = self.pipe.unet, self.active_unet
+            self.previous_lora = self.lora
+            self.pipe.register_modules(unet=unet)
+            self.img2img_pipe.register_modules(unet=unet)
+            self.lora = lora
+            # Adapters trained since startup are keyed by style from now on
+            self.lora_styles = lora.styles
+            self.active_unet = version
+        self.component_sizes = pipeline_component_sizes(self.pipe)
+        model_registry.update_size(
+            settings.SD_MODEL_ID,
+            model_nbytes(self.pipe) + module_nbytes(self.previous_unet)
+        )
+
+    async def start(self):
+        """Load and warm up the pipelines on the inference executor.
+
+        Meant to run as a background task at application startup so that the
+        process can accept (health check) traffic while the model loads.
+        """
+        try:
+            self.state = STATE_LOADING
+            await self.restore_recorded_model()
+            await inference_executor.run(self._load)
+
+            self.state = STATE_WARMING
+            await inference_executor.run(self._warmup)
+
+            self.state = STATE_READY
+            logger.info("Stable Diffusion service is ready")
+            self._follow_task = asyncio.create_task(self.follow_model_swaps())
+        except Exception as e:
+            self.state = STATE_FAILED
+            self.load_error = str(e)
+            logger.error(f"Stable Diffusion warmup failed: {str(e)}")
+
+    @_uses_model
+    def _load(self):
+        """Load the pipelines through the model registry."""
+
+    @_uses_model
+    def _warmup(self):
+        """Run one tiny inference to prime kernels and allocator pools."""
+        logger.info("Running warmup inference")
+        with torch.inference_mode():
+            self.pipe(
+                prompt="warmup",
+                num_inference_steps=1,
+                width=64,
+                height=64,
+            )
+
+    def _initialize_pipeline(self) -> StableDiffusionPipeline:
         """Initialize the Stable Diffusion pipeline with optimizations."""
         try:
+            apply_cpu_profile()
+
+            # Quantized components cached by a previous start replace their fp32
+            # counterparts, so from_pretrained skips loading those weights
+            quantized = load_cached_quantized(settings.SD_MODEL_ID) if settings.SD_QUANTIZE_INT8 else {}
+            overrides = dict(quantized)
+            if self.active_unet.path is not None:
+                # Reloading after an eviction: keep serving the swapped-in checkpoint
+                overrides["unet"] = load_unet(self.active_unet)
+
             # Initialize text-to-image pipeline with optimizations
             self.pipe = StableDiffusionPipeline.from_pretrained(
                 settings.SD_MODEL_ID,
                 torch_dtype=torch.float32,
-                safety_checker=None
-            )
-            
-            # Initialize image-to-image pipeline
-            self.img2img_pipe = StableDiffusionImg2ImgPipeline.from_pretrained(
-                settings.SD_MODEL_ID,
-                torch_dtype=torch.float32,
-                safety_checker=None
+                safety_checker=None,
+                **overrides
             )
 
+            if settings.SD_QUANTIZE_INT8:
+                quantize_pipeline(self.pipe, settings.SD_MODEL_ID, cached=overrides)
+
+            # Per-style LoRA adapters, loaded once and switched per request
+            self.lora = load_style_adapters(self.pipe.unet)
+            self.lora_styles = self.lora.styles
+            
             # Move to CPU and optimize
             self.pipe.to(self.device)
-            self.img2img_pipe.to(self.device)
 
             # Enable memory efficient attention
             self.pipe.enable_attention_slicing(1)
-            self.img2img_pipe.enable_attention_slicing(1)
             
             # Enable VAE tiling for memory efficiency
             self.pipe.enable_vae_tiling()
-            self.img2img_pipe.enable_vae_tiling()
+
+            # channels_last / torch.compile per the CPU execution profile
+            optimize_pipeline(self.pipe)
+
+            # Image-to-image pipeline reuses the already loaded (and already
+            # optimized) UNet, VAE and text encoder instead of loading them again
+            self.img2img_pipe = self._derive_pipeline(StableDiffusionImg2ImgPipeline)
+
+            self.component_sizes = pipeline_component_sizes(self.pipe)
+            log_component_sizes(settings.SD_MODEL_ID, self.component_sizes)
+            return self.pipe
 
         except Exception as e:
             logger.error(f"Failed to initialize Stable Diffusion pipeline: {str(e)}")
             raise
 
-    def _get_cache_key(self, prompt: str, **params) -> str:
-        """Generate cache key from prompt and parameters."""
-        cache_data = {
-            "prompt": prompt,
-            **params
+    def _release_pipeline(self, pipe: StableDiffusionPipeline):
+        """Drop the service's references to an evicted pipeline."""
+        self.pipe = None
+        self.img2img_pipe = None
+        self.lora = None
+        # Rollback reloads the previous UNet from disk after an eviction
+        self.previous_unet = None
+        self.previous_lora = None
+
+    def _derive_pipeline(self, pipeline_cls, scheduler=None):
+        """Build another pipeline type on top of the text-to-image components.
+
+        Only the scheduler is duplicated, since it holds per-run timestep state.
+        Construction is cheap (no weights are copied), so this is also used to
+        give each request its own scheduler without touching the shared pipes.
+        """
+        components = dict(self.pipe.components)
+        components["scheduler"] = scheduler or self.pipe.scheduler.__class__.from_config(
+            self.pipe.scheduler.config
+        )
+        return pipeline_cls(**components, requires_safety_checker=False)
+
+    def _pipeline_for_tier(self, pipeline_cls, quality: str) -> Tuple[object, LoraAdapters, str]:
+        """Return a pipeline using the quality tier's scheduler, with its adapters and model key.
+
+        Taken together under the swap lock, so the model key names the UNet
+        the pipeline actually renders with, even if a swap happens meanwhile.
+        """
+        tier = get_quality_tier(quality)
+        with self._swap_lock:
+            pipe = self._derive_pipeline(
+                pipeline_cls,
+                scheduler=create_scheduler(tier.scheduler, self.pipe.scheduler.config)
+            )
+            return pipe, self.lora, self.model_key
+
+    @staticmethod
+    def _resolve_steps(num_inference_steps: Optional[int], quality: str) -> int:
+        """Use the tier's step count unless the request sets one, capped for CPU inference."""
+        steps = num_inference_steps or get_quality_tier(quality).num_inference_steps
+        return min(steps, MAX_INFERENCE_STEPS)
+
+    @staticmethod
+    def _two_pass_base_size(width: int, height: int) -> Optional[Tuple[int, int]]:
+        """First-pass resolution for a two-pass render, or None if the target is already that small."""
+        ratio = settings.TWO_PASS_BASE_SIZE / max(width, height)
+        if ratio >= 1:
+            return None
+        return (
+            max(256, snap_dimension(width * ratio, 64)),
+            max(256, snap_dimension(height * ratio, 64)),
+        )
+
+    def _normalize_params(
+        self,
+        prompt: str,
+        negative_prompt: Optional[str],
+        num_inference_steps: Optional[int],
+        guidance_scale: Optional[float],
+        quality: str,
+        style: Optional[str] = None
+    ) -> dict:
+        """Resolve defaults and clamps so equivalent requests share a cache key.
+
+        A style without a LoRA adapter renders with the base weights, so it is
+        keyed like no style at all.
+        """
+        return {
+            "model": self.model_key,
+            "prompt": normalize_prompt(prompt),
+            "negative_prompt": normalize_prompt(negative_prompt),
+            "num_inference_steps": self._resolve_steps(num_inference_steps, quality),
+            "guidance_scale": float(guidance_scale or settings.DEFAULT_GUIDANCE_SCALE),
+            "quality": quality,
+            "style": style if style in self.lora_styles else None,
         }
-        return hashlib.md5(json.dumps(cache_data, sort_keys=True).encode()).hexdigest()
+
+    @staticmethod
+    def _result_cache_key(kind: str, seed: Optional[int], **params) -> str:
+        """Cache key for a request: ``<any seed key>:<seed>``, or the "any seed" key without one.
+
+        Renders are stored once under their seed's key; the "any seed" entry
+        only holds the seed, pointing requests without one at that render.
+        """
+        any_seed_key = canonical_cache_key(kind, **params)
+        return any_seed_key if seed is None else f"{any_seed_key}:{seed}"
+
+    def _encode_prompts(self, prompts: List[str]) -> torch.Tensor:
+        """Return text encoder hidden states for ``prompts``, using the embedding cache.
+
+        Entries are keyed by model and token ids, so prompts that only differ
+        beyond the tokenizer's truncation length share an entry.
+        """
+        tokenizer = self.pipe.tokenizer
+        input_ids = tokenizer(
+            prompts,
+            padding="max_length",
+            max_length=tokenizer.model_max_length,
+            truncation=True,
+            return_tensors="pt"
+        ).input_ids
+
+        embeddings = []
+        for prompt, ids in zip(prompts, input_ids):
+            # The text encoder is never swapped, so entries outlive checkpoint swaps
+            key = (self.base_model_key, tuple(ids.tolist()))
+            prompt_embeds = self.prompt_cache.get(key)
+            if prompt_embeds is None:
+                with torch.no_grad():
+                    prompt_embeds, _ = self.pipe.encode_prompt(
+                        prompt,
+                        self.device,
+                        num_images_per_prompt=1,
+                        do_classifier_free_guidance=False
+                    )
+                self.prompt_cache.put(key, prompt_embeds)
+            embeddings.append(prompt_embeds)
+
+        return torch.cat(embeddings)
+
+    def _prompt_kwargs(
+        self,
+        prompts: List[str],
+        negative_prompts: List[Optional[str]],
+        guidance_scale: float
+    ) -> dict:
+        """Build cached ``prompt_embeds``/``negative_prompt_embeds`` pipeline arguments."""
+        kwargs = {"prompt_embeds": self._encode_prompts(prompts)}
+        # Negative embeddings are only used with classifier-free guidance
+        if guidance_scale > 1:
+            kwargs["negative_prompt_embeds"] = self._encode_prompts(
+                [negative_prompt or "" for negative_prompt in negative_prompts]
+            )
+        return kwargs
+
+    def get_stats(self) -> dict:
+        """Return runtime counters for the generation caches."""
+        return {
+            "prompt_embedding_cache": self.prompt_cache.stats(),
+            "result_cache": self.result_cache.stats(),
+            "models": model_registry.stats()
+        }
+
+    @staticmethod
+    def _encode_result(image: Image.Image, seed: int, output_format: OutputFormat) -> GenerationResult:
+        """Encode a rendered image in the negotiated response format."""
+        return GenerationResult(
+            image=encode_image(image, output_format),
+            seed=seed,
+            media_type=output_format.media_type
+        )
+
+    @staticmethod
+    def _encode_for_cache(image: Image.Image) -> bytes:
+        """Encode a PIL image in the (smaller) result cache format."""
+        img_byte_arr = io.BytesIO()
+        if settings.RESULT_CACHE_FORMAT == "WEBP":
+            image.save(img_byte_arr, format="WEBP", lossless=True, quality=80, method=4)
+        else:
+            image.save(img_byte_arr, format=settings.RESULT_CACHE_FORMAT)
+        return img_byte_arr.getvalue()
+
+    def _read_cache(self, cache_key: str) -> Optional[Tuple[bytes, int]]:
+        """Return the cached canonical encoding and seed for ``cache_key``."""
+        cached = self.result_cache.get(cache_key)
+        if cached is not None and len(cached) == SEED_SIZE:
+            # "Any seed" entry: follow it to the render stored under its seed
+            seed, = struct.unpack(">I", cached)
+            cached = self.result_cache.get(f"{cache_key}:{seed}")
+        if cached is None:
+            return None
+        # Renders are a 4-byte big-endian seed followed by the encoded image
+        seed, = struct.unpack(">I", cached[:SEED_SIZE])
+        return cached[SEED_SIZE:], seed
+
+    def _get_cached(self, cache_key: str, output_format: OutputFormat) -> Optional[GenerationResult]:
+        """Look up a cached result, transcoded to ``output_format``."""
+        cached = self._read_cache(cache_key)
+        if cached is None:
+            return None
+        encoded, seed = cached
+        return GenerationResult(
+            image=transcode(encoded, settings.RESULT_CACHE_FORMAT, output_format),
+            seed=seed,
+            media_type=output_format.media_type
+        )
+
+    def _get_cached_render(self, cache_key: str) -> Optional[Tuple[Image.Image, int]]:
+        """Decode a cached result, for callers that waited on another worker's render."""
+        cached = self._read_cache(cache_key)
+        if cached is None:
+            return None
+        encoded, seed = cached
+        return Image.open(io.BytesIO(encoded)), seed
+
+    def _cache_result(self, any_seed_key: str, image: Image.Image, seed: int):
+        """Store a render under its seed's key and point the "any seed" key at it."""
+        header = struct.pack(">I", seed)
+        self.result_cache.set(f"{any_seed_key}:{seed}", header + self._encode_for_cache(image))
+        self.result_cache.set(any_seed_key, header)
+
+    async def _render_once(
+        self,
+        cache_key: Optional[str],
+        render,
+        output_format: OutputFormat
+    ) -> GenerationResult:
+        """Run ``render`` through single-flight when the result is cacheable.
+
+        ``render`` returns the unencoded image and its seed, so callers sharing
+        one render can each receive their own output format.
+        """
+        if cache_key is None:
+            image, seed = await render()
+        else:
+            image, seed = await self.single_flight.do(
+                cache_key,
+                render,
+                functools.partial(self._get_cached_render, cache_key)
+            )
+        return await asyncio.to_thread(self._encode_result, image, seed, output_format)
+
+    def _find_similar_sketch(self, params_key: str, sketch_hash: int) -> Optional[str]:
+        """Return the cache key of an indexed sketch perceptually close to ``sketch_hash``."""
+        try:
+            index = self.redis_client.hgetall(f"sketch_phash:{params_key}")
+        except Exception as e:
+            logger.warning(f"Sketch similarity lookup failed: {str(e)}")
+            return None
+
+        best_key, best_distance = None, settings.SKETCH_CACHE_PHASH_MAX_DISTANCE + 1
+        for indexed_hash, cache_key in index.items():
+            distance = hamming_distance(sketch_hash, int(indexed_hash, 16))
+            if distance < best_distance:
+                best_key, best_distance = cache_key.decode(), distance
+        return best_key
+
+    def _index_sketch(self, params_key: str, sketch_hash: int, cache_key: str):
+        """Record a rendered sketch in the near-duplicate index for its parameters."""
+        index_key = f"sketch_phash:{params_key}"
+        try:
+            pipe = self.redis_client.pipeline()
+            pipe.hset(index_key, f"{sketch_hash:016x}", cache_key)
+            pipe.expire(index_key, self.cache_ttl)
+            pipe.execute()
+        except Exception as e:
+            logger.warning(f"Sketch similarity indexing failed: {str(e)}")
+
+    async def _run_text_batch(self, batch_key: tuple, requests: list) -> list:
+        """Run one batched text-to-image call on the inference executor."""
+        return await inference_executor.run(self._text_batch, batch_key, requests)
+
+    @_uses_model
+    def _text_batch(self, batch_key: tuple, requests: list) -> list:
+        """Run one batched text-to-image pipeline call for compatible requests.
+
+        Returns an ``(image, model_key)`` pair per request.
+        """
+        width, height, num_inference_steps, guidance_scale, quality, style = batch_key
+        prompt_kwargs = self._prompt_kwargs(
+            [request["prompt"] for request in requests],
+            [request["negative_prompt"] for request in requests],
+            guidance_scale
+        )
+        # One generator per request keeps each image reproducible from its own
+        # seed, whatever else it was batched with
+        generators = [
+            torch.Generator(self.device).manual_seed(request["seed"])
+            for request in requests
+        ]
+
+        logger.info(
+            f"Generating batch of {len(requests)} at {width}x{height}, "
+            f"{num_inference_steps} steps ({quality}, style {style or 'none'})"
+        )
+        pipe, lora, model_key = self._pipeline_for_tier(StableDiffusionPipeline, quality)
+        with lora.activate(style):
+            images = pipe(
+                **prompt_kwargs,
+                num_inference_steps=num_inference_steps,
+                guidance_scale=guidance_scale,
+                width=width,
+                height=height,
+                generator=generators,
+            ).images
+        return [(image, model_key) for image in images]
+
+    @_uses_model
+    def _sketch_to_image(
+        self,
+        prompt: str,
+        image: Image.Image,
+        strength: float,
+        negative_prompt: Optional[str],
+        num_inference_steps: int,
+        guidance_scale: float,
+        quality: str,
+        seed: int,
+        style: Optional[str] = None
+    ) -> Tuple[Image.Image, str]:
+        """Run the img2img pipeline with cached prompt embeddings; returns the image and model key."""
+        pipe, lora, model_key = self._pipeline_for_tier(StableDiffusionImg2ImgPipeline, quality)
+        prompt_kwargs = self._prompt_kwargs([prompt], [negative_prompt], guidance_scale)
+        with lora.activate(style):
+            image = pipe(
+                **prompt_kwargs,
+                image=image,
+                strength=strength,
+                num_inference_steps=num_inference_steps,
+                guidance_scale=guidance_scale,
+                generator=torch.Generator(self.device).manual_seed(seed),
+            ).images[0]
+        return image, model_key
+
+    @_uses_model
+    def _refine_upscaled(
+        self,
+        image: Image.Image,
+        width: int,
+        height: int,
+        prompt: str,
+        negative_prompt: Optional[str],
+        guidance_scale: float,
+        quality: str,
+        seed: int,
+        style: Optional[str] = None
+    ) -> Tuple[Image.Image, str]:
+        """Upscale a first-pass render and refine it tile by tile with low-strength img2img.
+
+        Each tile only runs about ``strength * steps`` denoising steps at tile
+        resolution, which costs far less than attention over the full output.
+        Returns the image and the model key of the refining UNet.
+        """
+        upscaled = image.resize((width, height), Image.LANCZOS)
+        overlap = settings.TWO_PASS_TILE_OVERLAP
+        boxes = tile_boxes(width, height, settings.TWO_PASS_TILE_SIZE, overlap)
+        logger.info(f"Refining {width}x{height} upscale in {len(boxes)} tile(s)")
+
+        pipe, lora, model_key = self._pipeline_for_tier(StableDiffusionImg2ImgPipeline, quality)
+        batch_size = max(1, settings.GENERATION_BATCH_MAX_SIZE)
+        tiles = []
+        # Tiles all have the same size, so they run as batched pipeline calls
+        with lora.activate(style):
+            for start in range(0, len(boxes), batch_size):
+                chunk = boxes[start:start + batch_size]
+                tiles.extend(pipe(
+                    **self._prompt_kwargs(
+                        [prompt] * len(chunk), [negative_prompt] * len(chunk), guidance_scale
+                    ),
+                    image=[upscaled.crop(box) for box in chunk],
+                    strength=settings.TWO_PASS_REFINE_STRENGTH,
+                    num_inference_steps=settings.TWO_PASS_REFINE_STEPS,
+                    guidance_scale=guidance_scale,
+                    generator=[
+                        torch.Generator(self.device).manual_seed(seed + start + index)
+                        for index in range(len(chunk))
+                    ],
+                ).images)
+
+        return blend_tiles((width, height), boxes, tiles, overlap), model_key
 
     async def generate_from_prompt(
         self,
@@ -76,51 +799,89 @@ class StableDiffusionService:
         guidance_scale: float = None,
         width: int = 768,
         height: int = 768,
+        quality: str = DEFAULT_QUALITY_TIER,
+        style: Optional[str] = None,
+        seed: Optional[int] = None,
+        two_pass: bool = False,
+        output_format: OutputFormat = PNG,
         use_cache: bool = True
-    ) -> bytes:
-        """Generate image from text prompt with caching."""
+    ) -> GenerationResult:
+        """Generate image from text prompt with caching.
+
+        Without a ``seed`` a random one is used (or the one of a cached result)
+        and reported back in the result. With ``two_pass`` the image is drafted
+        at ``TWO_PASS_BASE_SIZE``, then upscaled and refined in tiles. A
+        ``style`` with a trained LoRA adapter renders with that adapter.
+        """
         try:
+            params = self._normalize_params(
+                prompt, negative_prompt, num_inference_steps, guidance_scale, quality, style
+            )
+            params["width"] = snap_dimension(width)
+            params["height"] = snap_dimension(height)
+            base_size = self._two_pass_base_size(params["width"], params["height"]) if two_pass else None
+            if base_size:
+                params["two_pass"] = True
+            cache_key = None
+
             # Check cache first
             if use_cache:
-                cache_key = self._get_cache_key(
-                    prompt,
-                    negative_prompt=negative_prompt,
-                    num_inference_steps=num_inference_steps,
-                    guidance_scale=guidance_scale,
-                    width=width,
-                    height=height
-                )
-                cached_result = self.redis_client.get(cache_key)
+                cache_key = self._result_cache_key("text", seed, **params)
+                cached_result = await asyncio.to_thread(self._get_cached, cache_key, output_format)
                 if cached_result:
                     logger.info("Cache hit for prompt")
                     return cached_result
 
-            num_inference_steps = num_inference_steps or settings.DEFAULT_INFERENCE_STEPS
-            guidance_scale = guidance_scale or settings.DEFAULT_GUIDANCE_SCALE
+            render_seed = seed if seed is not None else new_seed()
 
             # Add architectural context to prompt
-            enhanced_prompt = f"Indian architectural design, professional architectural visualization, {prompt}"
+            enhanced_prompt = f"Indian architectural design, professional architectural visualization, {params['prompt']}"
             
-            # Generate with lower inference steps for faster results
-            image = self.pipe(
-                prompt=enhanced_prompt,
-                negative_prompt=negative_prompt,
-                num_inference_steps=min(num_inference_steps, 30),  # Limit steps for faster inference
-                guidance_scale=guidance_scale,
-                width=width,
-                height=height,
-            ).images[0]
+            async def render() -> Tuple[Image.Image, int]:
+                # Generate with the tier's fast scheduler, batched with any
+                # concurrent requests that share the same shape
+                render_width, render_height = base_size or (params["width"], params["height"])
+                batch_key = (
+                    render_width,
+                    render_height,
+                    params["num_inference_steps"],
+                    params["guidance_scale"],
+                    quality,
+                    params["style"]
+                )
+                image, model_key = await self.batcher.submit(
+                    batch_key,
+                    {
+                        "prompt": enhanced_prompt,
+                        "negative_prompt": params["negative_prompt"],
+                        "seed": render_seed
+                    }
+                )
+                if base_size:
+                    image, refine_model_key = await inference_executor.run(
+                        self._refine_upscaled,
+                        image,
+                        width=params["width"],
+                        height=params["height"],
+                        prompt=enhanced_prompt,
+                        negative_prompt=params["negative_prompt"],
+                        guidance_scale=params["guidance_scale"],
+                        quality=quality,
+                        seed=render_seed,
+                        style=params["style"],
+                    )
+                    if refine_model_key != model_key:
+                        # A swap landed between the passes: no single model made this image
+                        model_key = None
 
-            # Convert to bytes
-            img_byte_arr = io.BytesIO()
-            image.save(img_byte_arr, format='PNG')
-            result = img_byte_arr.getvalue()
+                # Cache the result under the model that actually rendered it
+                if cache_key and model_key:
+                    any_seed_key = self._result_cache_key("text", None, **dict(params, model=model_key))
+                    await asyncio.to_thread(self._cache_result, any_seed_key, image, render_seed)
 
-            # Cache the result
-            if use_cache:
-                self.redis_client.setex(cache_key, self.cache_ttl, result)
+                return image, render_seed
 
-            return result
+            return await self._render_once(cache_key, render, output_format)
 
         except Exception as e:
             logger.error(f"Image generation failed: {str(e)}")
@@ -134,32 +895,86 @@ class StableDiffusionService:
         strength: float = 0.75,
         num_inference_steps: int = None,
         guidance_scale: float = None,
-    ) -> bytes:
-        """Generate architectural rendering from sketch."""
+        quality: str = DEFAULT_QUALITY_TIER,
+        style: Optional[str] = None,
+        seed: Optional[int] = None,
+        output_format: OutputFormat = PNG,
+        use_cache: bool = True
+    ) -> GenerationResult:
+        """Generate architectural rendering from sketch, cached by sketch content."""
         try:
-            if not isinstance(sketch_image, Image.Image):
-                sketch_image = Image.open(sketch_image).convert("RGB")
+            # Downscale, aspect-bucket and clean up the upload before hashing,
+            # so the cache key and the pipeline see the same normalized sketch
+            sketch_image = await asyncio.to_thread(
+                preprocess_sketch,
+                sketch_image,
+                settings.SKETCH_INPUT_SIZE,
+                settings.SKETCH_NORMALIZE_CONTRAST
+            )
+
+            params = self._normalize_params(
+                prompt, negative_prompt, num_inference_steps, guidance_scale, quality, style
+            )
+            params["strength"] = float(strength)
+
+            # Check cache first: keyed by the decoded pixels rather than the
+            # uploaded file, so re-encoded copies of the same sketch also hit.
+            # Near-duplicate lookups only apply when any seed is acceptable.
+            cache_key = None
+            use_phash = use_cache and seed is None and settings.SKETCH_CACHE_PHASH_ENABLED
+            if use_cache:
+                params["image"] = await asyncio.to_thread(pixel_digest, sketch_image)
+                cache_key = self._result_cache_key("sketch", seed, **params)
+                cached_result = await asyncio.to_thread(self._get_cached, cache_key, output_format)
 
-            num_inference_steps = num_inference_steps or settings.DEFAULT_INFERENCE_STEPS
-            guidance_scale = guidance_scale or settings.DEFAULT_GUIDANCE_SCALE
+                if use_phash:
+                    params_key = canonical_cache_key(
+                        "sketch", **{name: value for name, value in params.items() if name != "image"}
+                    )
+                    sketch_hash = await asyncio.to_thread(dhash, sketch_image)
+                    if cached_result is None:
+                        similar_key = await asyncio.to_thread(
+                            self._find_similar_sketch, params_key, sketch_hash
+                        )
+                        if similar_key:
+                            cached_result = await asyncio.to_thread(self._get_cached, similar_key, output_format)
+
+                if cached_result:
+                    logger.info("Cache hit for sketch")
+                    return cached_result
+
+            render_seed = seed if seed is not None else new_seed()
 
             # Add architectural context to prompt
-            enhanced_prompt = f"Indian architectural design, professional architectural visualization, detailed rendering, {prompt}"
+            enhanced_prompt = f"Indian architectural design, professional architectural visualization, detailed rendering, {params['prompt']}"
 
-            # Generate with optimized settings
-            image = self.img2img_pipe(
-                prompt=enhanced_prompt,
-                image=sketch_image,
-                strength=strength,
-                negative_prompt=negative_prompt,
-                num_inference_steps=min(num_inference_steps, 30),  # Limit steps
-                guidance_scale=guidance_scale,
-            ).images[0]
+            async def render() -> Tuple[Image.Image, int]:
+                # Generate with optimized settings
+                image, model_key = await inference_executor.run(
+                    self._sketch_to_image,
+                    prompt=enhanced_prompt,
+                    image=sketch_image,
+                    strength=params["strength"],
+                    negative_prompt=params["negative_prompt"],
+                    num_inference_steps=params["num_inference_steps"],
+                    guidance_scale=params["guidance_scale"],
+                    quality=quality,
+                    seed=render_seed,
+                    style=params["style"],
+                )
+
+                # Cache the result under the model that actually rendered it
+                if cache_key:
+                    any_seed_key = self._result_cache_key("sketch", None, **dict(params, model=model_key))
+                    await asyncio.to_thread(self._cache_result, any_seed_key, image, render_seed)
+                    # The similarity index points at the request's key, so only
+                    # index renders made by the model that key names
+                    if use_phash and model_key == params["model"]:
+                        await asyncio.to_thread(self._index_sketch, params_key, sketch_hash, cache_key)
+
+                return image, render_seed
 
-            # Convert to bytes
-            img_byte_arr = io.BytesIO()
-            image.save(img_byte_arr, format='PNG')
-            return img_byte_arr.getvalue()
+            return await self._render_once(cache_key, render, output_format)
 
         except Exception as e:
             logger.error(f"Sketch-to-image generation failed: {str(e)}")
@@ -0,0 +1,74 @@
+import math
+from typing import List, Tuple
+import numpy as np
+from PIL import Image
+
+Box = Tuple[int, int, int, int]
+
+
+def _axis_tiles(length: int, max_tile: int, overlap: int, multiple: int = 8) -> Tuple[int, List[int]]:
+    """Tile length and start offsets covering ``length`` with as few, as small tiles as possible.
+
+    Uses the fewest tiles of at most ``max_tile`` that overlap by ``overlap``,
+    then shrinks them to just cover the axis, so refining does not redo much
+    more than the output area.
+    """
+    if length <= max_tile:
+        return length, [0]
+    count = math.ceil((length - overlap) / (max_tile - overlap))
+    tile = math.ceil((length + (count - 1) * overlap) / count)
+    tile = min(length, math.ceil(tile / multiple) * multiple)
+    # Spread the tiles evenly, the last one ending on the edge
+    starts = [round(index * (length - tile) / (count - 1)) for index in range(count)]
+    return tile, starts
+
+
+def tile_boxes(width: int, height: int, tile_size: int, overlap: int) -> List[Box]:
+    """Split an image into equally sized, overlapping (left, top, right, bottom) boxes."""
+    tile_width, x_starts = _axis_tiles(width, tile_size, overlap)
+    tile_height, y_starts = _axis_tiles(height, tile_size, overlap)
+    return [
+        (x, y, x + tile_width, y + tile_height)
+        for y in y_starts
+        for x in x_starts
+    ]
+
+
+def _ramp(length: int, overlap: int, fade_start: bool, fade_end: bool) -> np.ndarray:
+    weights = np.ones(length, dtype=np.float32)
+    ramp_length = min(overlap, length // 2)
+    if ramp_length > 0:
+        ramp = (np.arange(ramp_length, dtype=np.float32) + 1) / (ramp_length + 1)
+        if fade_start:
+            weights[:ramp_length] = np.minimum(weights[:ramp_length], ramp)
+        if fade_end:
+            weights[-ramp_length:] = np.minimum(weights[-ramp_length:], ramp[::-1])
+    return weights
+
+
+def _feather_weights(box: Box, size: Tuple[int, int], overlap: int) -> np.ndarray:
+    """Per-pixel blend weights for a tile, fading out on edges shared with other tiles."""
+    left, top, right, bottom = box
+    width, height = size
+    x_weights = _ramp(right - left, overlap, left > 0, right < width)
+    y_weights = _ramp(bottom - top, overlap, top > 0, bottom < height)
+    return np.outer(y_weights, x_weights)[..., None]
+
+
+def blend_tiles(
+    size: Tuple[int, int],
+    boxes: List[Box],
+    tiles: List[Image.Image],
+    overlap: int
+) -> Image.Image:
+    """Reassemble processed tiles, feathering the overlaps to hide seams."""
+    width, height = size
+    accumulated = np.zeros((height, width, 3), dtype=np.float32)
+    total_weight = np.zeros((height, width, 1), dtype=np.float32)
+    for box, tile in zip(boxes, tiles):
+        left, top, right, bottom = box
+        weights = _feather_weights(box, size, overlap)
+        accumulated[top:bottom, left:right] += np.asarray(tile.convert("RGB"), dtype=np.float32) * weights
+        total_weight[top:bottom, left:right] += weights
+    blended = np.clip(accumulated / total_weight, 0, 255).round().astype(np.uint8)
+    return Image.fromarray(blended)
@@ -14,7 +14,16 @@ class TrainingConfig(BaseModel):
     max_train_steps: int = 1000
     save_steps: int = 100
     mixed_precision: str = "fp16"  # or "no" for full precision
+
+    # Per-style LoRA Parameters
+    lora_rank: int = 8
+    lora_alpha: int = 8
+    lora_learning_rate: float = 1e-4
+    lora_target_modules: List[str] = ["to_q", "to_k", "to_v", "to_out.0"]
     
+    # Text Embedding Cache
+    text_embedding_cache_dir: str = "data/text_embeddings"  # hidden states per unique prompt, reused across runs
+
     # Dataset Parameters
     resolution: int = 768
     center_crop: bool = True
@@ -1,14 +1,18 @@
 import os
-from typing import Dict, List, Tuple
+from typing import Dict, List, Optional, Tuple
 from PIL import Image
 import torch
 from torch.utils.data import Dataset
 from torchvision import transforms
 from .config import training_config
+from .latent_store import LatentStore
+import logging
 import random
 import json
 from pathlib import Path
 
+logger = logging.getLogger(__name__)
+
 class IndianArchitectureDataset(Dataset):
     def __init__(
         self,
@@ -16,9 +20,12 @@ class IndianArchitectureDataset(Dataset):
         tokenizer,
         size: int = 768,
         center_crop: bool = True,
-        random_flip: bool = True
+        random_flip: bool = True,
+        styles: Optional[List[str]] = None,
+        latent_store: Optional[str] = None
     ):
         self.data_root = Path(data_root)
+        self.styles = styles or training_config.styles
         self.tokenizer = tokenizer
         self.size = size
         self.center_crop = center_crop
@@ -28,14 +35,25 @@ class IndianArchitectureDataset(Dataset):
         self.metadata = {}
         self._load_dataset()
         
+        # Flips are applied in __getitem__, so load_image is deterministic
         self.transform = transforms.Compose([
             transforms.Resize(size, interpolation=transforms.InterpolationMode.BILINEAR),
             transforms.CenterCrop(size) if center_crop else transforms.Lambda(lambda x: x),
-            transforms.RandomHorizontalFlip() if random_flip else transforms.Lambda(lambda x: x),
             transforms.ToTensor(),
             transforms.Normalize([0.5], [0.5])
         ])
 
+        # Latent mode: read precomputed VAE moments instead of decoding images
+        self.latent_store = None
+        if latent_store:
+            self.latent_store = LatentStore(latent_store)
+            self.latent_store.check_config(
+                model_id=training_config.base_model_id,
+                resolution=size,
+                center_crop=center_crop
+            )
+            self._attach_latent_rows()
+
     def _load_dataset(self):
         """Load dataset and metadata."""
         # Load metadata if exists
@@ -45,7 +63,7 @@ class IndianArchitectureDataset(Dataset):
                 self.metadata = json.load(f)
         
         # Scan for images
-        for style in training_config.styles:
+        for style in self.styles:
             style_dir = self.data_root / style
             if not style_dir.exists():
                 continue
@@ -57,6 +75,23 @@ class IndianArchitectureDataset(Dataset):
                     "metadata": self.metadata.get(str(img_path), {})
                 })
 
+    def _attach_latent_rows(self):
+        """Look up each image's latent store row, dropping images encoded stale or not at all."""
+        encoded = []
+        for item in self.image_paths:
+            row = self.latent_store.row(item["path"])
+            if row is not None:
+                encoded.append(dict(item, latent_row=row))
+        skipped = len(self.image_paths) - len(encoded)
+        if skipped:
+            logger.warning(f"Skipping {skipped} images missing from or changed since the latent store; rerun precompute_latents")
+        self.image_paths = encoded
+
+    def load_image(self, idx: int) -> torch.Tensor:
+        """Decode and transform image ``idx`` (unflipped)."""
+        image = Image.open(self.image_paths[idx]["path"]).convert("RGB")
+        return self.transform(image)
+
     def _generate_prompt(self, style: str, metadata: Dict) -> str:
         """Generate a prompt for the image using templates."""
         template = random.choice(training_config.prompt_templates)
@@ -75,11 +110,12 @@ class IndianArchitectureDataset(Dataset):
 
     def __getitem__(self, idx: int) -> Tuple[torch.Tensor, Dict]:
         item = self.image_paths[idx]
-        image = Image.open(item["path"]).convert("RGB")
-        
-        # Apply transformations
-        if self.transform is not None:
-            image = self.transform(image)
+        flip = self.random_flip and random.random() < 0.5
+        if self.latent_store is not None:
+            example = {"latent_moments": self.latent_store.get(item["latent_row"], flipped=flip)}
+        else:
+            image = self.load_image(idx)
+            example = {"image": torch.flip(image, dims=[2]) if flip else image}
             
         # Generate prompt
         prompt = self._generate_prompt(item["style"], item["metadata"])
@@ -93,22 +129,25 @@ class IndianArchitectureDataset(Dataset):
             return_tensors="pt"
         ).input_ids[0]
         
-        return {
-            "image": image,
+        example.update({
             "prompt_ids": tokenized_prompt,
             "prompt": prompt,
             "style": item["style"]
-        }
+        })
+        return example
 
     @staticmethod
     def collate_fn(examples: List[Dict]) -> Dict:
         """Collate examples for DataLoader."""
-        pixel_values = torch.stack([example["image"] for example in examples])
         prompt_ids = torch.stack([example["prompt_ids"] for example in examples])
         
-        return {
-            "pixel_values": pixel_values,
+        batch = {
             "prompt_ids": prompt_ids,
             "prompts": [example["prompt"] for example in examples],
             "styles": [example["style"] for example in examples]
-        } 
\ No newline at end of file
+        }
+        if "latent_moments" in examples[0]:
+            batch["latent_moments"] = torch.stack([example["latent_moments"] for example in examples])
+        else:
+            batch["pixel_values"] = torch.stack([example["image"] for example in examples])
+        return batch 
\ No newline at end of file
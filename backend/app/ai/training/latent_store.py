@@ -0,0 +1,128 @@
+import json
+import logging
+from pathlib import Path
+from typing import Dict, Optional
+import numpy as np
+import torch
+from tqdm.auto import tqdm
+
+logger = logging.getLogger(__name__)
+
+MOMENTS_FILE = "moments.npy"
+INDEX_FILE = "index.json"
+
+# Second axis of the moments array
+ORIGINAL = 0
+FLIPPED = 1
+
+
+def _image_key(path: str) -> Dict:
+    stat = Path(path).stat()
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+def sample_latents(moments: torch.Tensor) -> torch.Tensor:
+    """Sample latents from stored VAE posterior moments (mean and log-variance).
+
+    Matches ``vae.encode(...).latent_dist.sample()``, so training still sees
+    fresh posterior noise every step.
+    """
+    mean, logvar = torch.chunk(moments, 2, dim=1)
+    std = torch.exp(0.5 * torch.clamp(logvar, -30.0, 20.0))
+    return mean + std * torch.randn_like(mean)
+
+
+class LatentStore:
+    """VAE posterior moments for every training image and its horizontal flip.
+
+    ``moments.npy`` holds a float16 array of shape ``(images, 2, 2 * C, H, W)``
+    (original and flipped view), memory-mapped so workers read only the rows
+    they need. ``index.json`` maps image paths to rows and records the
+    preprocessing the latents were encoded with.
+    """
+
+    def __init__(self, root: str):
+        self.root = Path(root)
+        with open(self.root / INDEX_FILE, "r") as f:
+            index = json.load(f)
+        self.config = index["config"]
+        self.images = index["images"]
+        self.moments = np.load(self.root / MOMENTS_FILE, mmap_mode="r")
+        self._rows = {image["path"]: row for row, image in enumerate(self.images)}
+
+    def check_config(self, **config):
+        """Raise ValueError if the store was built with different preprocessing."""
+        mismatched = {
+            name: (self.config.get(name), value)
+            for name, value in config.items()
+            if self.config.get(name) != value
+        }
+        if mismatched:
+            raise ValueError(f"Latent store {self.root} was built with different settings: {mismatched}")
+
+    def row(self, path: str) -> Optional[int]:
+        """Row for ``path``, or None if it is missing or the file changed since encoding."""
+        row = self._rows.get(path)
+        if row is None or self.images[row]["key"] != _image_key(path):
+            return None
+        return row
+
+    def get(self, row: int, flipped: bool = False) -> torch.Tensor:
+        # Copy out of the read-only memmap
+        return torch.from_numpy(np.array(self.moments[row, FLIPPED if flipped else ORIGINAL]))
+
+    @classmethod
+    def build(
+        cls,
+        dataset,
+        vae,
+        output_dir: str,
+        model_id: str,
+        batch_size: int = 8,
+        device: str = "cpu"
+    ) -> "LatentStore":
+        """Encode every image of ``dataset`` (built without random flips) and its flip once."""
+        if not dataset.center_crop:
+            raise ValueError("Latent stores need square, center-cropped images")
+        root = Path(output_dir)
+        root.mkdir(parents=True, exist_ok=True)
+        count = len(dataset)
+        if count == 0:
+            raise ValueError("No training images to encode")
+
+        vae = vae.to(device).eval()
+        dtype = next(vae.parameters()).dtype
+        latent_size = dataset.size // 8
+        moments = np.lib.format.open_memmap(
+            root / MOMENTS_FILE,
+            mode="w+",
+            dtype=np.float16,
+            shape=(count, 2, 2 * vae.config.latent_channels, latent_size, latent_size)
+        )
+
+        images = []
+        for start in tqdm(range(0, count, batch_size), desc="Encoding latents"):
+            rows = range(start, min(start + batch_size, count))
+            pixel_values = torch.stack([dataset.load_image(row) for row in rows])
+            pixel_values = pixel_values.to(device, dtype=dtype)
+            with torch.no_grad():
+                for view, pixels in ((ORIGINAL, pixel_values), (FLIPPED, torch.flip(pixel_values, dims=[3]))):
+                    parameters = vae.encode(pixels).latent_dist.parameters
+                    moments[start:start + len(rows), view] = parameters.float().cpu().numpy()
+            for row in rows:
+                item = dataset.image_paths[row]
+                images.append({"path": item["path"], "style": item["style"], "key": _image_key(item["path"])})
+
+        moments.flush()
+        del moments
+        with open(root / INDEX_FILE, "w") as f:
+            json.dump({
+                "config": {
+                    "model_id": model_id,
+                    "resolution": dataset.size,
+                    "center_crop": dataset.center_crop,
+                },
+                "images": images,
+            }, f)
+        logger.info(f"Encoded latents for {count} images into {root}")
+        return cls(str(root))
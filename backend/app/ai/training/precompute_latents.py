@@ -0,0 +1,72 @@
+"""
+Encode the training images (and their horizontal flips) into a latent store once.
+
+Run from the backend directory:
+    python -m app.ai.training.precompute_latents --data_root data/training --output_dir data/latents
+then train with ``--latent_store data/latents``. Rerun after adding or
+changing images; images missing from the store are skipped during training.
+"""
+import argparse
+import logging
+import torch
+from diffusers import AutoencoderKL
+from transformers import CLIPTokenizer
+from .config import training_config
+from .dataset import IndianArchitectureDataset
+from .latent_store import LatentStore
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def main():
+    parser = argparse.ArgumentParser(description="Precompute VAE latents for training")
+    parser.add_argument(
+        "--data_root",
+        type=str,
+        default="data/training",
+        help="Root directory containing training images"
+    )
+    parser.add_argument(
+        "--output_dir",
+        type=str,
+        default="data/latents",
+        help="Directory to write the latent store to"
+    )
+    parser.add_argument(
+        "--batch_size",
+        type=int,
+        default=8,
+        help="Images per VAE encoder call"
+    )
+    parser.add_argument(
+        "--device",
+        type=str,
+        default="cuda" if torch.cuda.is_available() else "cpu"
+    )
+
+    args = parser.parse_args()
+
+    # Only the tokenizer and VAE are needed, not the whole pipeline
+    tokenizer = CLIPTokenizer.from_pretrained(training_config.base_model_id, subfolder="tokenizer")
+    vae = AutoencoderKL.from_pretrained(training_config.base_model_id, subfolder="vae")
+
+    dataset = IndianArchitectureDataset(
+        data_root=args.data_root,
+        tokenizer=tokenizer,
+        size=training_config.resolution,
+        center_crop=training_config.center_crop,
+        random_flip=False
+    )
+    logger.info(f"Encoding {len(dataset)} images at {training_config.resolution}px")
+
+    LatentStore.build(
+        dataset,
+        vae,
+        args.output_dir,
+        model_id=training_config.base_model_id,
+        batch_size=args.batch_size,
+        device=args.device
+    )
+
+if __name__ == "__main__":
+    main()
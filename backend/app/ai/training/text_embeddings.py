@@ -0,0 +1,69 @@
+import hashlib
+import logging
+import os
+from pathlib import Path
+import torch
+from ..prompt_cache import PromptEmbeddingCache
+
+logger = logging.getLogger(__name__)
+
+
+class TextEmbeddingCache:
+    """Text encoder hidden states for training prompts, cached in memory and on disk.
+
+    Prompts come from a finite set of templates and metadata combinations,
+    so each unique prompt is encoded once and then looked up. Entries are
+    keyed by model and token ids and saved as ``<key>.pt`` under
+    ``cache_dir``, so later runs (and LoRA runs for other styles) reuse them.
+    """
+
+    def __init__(
+        self,
+        text_encoder: torch.nn.Module,
+        model_id: str,
+        cache_dir: str,
+        max_memory_bytes: int = 512 * 1024 * 1024
+    ):
+        self.text_encoder = text_encoder.requires_grad_(False).eval()
+        self.model_id = model_id
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.memory = PromptEmbeddingCache(max_bytes=max_memory_bytes)
+        self.encoded = 0
+
+    def _key(self, input_ids: torch.Tensor) -> str:
+        digest = hashlib.sha256(self.model_id.encode())
+        digest.update(input_ids.to(torch.int64).cpu().numpy().tobytes())
+        return digest.hexdigest()
+
+    def _load_or_encode(self, key: str, input_ids: torch.Tensor) -> torch.Tensor:
+        path = self.cache_dir / f"{key}.pt"
+        if path.exists():
+            return torch.load(path, map_location="cpu")
+
+        device = next(self.text_encoder.parameters()).device
+        with torch.no_grad():
+            hidden_states = self.text_encoder(input_ids.unsqueeze(0).to(device))[0][0]
+        hidden_states = hidden_states.to("cpu", dtype=torch.float16)
+        self.encoded += 1
+
+        # Written under a temporary name so concurrent runs never read a partial file
+        tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+        torch.save(hidden_states, tmp_path)
+        os.replace(tmp_path, path)
+        return hidden_states
+
+    def encode(self, prompt_ids: torch.Tensor) -> torch.Tensor:
+        """Return hidden states for a batch of token ids, shape ``(batch, tokens, dim)``."""
+        hidden_states = []
+        for input_ids in prompt_ids:
+            key = self._key(input_ids)
+            embedding = self.memory.get(key)
+            if embedding is None:
+                embedding = self._load_or_encode(key, input_ids)
+                self.memory.put(key, embedding)
+            hidden_states.append(embedding)
+        return torch.stack(hidden_states)
+
+    def stats(self) -> dict:
+        return dict(self.memory.stats(), encoded=self.encoded)
@@ -2,6 +2,7 @@ import argparse
 import logging
 from pathlib import Path
 from .trainer import StableDiffusionTrainer
+from .config import training_config
 from ...core.config import settings
 
 logging.basicConfig(level=logging.INFO)
@@ -50,10 +51,29 @@ def main():
     parser.add_argument(
         "--resume_from",
         type=str,
-        help="Path to checkpoint to resume training from"
+        help="Path to checkpoint to resume training from (with --lora, one style's checkpoint)"
+    )
+    parser.add_argument(
+        "--latent_store",
+        type=str,
+        help="Latent store written by precompute_latents, used instead of encoding images every step"
+    )
+    parser.add_argument(
+        "--lora",
+        action="store_true",
+        help="Train a small LoRA adapter per style instead of fine-tuning the full UNet"
+    )
+    parser.add_argument(
+        "--styles",
+        nargs="+",
+        choices=training_config.styles,
+        help="Styles to train LoRA adapters for (default: all)"
     )
     
     args = parser.parse_args()
+    if args.lora and args.resume_from and len(args.styles or []) != 1:
+        # A LoRA checkpoint belongs to one style's adapter
+        parser.error("--resume_from with --lora needs exactly one --styles value")
     
     # Setup directories
     data_path, output_path = setup_training_directories(args.data_root, args.output_dir)
@@ -61,22 +81,31 @@ def main():
     logger.info(f"Training data directory: {data_path}")
     logger.info(f"Output directory: {output_path}")
     
-    # Initialize trainer
-    trainer = StableDiffusionTrainer(
-        data_root=str(data_path),
-        output_dir=str(output_path),
-        use_wandb=args.use_wandb,
-        wandb_project=args.wandb_project
-    )
-    
-    # Resume from checkpoint if specified
-    if args.resume_from:
-        logger.info(f"Resuming training from checkpoint: {args.resume_from}")
-        trainer.load_checkpoint(args.resume_from)
-    
-    # Start training
-    logger.info("Starting training...")
-    trainer.train()
+    # One LoRA adapter per style, or one full fine-tune across all styles
+    lora_styles = (args.styles or training_config.styles) if args.lora else [None]
+    for style in lora_styles:
+        # Initialize trainer
+        trainer = StableDiffusionTrainer(
+            data_root=str(data_path),
+            output_dir=str(output_path),
+            use_wandb=args.use_wandb,
+            wandb_project=args.wandb_project,
+            lora_style=style,
+            latent_store=args.latent_store
+        )
+        if len(trainer.dataset) == 0:
+            logger.warning(f"No training images for {style or 'any style'}, skipping")
+            continue
+
+        # Resume from checkpoint if specified
+        if args.resume_from:
+            logger.info(f"Resuming training from checkpoint: {args.resume_from}")
+            trainer.load_checkpoint(args.resume_from)
+
+        # Start training
+        logger.info(f"Starting training{f' for {style}' if style else ''}...")
+        trainer.train()
+        del trainer
     logger.info("Training completed!")
 
 if __name__ == "__main__":
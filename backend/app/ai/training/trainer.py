@@ -4,29 +4,45 @@ import torch.nn.functional as F
 from accelerate import Accelerator
 from diffusers import StableDiffusionPipeline, DDPMScheduler
 from diffusers.optimization import get_scheduler
+from diffusers.utils import convert_state_dict_to_diffusers, convert_unet_state_dict_to_peft
+from peft import LoraConfig
+from peft.utils import get_peft_model_state_dict, set_peft_model_state_dict
 from tqdm.auto import tqdm
 from torch.utils.data import DataLoader
 from .dataset import IndianArchitectureDataset
+from .latent_store import sample_latents
+from .text_embeddings import TextEmbeddingCache
 from .config import training_config
 import logging
 from pathlib import Path
-from typing import Optional, Dict
+from typing import Optional, Dict, Union
 import wandb
 
 logger = logging.getLogger(__name__)
 
 class StableDiffusionTrainer:
+    """Fine-tunes the full UNet on all styles, or with ``lora_style`` a small
+    LoRA adapter on that style's images only.
+
+    Style adapters are saved to ``<output_dir>/lora/<style>``, where the
+    inference service loads them (``LORA_DIR``). With ``latent_store`` (see
+    ``precompute_latents``) images are read as precomputed VAE latents.
+    """
+
     def __init__(
         self,
         data_root: str,
         output_dir: str,
         use_wandb: bool = True,
-        wandb_project: str = "indira-architecture"
+        wandb_project: str = "indira-architecture",
+        lora_style: Optional[str] = None,
+        latent_store: Optional[str] = None
     ):
         self.data_root = Path(data_root)
         self.output_dir = Path(output_dir)
         self.use_wandb = use_wandb
         self.wandb_project = wandb_project
+        self.lora_style = lora_style
         
         # Initialize accelerator
         self.accelerator = Accelerator(
@@ -40,6 +56,14 @@ class StableDiffusionTrainer:
             torch_dtype=torch.float16 if training_config.mixed_precision == "fp16" else torch.float32
         )
         self.tokenizer = self.pipeline.tokenizer
+
+        # The text encoder stays frozen, so each unique prompt is encoded once
+        self.pipeline.text_encoder.to(self.accelerator.device)
+        self.text_embeddings = TextEmbeddingCache(
+            self.pipeline.text_encoder,
+            model_id=training_config.base_model_id,
+            cache_dir=training_config.text_embedding_cache_dir
+        )
         
         # Initialize dataset
         self.dataset = IndianArchitectureDataset(
@@ -47,13 +71,40 @@ class StableDiffusionTrainer:
             tokenizer=self.tokenizer,
             size=training_config.resolution,
             center_crop=training_config.center_crop,
-            random_flip=training_config.random_flip
+            random_flip=training_config.random_flip,
+            styles=[lora_style] if lora_style else None,
+            latent_store=latent_store
         )
+
+        if lora_style:
+            self._add_lora_adapter()
         
         # Initialize optimizer and scheduler
         self.optimizer = None
         self.lr_scheduler = None
 
+    def _add_lora_adapter(self):
+        """Freeze the pipeline and add trainable LoRA layers to the UNet attention."""
+        self.pipeline.vae.requires_grad_(False)
+        self.pipeline.text_encoder.requires_grad_(False)
+        self.pipeline.unet.requires_grad_(False)
+        self.pipeline.unet.add_adapter(LoraConfig(
+            r=training_config.lora_rank,
+            lora_alpha=training_config.lora_alpha,
+            init_lora_weights="gaussian",
+            target_modules=training_config.lora_target_modules
+        ))
+        # Only the adapter is trained; keep it in fp32 under fp16 mixed precision
+        for param in self.pipeline.unet.parameters():
+            if param.requires_grad:
+                param.data = param.data.float()
+
+    def _trainable_parameters(self) -> list:
+        return [param for param in self.pipeline.unet.parameters() if param.requires_grad]
+
+    def _lora_dir(self) -> Path:
+        return self.output_dir / "lora" / self.lora_style
+
     def _init_training(self):
         """Initialize training components."""
         # Create dataloader
@@ -66,8 +117,8 @@ class StableDiffusionTrainer:
         
         # Create optimizer
         self.optimizer = torch.optim.AdamW(
-            self.pipeline.unet.parameters(),
-            lr=training_config.learning_rate
+            self._trainable_parameters(),
+            lr=training_config.lora_learning_rate if self.lora_style else training_config.learning_rate
         )
         
         # Create learning rate scheduler
@@ -91,7 +142,7 @@ class StableDiffusionTrainer:
 
     def train(self):
         """Run the training pipeline."""
-        logger.info("Starting training pipeline")
+        logger.info(f"Starting training pipeline ({f'LoRA for {self.lora_style}' if self.lora_style else 'full UNet'})")
         
         # Initialize wandb if enabled
         if self.use_wandb:
@@ -106,10 +157,14 @@ class StableDiffusionTrainer:
         while global_step < training_config.max_train_steps:
             for batch in train_dataloader:
                 with self.accelerator.accumulate(self.pipeline.unet):
-                    # Convert images to latent space
-                    latents = self.pipeline.vae.encode(
-                        batch["pixel_values"].to(dtype=self.pipeline.unet.dtype)
-                    ).latent_dist.sample()
+                    # Convert images to latent space (or sample precomputed moments)
+                    if "latent_moments" in batch:
+                        latents = sample_latents(batch["latent_moments"].float())
+                        latents = latents.to(dtype=self.pipeline.unet.dtype)
+                    else:
+                        latents = self.pipeline.vae.encode(
+                            batch["pixel_values"].to(dtype=self.pipeline.unet.dtype)
+                        ).latent_dist.sample()
                     latents = latents * 0.18215
                     
                     # Sample noise and add to latents
@@ -126,11 +181,16 @@ class StableDiffusionTrainer:
                         timesteps
                     )
                     
+                    # Condition on text encoder hidden states (cached per prompt)
+                    encoder_hidden_states = self.text_embeddings.encode(batch["prompt_ids"]).to(
+                        latents.device, dtype=self.pipeline.unet.dtype
+                    )
+
                     # Predict noise
                     noise_pred = self.pipeline.unet(
                         noisy_latents,
                         timesteps,
-                        batch["prompt_ids"]
+                        encoder_hidden_states
                     ).sample
                     
                     # Calculate loss
@@ -138,7 +198,7 @@ class StableDiffusionTrainer:
                     self.accelerator.backward(loss)
                     
                     if self.accelerator.sync_gradients:
-                        self.accelerator.clip_grad_norm_(self.pipeline.unet.parameters(), 1.0)
+                        self.accelerator.clip_grad_norm_(self._trainable_parameters(), 1.0)
                     
                     self.optimizer.step()
                     self.lr_scheduler.step()
@@ -163,6 +223,7 @@ class StableDiffusionTrainer:
         
         # Save final model
         self._save_checkpoint("final")
+        logger.info(f"Text embedding cache: {self.text_embeddings.stats()}")
         
         if self.use_wandb:
             wandb.finish()
@@ -171,12 +232,24 @@ class StableDiffusionTrainer:
         """Save a checkpoint of the model."""
         logger.info(f"Saving checkpoint at step {step}")
         
-        # Create checkpoint directory
-        checkpoint_dir = self.output_dir / f"checkpoint-{step}"
+        # Create checkpoint directory; the final style adapter goes where
+        # the inference service looks for it
+        if self.lora_style:
+            checkpoint_dir = self._lora_dir() if step == "final" else self._lora_dir() / f"checkpoint-{step}"
+        else:
+            checkpoint_dir = self.output_dir / f"checkpoint-{step}"
         checkpoint_dir.mkdir(parents=True, exist_ok=True)
         
-        # Save the pipeline
-        self.pipeline.save_pretrained(checkpoint_dir)
+        if self.lora_style:
+            # Save only the adapter weights (a few MB)
+            unet = self.accelerator.unwrap_model(self.pipeline.unet)
+            StableDiffusionPipeline.save_lora_weights(
+                checkpoint_dir,
+                unet_lora_layers=convert_state_dict_to_diffusers(get_peft_model_state_dict(unet))
+            )
+        else:
+            # Save the pipeline
+            self.pipeline.save_pretrained(checkpoint_dir)
         
         # Save optimizer state
         torch.save(self.optimizer.state_dict(), checkpoint_dir / "optimizer.pt")
@@ -187,15 +260,29 @@ class StableDiffusionTrainer:
         """Load a checkpoint."""
         checkpoint_dir = Path(checkpoint_dir)
         
-        # Load pipeline
-        self.pipeline = StableDiffusionPipeline.from_pretrained(
-            checkpoint_dir,
-            torch_dtype=torch.float16 if training_config.mixed_precision == "fp16" else torch.float32
-        )
+        if self.lora_style:
+            # Load the adapter weights into the freshly added LoRA layers
+            state_dict, _ = StableDiffusionPipeline.lora_state_dict(str(checkpoint_dir))
+            unet_state_dict = {
+                key[len("unet."):]: value
+                for key, value in state_dict.items()
+                if key.startswith("unet.")
+            }
+            set_peft_model_state_dict(
+                self.pipeline.unet,
+                convert_unet_state_dict_to_peft(unet_state_dict),
+                adapter_name="default"
+            )
+        else:
+            # Load pipeline
+            self.pipeline = StableDiffusionPipeline.from_pretrained(
+                checkpoint_dir,
+                torch_dtype=torch.float16 if training_config.mixed_precision == "fp16" else torch.float32
+            )
         
         # Load optimizer state if exists
         optimizer_path = checkpoint_dir / "optimizer.pt"
-        if optimizer_path.exists():
+        if optimizer_path.exists() and self.optimizer is not None:
             self.optimizer.load_state_dict(torch.load(optimizer_path))
             
         logger.info(f"Loaded checkpoint from {checkpoint_dir}") 
\ No newline at end of file
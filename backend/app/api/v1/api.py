@@ -1,5 +1,5 @@
 from fastapi import APIRouter
-from .endpoints import architectural_styles
+from .endpoints import architectural_styles, generation, admin, sketches
 
 api_router = APIRouter()
 
@@ -9,6 +9,24 @@ api_router.include_router(
     tags=["architectural-styles"]
 )
 
+api_router.include_router(
+    generation.router,
+    prefix="/generation",
+    tags=["generation"]
+)
+
+api_router.include_router(
+    sketches.router,
+    prefix="/sketches",
+    tags=["sketches"]
+)
+
+api_router.include_router(
+    admin.router,
+    prefix="/admin",
+    tags=["admin"]
+)
+
 # Additional routers will be added here as we develop more features
 # api_router.include_router(auth.router, prefix="/auth", tags=["authentication"])
 # api_router.include_router(users.router, prefix="/users", tags=["users"])
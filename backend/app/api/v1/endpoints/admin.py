@@ -0,0 +1,46 @@
+import secrets
+from fastapi import APIRouter, Depends, HTTPException, Header, status
+from pydantic import BaseModel
+from typing import Optional
+from ....ai.stable_diffusion import sd_service
+from ....core.config import settings
+
+def require_admin(x_admin_key: Optional[str] = Header(None)):
+    """Allow the request only with the configured ``X-Admin-Key``."""
+    if not settings.ADMIN_API_KEY:
+        raise HTTPException(status_code=403, detail="Admin API is disabled")
+    if not x_admin_key or not secrets.compare_digest(x_admin_key, settings.ADMIN_API_KEY):
+        raise HTTPException(status_code=401, detail="Invalid admin key")
+
+router = APIRouter(dependencies=[Depends(require_admin)])
+
+class CheckpointSwapRequest(BaseModel):
+    checkpoint: str  # directory name under CHECKPOINT_ROOT, e.g. checkpoint-500
+
+@router.get("/model")
+def get_model_status():
+    """Return the served UNet version and the state of any swap in progress."""
+    return sd_service.get_model_status()
+
+@router.post("/model/checkpoint", status_code=status.HTTP_202_ACCEPTED)
+async def swap_checkpoint(request: CheckpointSwapRequest):
+    """Load a fine-tuned checkpoint's UNet in the background and swap it in on every worker.
+
+    Poll ``GET /admin/model`` until ``swap_state`` is back to idle.
+    """
+    try:
+        await sd_service.begin_checkpoint_swap(request.checkpoint)
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return sd_service.get_model_status()
+
+@router.post("/model/rollback", status_code=status.HTTP_202_ACCEPTED)
+async def rollback_model():
+    """Swap the previously served UNet back in on every worker."""
+    try:
+        await sd_service.begin_rollback()
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return sd_service.get_model_status()
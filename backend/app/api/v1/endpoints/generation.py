@@ -1,13 +1,100 @@
-from fastapi import APIRouter, HTTPException, UploadFile, File, Form
-from fastapi.responses import Response
-from typing import Optional
-from ....ai.stable_diffusion import sd_service
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, Header, status
+from fastapi.responses import JSONResponse, Response
+from dataclasses import asdict
+from typing import Any, Dict, Optional
+from ....ai.stable_diffusion import sd_service, GenerationResult
+from ....ai.schedulers import QUALITY_TIERS, DEFAULT_QUALITY_TIER
+from ....ai.request_normalizer import MAX_SEED
+from ....utils.image_encoding import OutputFormat, negotiate_format
+from ....core.config import settings
+from ....services.job_store import job_store, JOB_COMPLETED, JOB_FAILED
+from ....services.media_store import sketch_store
+from ....services.render_jobs import (
+    job_dispatcher,
+    generation_result_key,
+    TEXT_TO_IMAGE,
+    SKETCH_TO_IMAGE
+)
+import asyncio
 import logging
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
-@router.post("/text-to-image")
+GENERATION_JOB_KINDS = (TEXT_TO_IMAGE, SKETCH_TO_IMAGE)
+
+def queues_generation() -> bool:
+    """Whether this API-only node hands renders to the worker fleet."""
+    return sd_service.is_disabled and settings.JOB_QUEUE_BACKEND == "redis_stream"
+
+def require_model_ready():
+    """Reject generation requests until the model has finished warming up."""
+    if queues_generation():
+        return
+    if sd_service.is_disabled:
+        # API-only node without a worker fleet to queue renders for
+        raise HTTPException(
+            status_code=503,
+            detail="Generation is disabled on this node (MODEL_WARMUP_ON_STARTUP is off "
+                   "and JOB_QUEUE_BACKEND is not redis_stream)"
+        )
+    if not sd_service.is_ready:
+        raise HTTPException(
+            status_code=503,
+            detail=f"Model is not ready (state: {sd_service.state})",
+            headers={"Retry-After": "30"}
+        )
+
+def validate_quality(quality: str):
+    if quality not in QUALITY_TIERS:
+        raise HTTPException(
+            status_code=422,
+            detail=f"quality must be one of: {', '.join(QUALITY_TIERS)}"
+        )
+
+def validate_style(style: Optional[str]):
+    if style is not None and style not in settings.ARCHITECTURAL_STYLES:
+        raise HTTPException(
+            status_code=422,
+            detail=f"style must be one of: {', '.join(settings.ARCHITECTURAL_STYLES)}"
+        )
+
+def resolve_output_format(
+    accept: Optional[str],
+    format: Optional[str],
+    output_quality: Optional[int]
+) -> OutputFormat:
+    try:
+        return negotiate_format(accept, format, output_quality)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+def image_response(result: GenerationResult) -> Response:
+    return Response(
+        content=result.image,
+        media_type=result.media_type,
+        headers={"X-Seed": str(result.seed), "Vary": "Accept"}
+    )
+
+def _job_response(job) -> dict:
+    return {
+        "jobId": job.id,
+        "status": job.status,
+        "progress": job.progress,
+        "error": job.error,
+    }
+
+async def submit_generation(kind: str, payload: Dict[str, Any]) -> JSONResponse:
+    job = await job_dispatcher.submit(kind, payload)
+    return JSONResponse(status_code=status.HTTP_202_ACCEPTED, content=_job_response(job))
+
+def _get_generation_job(job_id: str):
+    job = job_store.get(job_id)
+    if not job or job.kind not in GENERATION_JOB_KINDS:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+@router.post("/text-to-image", dependencies=[Depends(require_model_ready)])
 async def generate_from_text(
     prompt: str = Form(...),
     negative_prompt: Optional[str] = Form(None),
@@ -15,23 +102,51 @@ async def generate_from_text(
     guidance_scale: Optional[float] = Form(None),
     width: Optional[int] = Form(768),
     height: Optional[int] = Form(768),
+    quality: str = Form(DEFAULT_QUALITY_TIER),
+    style: Optional[str] = Form(None),
+    seed: Optional[int] = Form(None, ge=0, lt=MAX_SEED),
+    two_pass: bool = Form(False),
+    format: Optional[str] = Form(None),
+    output_quality: Optional[int] = Form(None, ge=1, le=100),
+    accept: Optional[str] = Header(None),
 ):
-    """Generate architectural visualization from text prompt."""
+    """Generate architectural visualization from text prompt.
+
+    ``quality`` selects a sampler/step preset: draft, standard or final.
+    ``style`` renders with that architectural style's LoRA adapter, if trained.
+    Pass the ``X-Seed`` of a previous response as ``seed`` to reproduce it.
+    ``two_pass`` drafts at a low resolution, then upscales and refines in
+    tiles, which is much faster for large outputs on CPU.
+    The image is PNG unless ``format`` (png, webp, jpeg, with ``output_quality``)
+    or the Accept header asks for WebP or JPEG.
+    On API-only nodes the render is queued for the worker fleet instead: the
+    response is 202 with a job to poll at ``/generation/jobs/{jobId}``.
+    """
+    validate_quality(quality)
+    validate_style(style)
+    output_format = resolve_output_format(accept, format, output_quality)
+    params = dict(
+        prompt=prompt,
+        negative_prompt=negative_prompt,
+        num_inference_steps=num_inference_steps,
+        guidance_scale=guidance_scale,
+        width=width,
+        height=height,
+        quality=quality,
+        style=style,
+        seed=seed,
+        two_pass=two_pass,
+    )
+    if queues_generation():
+        return await submit_generation(TEXT_TO_IMAGE, dict(params, output_format=asdict(output_format)))
     try:
-        image_bytes = await sd_service.generate_from_prompt(
-            prompt=prompt,
-            negative_prompt=negative_prompt,
-            num_inference_steps=num_inference_steps,
-            guidance_scale=guidance_scale,
-            width=width,
-            height=height,
-        )
-        return Response(content=image_bytes, media_type="image/png")
+        result = await sd_service.generate_from_prompt(output_format=output_format, **params)
+        return image_response(result)
     except Exception as e:
         logger.error(f"Text-to-image generation failed: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
-@router.post("/sketch-to-image")
+@router.post("/sketch-to-image", dependencies=[Depends(require_model_ready)])
 async def generate_from_sketch(
     sketch: UploadFile = File(...),
     prompt: str = Form(...),
@@ -39,18 +154,84 @@ async def generate_from_sketch(
     strength: Optional[float] = Form(0.75),
     num_inference_steps: Optional[int] = Form(None),
     guidance_scale: Optional[float] = Form(None),
+    quality: str = Form(DEFAULT_QUALITY_TIER),
+    style: Optional[str] = Form(None),
+    seed: Optional[int] = Form(None, ge=0, lt=MAX_SEED),
+    format: Optional[str] = Form(None),
+    output_quality: Optional[int] = Form(None, ge=1, le=100),
+    accept: Optional[str] = Header(None),
 ):
-    """Generate architectural visualization from sketch."""
+    """Generate architectural visualization from sketch.
+
+    ``quality`` selects a sampler/step preset: draft, standard or final.
+    ``style`` renders with that architectural style's LoRA adapter, if trained.
+    Pass the ``X-Seed`` of a previous response as ``seed`` to reproduce it.
+    The image is PNG unless ``format`` (png, webp, jpeg, with ``output_quality``)
+    or the Accept header asks for WebP or JPEG.
+    On API-only nodes the render is queued for the worker fleet instead: the
+    response is 202 with a job to poll at ``/generation/jobs/{jobId}``.
+    """
+    validate_quality(quality)
+    validate_style(style)
+    output_format = resolve_output_format(accept, format, output_quality)
+    params = dict(
+        prompt=prompt,
+        negative_prompt=negative_prompt,
+        strength=strength,
+        num_inference_steps=num_inference_steps,
+        guidance_scale=guidance_scale,
+        quality=quality,
+        style=style,
+        seed=seed,
+    )
+    if queues_generation():
+        # Workers read the upload from the shared sketch store
+        sketch_filename = await sketch_store.add_upload(sketch)
+        try:
+            return await submit_generation(SKETCH_TO_IMAGE, dict(
+                params,
+                sketch_filename=sketch_filename,
+                output_format=asdict(output_format)
+            ))
+        except Exception as e:
+            logger.error(f"Failed to queue sketch-to-image generation: {str(e)}")
+            await asyncio.to_thread(sketch_store.release, sketch_filename)
+            raise HTTPException(status_code=503, detail="Could not queue the render")
     try:
-        image_bytes = await sd_service.generate_from_sketch(
+        result = await sd_service.generate_from_sketch(
             sketch_image=sketch.file,
-            prompt=prompt,
-            negative_prompt=negative_prompt,
-            strength=strength,
-            num_inference_steps=num_inference_steps,
-            guidance_scale=guidance_scale,
+            output_format=output_format,
+            **params
         )
-        return Response(content=image_bytes, media_type="image/png")
+        return image_response(result)
     except Exception as e:
         logger.error(f"Sketch-to-image generation failed: {str(e)}")
-        raise HTTPException(status_code=500, detail=str(e)) 
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e)) 
+
+@router.get("/jobs/{job_id}")
+def get_generation_job(job_id: str):
+    """Return the status of a queued generation."""
+    return _job_response(_get_generation_job(job_id))
+
+@router.get("/jobs/{job_id}/result")
+def get_generation_job_result(job_id: str):
+    """Return a finished queued generation's image, with its ``X-Seed``."""
+    job = _get_generation_job(job_id)
+    if job.status == JOB_FAILED:
+        raise HTTPException(status_code=500, detail=job.error or "Generation failed")
+    if job.status != JOB_COMPLETED:
+        raise HTTPException(status_code=409, detail=f"Job is {job.status}")
+
+    image = sd_service.result_cache.get(generation_result_key(job.id))
+    if image is None:
+        raise HTTPException(status_code=410, detail="Result has expired")
+    return image_response(GenerationResult(
+        image=image,
+        seed=job.result["seed"],
+        media_type=job.result["media_type"]
+    ))
+
+@router.get("/stats")
+async def get_generation_stats():
+    """Return cache counters for the generation service."""
+    return sd_service.get_stats()
@@ -1,25 +1,48 @@
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form
+import asyncio
+import logging
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, status
 from sqlalchemy.orm import Session
 from typing import List
 from app.db.session import get_db
 from app.models.sketch import Sketch
 from app.services.sketch_processor import sketch_processor
+from app.services.media_store import sketch_store, render_store
+from app.services.job_store import job_store, JOB_COMPLETED, JOB_FAILED
+from app.services.render_jobs import job_dispatcher, SKETCH_RENDER
 from app.core.auth import get_current_user
 from app.models.user import User
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter()
 
-@router.post("/process")
+def _job_response(job) -> dict:
+    return {
+        "jobId": job.id,
+        "status": job.status,
+        "progress": job.progress,
+        "sketchId": job.payload.get("sketch_id"),
+        "error": job.error,
+    }
+
+def _get_user_job(job_id: str, current_user: User):
+    job = job_store.get(job_id)
+    if not job or job.kind != SKETCH_RENDER or job.payload.get("user_id") != current_user.id:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+@router.post("/process", status_code=status.HTTP_202_ACCEPTED)
 async def process_sketch(
     file: UploadFile = File(...),
     style: str = Form(...),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
+    """Queue a sketch for rendering and return a job to poll."""
+    sketch_filename = None
     try:
-        # Save uploaded sketch
-        content = await file.read()
-        sketch_filename = sketch_processor.save_sketch(content)
+        # Stream the uploaded sketch to disk
+        sketch_filename = await sketch_processor.save_sketch_upload(file)
 
         # Create sketch record
         sketch = Sketch(
@@ -27,37 +50,68 @@ async def process_sketch(
             original_file_path=sketch_filename,
             rendered_file_path="",  # Will be updated after processing
             style=style,
-            status="processing"
+            status="pending"
         )
         db.add(sketch)
         db.commit()
         db.refresh(sketch)
-
-        try:
-            # Process the sketch
-            rendered_filename = sketch_processor.process_sketch(sketch_filename, style)
-            
-            # Update sketch record
-            sketch.rendered_file_path = rendered_filename
-            sketch.status = "completed"
-            db.commit()
-            db.refresh(sketch)
-
-            return {
-                "id": sketch.id,
-                "originalUrl": sketch.original_url,
-                "renderedUrl": sketch.rendered_url,
-                "style": sketch.style,
-                "createdAt": sketch.created_at.isoformat()
-            }
-        except Exception as e:
-            sketch.status = "failed"
-            db.commit()
-            raise HTTPException(status_code=500, detail=str(e))
-
+    except HTTPException:
+        raise
     except Exception as e:
+        if sketch_filename:
+            await asyncio.to_thread(sketch_store.release, sketch_filename)
         raise HTTPException(status_code=400, detail=str(e))
 
+    try:
+        job = await job_dispatcher.submit(SKETCH_RENDER, {
+            "user_id": current_user.id,
+            "sketch_id": sketch.id,
+            "sketch_filename": sketch_filename,
+            "style": style,
+        })
+    except Exception as e:
+        # Nothing will render this sketch; don't leave it pending or hold its blob
+        logger.error(f"Failed to queue sketch {sketch.id}: {e}")
+        sketch.status = "failed"
+        db.commit()
+        await asyncio.to_thread(sketch_store.release, sketch_filename)
+        raise HTTPException(status_code=503, detail="Could not queue the sketch for rendering")
+    return _job_response(job)
+
+@router.get("/jobs/{job_id}")
+def get_job(
+    job_id: str,
+    current_user: User = Depends(get_current_user)
+):
+    return _job_response(_get_user_job(job_id, current_user))
+
+@router.get("/jobs/{job_id}/result")
+def get_job_result(
+    job_id: str,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    job = _get_user_job(job_id, current_user)
+    if job.status == JOB_FAILED:
+        raise HTTPException(status_code=500, detail=job.error or "Rendering failed")
+    if job.status != JOB_COMPLETED:
+        raise HTTPException(status_code=409, detail=f"Job is {job.status}")
+
+    sketch = db.query(Sketch).filter(
+        Sketch.id == job.payload["sketch_id"],
+        Sketch.user_id == current_user.id
+    ).first()
+    if not sketch:
+        raise HTTPException(status_code=404, detail="Sketch not found")
+
+    return {
+        "id": sketch.id,
+        "originalUrl": sketch.original_url,
+        "renderedUrl": sketch.rendered_url,
+        "style": sketch.style,
+        "createdAt": sketch.created_at.isoformat()
+    }
+
 @router.get("")
 def list_sketches(
     current_user: User = Depends(get_current_user),
@@ -115,18 +169,10 @@ def delete_sketch(
     if not sketch:
         raise HTTPException(status_code=404, detail="Sketch not found")
 
-    # Delete files
+    # Release files; shared content is only removed with its last reference
     try:
-        import os
-        from app.core.config import settings
-
-        original_path = os.path.join(settings.MEDIA_ROOT, settings.SKETCHES_DIR, sketch.original_file_path)
-        rendered_path = os.path.join(settings.MEDIA_ROOT, settings.RENDERS_DIR, sketch.rendered_file_path)
-
-        if os.path.exists(original_path):
-            os.remove(original_path)
-        if os.path.exists(rendered_path):
-            os.remove(rendered_path)
+        sketch_store.release(sketch.original_file_path)
+        render_store.release(sketch.rendered_file_path)
     except Exception as e:
         print(f"Error deleting files: {e}")
 
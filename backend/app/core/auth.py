@@ -7,7 +7,7 @@ from fastapi.security import OAuth2PasswordBearer
 from pydantic import BaseModel
 from ..core.config import settings
 from sqlalchemy.orm import Session
-from ..db.database import get_db
+from ..db.session import get_db
 from ..models.user import User
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
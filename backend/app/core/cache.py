@@ -0,0 +1,233 @@
+import hashlib
+import logging
+import os
+import threading
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, List, Optional
+from redis import Redis
+
+logger = logging.getLogger(__name__)
+
+class CacheTier(ABC):
+    """One level of a ``TieredCache`` storing opaque byte values."""
+
+    name = "tier"
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.sets = 0
+        self.evictions = 0
+
+    def get(self, key: str) -> Optional[bytes]:
+        value = self._get(key)
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    def set(self, key: str, value: bytes):
+        self._set(key, value)
+        self.sets += 1
+
+    @abstractmethod
+    def _get(self, key: str) -> Optional[bytes]:
+        ...
+
+    @abstractmethod
+    def _set(self, key: str, value: bytes):
+        ...
+
+    def stats(self) -> Dict[str, float]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "sets": self.sets,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0
+        }
+
+class MemoryTier(CacheTier):
+    """In-process LRU bounded by the total size of the stored values."""
+
+    name = "memory"
+
+    def __init__(self, max_bytes: int):
+        super().__init__()
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self._entries: "OrderedDict[str, bytes]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+            return value
+
+    def _set(self, key: str, value: bytes):
+        if len(value) > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.current_bytes -= len(previous)
+            self._entries[key] = value
+            self.current_bytes += len(value)
+            while self.current_bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.current_bytes -= len(evicted)
+                self.evictions += 1
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            **super().stats(),
+            "entries": len(self._entries),
+            "bytes": self.current_bytes,
+            "max_bytes": self.max_bytes
+        }
+
+class RedisTier(CacheTier):
+    """Shared Redis tier; size is bounded by the key TTL and Redis' own eviction policy."""
+
+    name = "redis"
+
+    def __init__(self, redis_client: Redis, prefix: str = "cache:", ttl: int = 60 * 60 * 24):
+        super().__init__()
+        self.redis = redis_client
+        self.prefix = prefix
+        self.ttl = ttl
+
+    def _get(self, key: str) -> Optional[bytes]:
+        try:
+            return self.redis.get(f"{self.prefix}{key}")
+        except Exception as e:
+            logger.warning(f"Redis cache read failed: {str(e)}")
+            return None
+
+    def _set(self, key: str, value: bytes):
+        try:
+            self.redis.setex(f"{self.prefix}{key}", self.ttl, value)
+        except Exception as e:
+            logger.warning(f"Redis cache write failed: {str(e)}")
+
+class DiskTier(CacheTier):
+    """Content-addressed on-disk tier.
+
+    Values are stored once under ``blobs/`` by their SHA-256, and each cache key
+    maps to a blob through a small pointer file under ``keys/``. Once
+    ``max_bytes`` is exceeded, blobs are evicted oldest-access-first down to
+    ``low_water`` of it, so the blob tree is only scanned once per that much
+    new data. Pointers to evicted blobs are dropped lazily on lookup.
+    """
+
+    name = "disk"
+
+    def __init__(self, root: str, max_bytes: int, low_water: float = 0.9):
+        super().__init__()
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self.low_water_bytes = int(max_bytes * low_water)
+        self._lock = threading.Lock()
+        (self.root / "blobs").mkdir(parents=True, exist_ok=True)
+        (self.root / "keys").mkdir(parents=True, exist_ok=True)
+        self.current_bytes = sum(path.stat().st_size for path in self._blob_paths())
+
+    def _blob_paths(self) -> List[Path]:
+        return [path for path in (self.root / "blobs").glob("*/*") if path.is_file()]
+
+    def _blob_path(self, digest: str) -> Path:
+        return self.root / "blobs" / digest[:2] / digest
+
+    def _key_path(self, key: str) -> Path:
+        name = hashlib.sha256(key.encode()).hexdigest()
+        return self.root / "keys" / name[:2] / name
+
+    @staticmethod
+    def _write_atomic(path: Path, data: bytes):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    def _get(self, key: str) -> Optional[bytes]:
+        key_path = self._key_path(key)
+        try:
+            digest = key_path.read_text().strip()
+            blob_path = self._blob_path(digest)
+            value = blob_path.read_bytes()
+        except FileNotFoundError:
+            if key_path.exists():
+                key_path.unlink(missing_ok=True)
+            return None
+        try:
+            # Bump the access time used for eviction ordering
+            os.utime(blob_path)
+        except FileNotFoundError:
+            # Evicted concurrently; the value read above is still good
+            pass
+        return value
+
+    def _set(self, key: str, value: bytes):
+        digest = hashlib.sha256(value).hexdigest()
+        blob_path = self._blob_path(digest)
+        with self._lock:
+            if not blob_path.exists():
+                self._write_atomic(blob_path, value)
+                self.current_bytes += len(value)
+            self._write_atomic(self._key_path(key), digest.encode())
+            if self.current_bytes > self.max_bytes:
+                self._evict()
+
+    def _evict(self):
+        # One stat per blob; other processes may remove blobs meanwhile
+        blobs = []
+        for path in self._blob_paths():
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            blobs.append((stat.st_mtime, stat.st_size, path))
+        blobs.sort(key=lambda blob: blob[0])
+        self.current_bytes = sum(size for _, size, _ in blobs)
+        for _, size, path in blobs:
+            if self.current_bytes <= self.low_water_bytes:
+                break
+            path.unlink(missing_ok=True)
+            self.current_bytes -= size
+            self.evictions += 1
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            **super().stats(),
+            "bytes": self.current_bytes,
+            "max_bytes": self.max_bytes
+        }
+
+class TieredCache:
+    """Look values up tier by tier (fastest first), promoting hits to faster tiers."""
+
+    def __init__(self, tiers: List[CacheTier]):
+        self.tiers = tiers
+
+    def get(self, key: str) -> Optional[bytes]:
+        for index, tier in enumerate(self.tiers):
+            value = tier.get(key)
+            if value is not None:
+                for faster_tier in self.tiers[:index]:
+                    faster_tier.set(key, value)
+                return value
+        return None
+
+    def set(self, key: str, value: bytes):
+        for tier in self.tiers:
+            tier.set(key, value)
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        return {tier.name: tier.stats() for tier in self.tiers}
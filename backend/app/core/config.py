@@ -10,6 +10,7 @@ class Settings(BaseSettings):
     
     # JWT Settings
     SECRET_KEY: str = os.getenv("SECRET_KEY", secrets.token_urlsafe(32))
+    ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60 * 24 * 8  # 8 days
     
     # Database Settings
@@ -38,6 +39,108 @@ class Settings(BaseSettings):
         "http://localhost:3000,http://localhost:8000"
     ).split(",")
 
+    # Health Check Settings
+    HEALTH_CHECK_TIMEOUT: float = 2.0
+
+    # Render Job Settings
+    JOB_STORE_BACKEND: str = "sqlalchemy"  # sqlalchemy, redis, or memory (single process only)
+    JOB_TTL_SECONDS: int = 60 * 60 * 24 * 7  # 7 days
+    JOB_QUEUE_BACKEND: str = "local"  # local or redis_stream
+    JOB_REDIS_URL: Optional[str] = None  # defaults to REDIS_HOST/PORT/DB; fakeredis:// for an in-process stand-in
+    JOB_STREAM: str = "render_jobs"
+    JOB_STREAM_GROUP: str = "render_workers"
+    JOB_DEAD_LETTER_STREAM: str = "render_jobs:dead"
+    JOB_MAX_DELIVERIES: int = 3
+    JOB_CLAIM_IDLE_MS: int = 60000
+    MODEL_WARMUP_ON_STARTUP: bool = True  # disable on API-only nodes
+
+    # Quantization Settings
+    SD_QUANTIZE_INT8: bool = False  # dynamic int8 UNet/text encoder Linear layers on CPU
+    QUANTIZED_MODEL_DIR: str = "models/quantized"
+
+    # CPU Execution Profile
+    CPU_WORKERS_PER_NODE: Optional[int] = None  # defaults to WEB_CONCURRENCY, or 1
+    TORCH_INTRA_OP_THREADS: Optional[int] = None  # defaults to this worker's share of the cores
+    TORCH_INTER_OP_THREADS: int = 1
+    CPU_PIN_CORES: bool = False  # pin each worker to a disjoint set of cores
+    CPU_CHANNELS_LAST: bool = True
+    TORCH_COMPILE: bool = False  # torch.compile the UNet and VAE decoder
+    TORCH_COMPILE_MODE: str = "default"
+    TORCH_COMPILE_CACHE_DIR: str = "models/torch_compile_cache"
+
+    # Admin Settings
+    ADMIN_API_KEY: Optional[str] = None  # enables the /admin endpoints
+
+    # Checkpoint Swap Settings
+    CHECKPOINT_ROOT: str = "models/fine_tuned"  # training output_dir holding checkpoint-N directories
+
+    # Style LoRA Settings
+    LORA_ENABLED: bool = True
+    LORA_DIR: str = "models/fine_tuned/lora"  # one <style>/ adapter directory per architectural style
+    LORA_FUSE: bool = True  # merge the active adapter into the UNet weights
+    LORA_SCALE: float = 1.0
+
+    # Model Registry Settings
+    MODEL_MEMORY_BUDGET_MB: int = 12288  # resident weights across all loaded pipelines
+
+    # Inference Executor Settings
+    INFERENCE_WORKERS: int = 1
+
+    # Prompt Embedding Cache Settings
+    PROMPT_EMBED_CACHE_MB: int = 64
+
+    # Result Cache Settings
+    RESULT_CACHE_FORMAT: str = "WEBP"  # lossless WEBP, or PNG to store responses as-is
+    RESULT_CACHE_MEMORY_MB: int = 256
+    RESULT_CACHE_DISK_DIR: Optional[str] = None  # enables the on-disk tier
+    RESULT_CACHE_DISK_MB: int = 2048
+
+    # Media Storage Settings
+    STORAGE_BACKEND: str = "local"  # local or s3
+    S3_BUCKET: Optional[str] = None
+    S3_PREFIX: str = ""
+    S3_ENDPOINT_URL: Optional[str] = None  # for MinIO/R2 or a local stand-in
+    S3_REGION: Optional[str] = None
+    S3_ACCESS_KEY_ID: Optional[str] = None  # defaults to the standard AWS credential chain
+    S3_SECRET_ACCESS_KEY: Optional[str] = None
+    S3_MAX_POOL_CONNECTIONS: int = 32
+    S3_MULTIPART_THRESHOLD_MB: int = 8
+    S3_MULTIPART_CHUNK_MB: int = 8
+    S3_PRESIGN_EXPIRES_SECONDS: int = 3600
+    S3_PUBLIC_BASE_URL: Optional[str] = None  # serve through a CDN instead of presigned URLs
+
+    # Upload Settings
+    MAX_UPLOAD_BYTES: int = 20 * 1024 * 1024  # 20 MiB
+    UPLOAD_TMP_DIR: str = "tmp/uploads"  # scratch space; keep outside MEDIA_ROOT (publicly served) but on the same filesystem
+
+    # Render Output Settings
+    RENDER_FORMAT: str = "webp"  # png, webp or jpeg for saved sketch renders
+    RENDER_QUALITY: int = 90
+
+    # Sketch Preprocessing Settings
+    SKETCH_INPUT_SIZE: int = 768  # longest side fed to the SD img2img pipeline
+    SKETCH_XL_INPUT_SIZE: int = 1024  # longest side fed to the SDXL sketch processor
+    SKETCH_NORMALIZE_CONTRAST: bool = True
+
+    # Sketch Cache Settings
+    SKETCH_CACHE_PHASH_ENABLED: bool = False  # also serve near-duplicate sketches from cache
+    SKETCH_CACHE_PHASH_MAX_DISTANCE: int = 4  # max differing bits of the 64-bit dHash
+
+    # Single-Flight Settings
+    SINGLE_FLIGHT_LOCK_TTL_SECONDS: int = 300
+    SINGLE_FLIGHT_WAIT_TIMEOUT_SECONDS: int = 300
+
+    # Two-Pass Rendering Settings
+    TWO_PASS_BASE_SIZE: int = 512  # longest side of the first, low-resolution pass
+    TWO_PASS_REFINE_STRENGTH: float = 0.3
+    TWO_PASS_REFINE_STEPS: int = 20  # scheduled steps; about strength * steps actually run
+    TWO_PASS_TILE_SIZE: int = 512
+    TWO_PASS_TILE_OVERLAP: int = 64
+
+    # Generation Batching Settings
+    GENERATION_BATCH_MAX_SIZE: int = 4
+    GENERATION_BATCH_WINDOW_MS: int = 50
+
     @validator("SQLALCHEMY_DATABASE_URI", pre=True)
     def assemble_db_connection(cls, v: Optional[str], values: dict[str, any]) -> any:
         if isinstance(v, str):
@@ -0,0 +1,28 @@
+import logging
+from sqlalchemy import text
+from redis import Redis
+from app.db.session import engine
+
+logger = logging.getLogger(__name__)
+
+UP = "up"
+DOWN = "down"
+
+def check_database() -> str:
+    """Ping the database with a trivial query."""
+    try:
+        with engine.connect() as connection:
+            connection.execute(text("SELECT 1"))
+        return UP
+    except Exception as e:
+        logger.warning(f"Database health check failed: {str(e)}")
+        return DOWN
+
+def check_redis(redis_client: Redis) -> str:
+    """Ping Redis."""
+    try:
+        redis_client.ping()
+        return UP
+    except Exception as e:
+        logger.warning(f"Redis health check failed: {str(e)}")
+        return DOWN
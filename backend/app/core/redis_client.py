@@ -0,0 +1,24 @@
+import redis
+from .config import settings
+
+_fake_server = None
+
+def get_redis_url() -> str:
+    """Return the Redis URL for the configured host, port and database."""
+    return f"redis://{settings.REDIS_HOST}:{settings.REDIS_PORT}/{settings.REDIS_DB}"
+
+def create_redis_client(url: str = None) -> redis.Redis:
+    """Create a Redis client from a URL.
+
+    ``fakeredis://`` URLs return an in-process fakeredis client (all such clients
+    share one server), for running the job queue and workers without a Redis.
+    """
+    global _fake_server
+    url = url or get_redis_url()
+    if url.startswith("fakeredis://"):
+        import fakeredis
+
+        if _fake_server is None:
+            _fake_server = fakeredis.FakeServer()
+        return fakeredis.FakeRedis(server=_fake_server)
+    return redis.Redis.from_url(url)
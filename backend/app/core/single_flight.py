@@ -0,0 +1,142 @@
+import asyncio
+import logging
+import time
+import uuid
+from typing import Awaitable, Callable, Dict, Optional, TypeVar
+from redis import Redis
+from redis.asyncio import Redis as AsyncRedis
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Delete the lock only if we still own it
+_RELEASE_LOCK_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+end
+return 0
+"""
+
+class SingleFlight:
+    """Collapse concurrent identical work into a single execution.
+
+    Within a process, callers for the same key share one task. Across processes,
+    a Redis lock elects one leader; the other workers wait for its completion
+    message and then read the result the leader stored (via the blocking
+    ``fetch_result`` callable, which is run in a thread).
+    If the leader disappears or takes longer than ``wait_timeout``, followers
+    fall back to doing the work themselves. Followers wait on the event loop
+    through ``async_redis_client``, so they hold no threads while waiting.
+    """
+
+    def __init__(
+        self,
+        redis_client: Optional[Redis] = None,
+        prefix: str = "singleflight:",
+        lock_ttl: float = 300,
+        wait_timeout: float = 300,
+        poll_interval: float = 1.0,
+        async_redis_client: Optional[AsyncRedis] = None
+    ):
+        self.redis = redis_client
+        if async_redis_client is None and redis_client is not None:
+            # Same server and options as the blocking client
+            async_redis_client = AsyncRedis(**redis_client.connection_pool.connection_kwargs)
+        self.async_redis = async_redis_client
+        self.prefix = prefix
+        self.lock_ttl = lock_ttl
+        self.wait_timeout = wait_timeout
+        self.poll_interval = poll_interval
+        self._inflight: Dict[str, asyncio.Task] = {}
+
+    async def do(
+        self,
+        key: str,
+        work: Callable[[], Awaitable[T]],
+        fetch_result: Callable[[], Optional[T]]
+    ) -> T:
+        """Run ``work`` for ``key`` unless an identical call is already in flight."""
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._run_distributed(key, work, fetch_result))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        else:
+            logger.info(f"Joining in-flight generation for {key}")
+        # Shield so a disconnecting caller does not cancel the shared work
+        return await asyncio.shield(task)
+
+    async def _run_distributed(
+        self,
+        key: str,
+        work: Callable[[], Awaitable[T]],
+        fetch_result: Callable[[], Optional[T]]
+    ) -> T:
+        if self.redis is None:
+            return await work()
+
+        lock_key = f"{self.prefix}lock:{key}"
+        token = uuid.uuid4().hex
+        try:
+            acquired = await asyncio.to_thread(
+                self.redis.set, lock_key, token, nx=True, px=int(self.lock_ttl * 1000)
+            )
+        except Exception as e:
+            logger.warning(f"Single-flight lock unavailable, running locally: {str(e)}")
+            return await work()
+
+        if acquired:
+            try:
+                return await work()
+            finally:
+                await asyncio.to_thread(self._release, lock_key, token, key)
+
+        logger.info(f"Waiting for another worker to finish {key}")
+        result = await self._wait_for_leader(key, lock_key, fetch_result)
+        if result is not None:
+            return result
+        return await work()
+
+    def _release(self, lock_key: str, token: str, key: str):
+        try:
+            self.redis.eval(_RELEASE_LOCK_SCRIPT, 1, lock_key, token)
+            self.redis.publish(f"{self.prefix}done:{key}", "1")
+        except Exception as e:
+            logger.warning(f"Single-flight release failed for {key}: {str(e)}")
+
+    async def _wait_for_leader(
+        self,
+        key: str,
+        lock_key: str,
+        fetch_result: Callable[[], Optional[T]]
+    ) -> Optional[T]:
+        """Wait until the leader publishes completion, then fetch its result."""
+        pubsub = self.async_redis.pubsub(ignore_subscribe_messages=True)
+        try:
+            await pubsub.subscribe(f"{self.prefix}done:{key}")
+        except Exception as e:
+            logger.warning(f"Single-flight subscribe failed for {key}: {str(e)}")
+            await pubsub.aclose()
+            return None
+
+        try:
+            # The leader may have finished before we subscribed
+            result = await asyncio.to_thread(fetch_result)
+            if result is not None:
+                return result
+
+            deadline = time.monotonic() + self.wait_timeout
+            while time.monotonic() < deadline:
+                message = await pubsub.get_message(
+                    ignore_subscribe_messages=True,
+                    timeout=self.poll_interval
+                )
+                if message or not await self.async_redis.exists(lock_key):
+                    return await asyncio.to_thread(fetch_result)
+            return None
+        except Exception as e:
+            logger.warning(f"Single-flight wait failed for {key}: {str(e)}")
+            return None
+        finally:
+            await pubsub.aclose()
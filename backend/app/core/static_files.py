@@ -0,0 +1,18 @@
+import re
+from fastapi.staticfiles import StaticFiles
+
+# <2 hex>/<2 hex>/<64 hex sha256>.<ext>, as laid out by the media store
+CONTENT_ADDRESSED_PATH = re.compile(r"(^|/)[0-9a-f]{2}/[0-9a-f]{2}/[0-9a-f]{64}\.[a-z0-9]+$")
+
+class MediaStaticFiles(StaticFiles):
+    """Static files that mark content-addressed media as immutable.
+
+    A content-addressed path always refers to the same bytes, so browsers and
+    CDNs may cache it for a year without revalidating.
+    """
+
+    async def get_response(self, path: str, scope):
+        response = await super().get_response(path, scope)
+        if response.status_code == 200 and CONTENT_ADDRESSED_PATH.search(path):
+            response.headers["Cache-Control"] = "public, max-age=31536000, immutable"
+        return response
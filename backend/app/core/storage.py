@@ -0,0 +1,240 @@
+import logging
+import mimetypes
+import os
+import shutil
+import tempfile
+from abc import ABC, abstractmethod
+from typing import BinaryIO, Optional
+import boto3
+from boto3.s3.transfer import TransferConfig
+from botocore.config import Config
+from botocore.exceptions import ClientError
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+
+def _content_type(key: str) -> str:
+    return mimetypes.guess_type(key)[0] or "application/octet-stream"
+
+
+class StorageBackend(ABC):
+    """Where media files live, addressed by ``/``-separated keys like ``sketches/ab/cd/<sha>.png``."""
+
+    @abstractmethod
+    def put_file(self, key: str, source_path: str, cache_control: Optional[str] = None):
+        """Store a local file under ``key``, consuming (moving or deleting) ``source_path``."""
+
+    @abstractmethod
+    def put_bytes(self, key: str, data: bytes, cache_control: Optional[str] = None):
+        """Store ``data`` under ``key``."""
+
+    @abstractmethod
+    def open(self, key: str) -> BinaryIO:
+        """Open the object at ``key`` for binary reading."""
+
+    @abstractmethod
+    def exists(self, key: str) -> bool:
+        pass
+
+    @abstractmethod
+    def size(self, key: str) -> int:
+        pass
+
+    @abstractmethod
+    def delete(self, key: str) -> bool:
+        """Delete ``key``; returns whether it existed."""
+
+    @abstractmethod
+    def url(self, key: str) -> str:
+        """Return a URL clients can fetch ``key`` from."""
+
+
+class LocalStorage(StorageBackend):
+    """Files under a local directory, served by the app's ``/media`` mount."""
+
+    def __init__(self, root: str, base_url: str = "/media"):
+        self.root = root
+        self.base_url = base_url.rstrip("/")
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.root, *key.split("/"))
+
+    def put_file(self, key: str, source_path: str, cache_control: Optional[str] = None):
+        path = self.path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        try:
+            os.replace(source_path, path)
+        except OSError:
+            # Source on another filesystem
+            shutil.move(source_path, path)
+
+    def put_bytes(self, key: str, data: bytes, cache_control: Optional[str] = None):
+        path = self.path(key)
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        # Written beside the target and renamed into place, so readers (and
+        # immutable caches) never see a partial file and concurrent writers
+        # of the same key do not interleave
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except BaseException:
+            try:
+                os.remove(tmp_path)
+            except FileNotFoundError:
+                pass
+            raise
+
+    def open(self, key: str) -> BinaryIO:
+        return open(self.path(key), "rb")
+
+    def exists(self, key: str) -> bool:
+        return os.path.exists(self.path(key))
+
+    def size(self, key: str) -> int:
+        return os.path.getsize(self.path(key))
+
+    def delete(self, key: str) -> bool:
+        try:
+            os.remove(self.path(key))
+            return True
+        except FileNotFoundError:
+            return False
+
+    def url(self, key: str) -> str:
+        return f"{self.base_url}/{key}"
+
+
+class S3Storage(StorageBackend):
+    """S3-compatible object storage (AWS S3, MinIO, R2, ...).
+
+    A single thread-safe client, with a connection pool sized for concurrent
+    workers, is shared by all calls. Large files go through the transfer manager as concurrent
+    multipart uploads. Clients fetch media directly from the bucket (or the
+    CDN in front of it) via presigned URLs, so no bytes pass through the app.
+    Point ``endpoint_url`` at a local MinIO or moto server to test it.
+    """
+
+    def __init__(
+        self,
+        bucket: str,
+        prefix: str = "",
+        endpoint_url: Optional[str] = None,
+        region_name: Optional[str] = None,
+        access_key_id: Optional[str] = None,
+        secret_access_key: Optional[str] = None,
+        max_pool_connections: int = 32,
+        multipart_threshold: int = 8 * 1024 * 1024,
+        multipart_chunksize: int = 8 * 1024 * 1024,
+        presign_expires: int = 3600,
+        public_base_url: Optional[str] = None
+    ):
+        self.bucket = bucket
+        self.prefix = prefix.strip("/")
+        self.presign_expires = presign_expires
+        self.public_base_url = public_base_url.rstrip("/") if public_base_url else None
+        self.client = boto3.client(
+            "s3",
+            endpoint_url=endpoint_url,
+            region_name=region_name,
+            aws_access_key_id=access_key_id,
+            aws_secret_access_key=secret_access_key,
+            config=Config(
+                max_pool_connections=max_pool_connections,
+                retries={"max_attempts": 5, "mode": "adaptive"}
+            )
+        )
+        self.transfer_config = TransferConfig(
+            multipart_threshold=multipart_threshold,
+            multipart_chunksize=multipart_chunksize,
+            max_concurrency=max(1, max_pool_connections // 4)
+        )
+
+    def _object_key(self, key: str) -> str:
+        return f"{self.prefix}/{key}" if self.prefix else key
+
+    def _extra_args(self, key: str, cache_control: Optional[str]) -> dict:
+        extra_args = {"ContentType": _content_type(key)}
+        if cache_control:
+            extra_args["CacheControl"] = cache_control
+        return extra_args
+
+    def put_file(self, key: str, source_path: str, cache_control: Optional[str] = None):
+        self.client.upload_file(
+            source_path,
+            self.bucket,
+            self._object_key(key),
+            ExtraArgs=self._extra_args(key, cache_control),
+            Config=self.transfer_config
+        )
+        os.remove(source_path)
+
+    def put_bytes(self, key: str, data: bytes, cache_control: Optional[str] = None):
+        self.client.put_object(
+            Bucket=self.bucket,
+            Key=self._object_key(key),
+            Body=data,
+            **self._extra_args(key, cache_control)
+        )
+
+    def open(self, key: str) -> BinaryIO:
+        response = self.client.get_object(Bucket=self.bucket, Key=self._object_key(key))
+        return response["Body"]
+
+    def exists(self, key: str) -> bool:
+        try:
+            self.client.head_object(Bucket=self.bucket, Key=self._object_key(key))
+            return True
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                return False
+            raise
+
+    def size(self, key: str) -> int:
+        response = self.client.head_object(Bucket=self.bucket, Key=self._object_key(key))
+        return response["ContentLength"]
+
+    def delete(self, key: str) -> bool:
+        existed = self.exists(key)
+        self.client.delete_object(Bucket=self.bucket, Key=self._object_key(key))
+        return existed
+
+    def url(self, key: str) -> str:
+        if self.public_base_url:
+            return f"{self.public_base_url}/{self._object_key(key)}"
+        return self.client.generate_presigned_url(
+            "get_object",
+            Params={"Bucket": self.bucket, "Key": self._object_key(key)},
+            ExpiresIn=self.presign_expires
+        )
+
+
+def create_storage_backend() -> StorageBackend:
+    """Create the media storage backend from settings."""
+    if settings.STORAGE_BACKEND == "s3":
+        logger.info(f"Using S3 media storage (bucket {settings.S3_BUCKET})")
+        return S3Storage(
+            bucket=settings.S3_BUCKET,
+            prefix=settings.S3_PREFIX,
+            endpoint_url=settings.S3_ENDPOINT_URL,
+            region_name=settings.S3_REGION,
+            access_key_id=settings.S3_ACCESS_KEY_ID,
+            secret_access_key=settings.S3_SECRET_ACCESS_KEY,
+            max_pool_connections=settings.S3_MAX_POOL_CONNECTIONS,
+            multipart_threshold=settings.S3_MULTIPART_THRESHOLD_MB * 1024 * 1024,
+            multipart_chunksize=settings.S3_MULTIPART_CHUNK_MB * 1024 * 1024,
+            presign_expires=settings.S3_PRESIGN_EXPIRES_SECONDS,
+            public_base_url=settings.S3_PUBLIC_BASE_URL
+        )
+    if settings.STORAGE_BACKEND != "local":
+        raise ValueError(f"Unknown storage backend: {settings.STORAGE_BACKEND}")
+    return LocalStorage(settings.MEDIA_ROOT)
+
+
+# Global instance
+storage = create_storage_backend()
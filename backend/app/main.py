@@ -14,10 +14,18 @@ from .core.error_handlers import (
     general_exception_handler,
     BaseAPIException
 )
-from fastapi.staticfiles import StaticFiles
+from app.core.static_files import MediaStaticFiles
 import os
+import asyncio
 from app.db.session import engine
 from app.models.base import Base
+from app.models.media_blob import MediaBlob  # noqa: F401 - registers the table
+from app.models.render_job import RenderJob  # noqa: F401 - registers the table
+from app.ai.executor import inference_executor
+from app.ai.cpu_profile import apply_cpu_profile
+from app.ai.model_registry import model_registry
+from app.ai.stable_diffusion import sd_service
+from app.core.health import check_database, check_redis, UP, DOWN
 
 # Create database tables
 Base.metadata.create_all(bind=engine)
@@ -42,18 +50,36 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Let browser clients read the seed needed to reproduce a render
+    expose_headers=["X-Seed"],
 )
 
 # Add Gzip compression
 app.add_middleware(GZipMiddleware, minimum_size=1000)
 
-# Mount static files
-os.makedirs(settings.MEDIA_ROOT, exist_ok=True)
-app.mount("/media", StaticFiles(directory=settings.MEDIA_ROOT), name="media")
+# Mount static files; with object storage, clients fetch media from the bucket
+if settings.STORAGE_BACKEND == "local":
+    os.makedirs(settings.MEDIA_ROOT, exist_ok=True)
+    app.mount("/media", MediaStaticFiles(directory=settings.MEDIA_ROOT), name="media")
 
 # Include API router
 app.include_router(api_router, prefix=settings.API_V1_STR)
 
+@app.on_event("startup")
+async def start_model_warmup():
+    # Pin from the main thread before any thread pool spawns, so every
+    # thread created afterwards inherits the affinity
+    apply_cpu_profile()
+    # Load the model in the background so the process starts serving
+    # /health immediately; /ready flips once the warmup inference is done
+    if settings.MODEL_WARMUP_ON_STARTUP:
+        app.state.warmup_task = asyncio.create_task(sd_service.start())
+
+@app.on_event("shutdown")
+async def shutdown_inference_executor():
+    inference_executor.shutdown(wait=False)
+    model_registry.clear()
+
 @app.get("/")
 async def root():
     return JSONResponse(
@@ -64,19 +90,62 @@ async def root():
         }
     )
 
+async def _run_check(check, *args) -> str:
+    try:
+        return await asyncio.wait_for(
+            asyncio.to_thread(check, *args),
+            timeout=settings.HEALTH_CHECK_TIMEOUT
+        )
+    except asyncio.TimeoutError:
+        return DOWN
+
+async def _service_statuses() -> dict:
+    database, cache = await asyncio.gather(
+        _run_check(check_database),
+        _run_check(check_redis, sd_service.redis_client)
+    )
+    return {
+        "api": UP,
+        "database": database,
+        "cache": cache,
+        "ai_services": sd_service.state
+    }
+
 @app.get("/health")
 async def health_check():
+    """Liveness probe: always 200 while the process is serving requests."""
+    services = await _service_statuses()
+    healthy = services["database"] == UP and services["cache"] == UP
     return JSONResponse(
         content={
-            "status": "healthy",
-            "services": {
-                "api": "up",
-                "database": "up",
-                "cache": "up",
-                "ai_services": "up"
-            }
+            "status": "healthy" if healthy else "degraded",
+            "services": services
         }
     )
 
+@app.get("/ready")
+async def readiness_check():
+    """Readiness probe: 200 only once the model is warmed and dependencies respond.
+
+    API-only nodes (MODEL_WARMUP_ON_STARTUP off) never load the model, so
+    they are ready as soon as their dependencies respond.
+    """
+    services = await _service_statuses()
+    ready = (
+        (sd_service.is_ready or sd_service.is_disabled)
+        and services["database"] == UP
+        and services["cache"] == UP
+    )
+    content = {
+        "status": "ready" if ready else "not_ready",
+        "services": services
+    }
+    if sd_service.load_error:
+        content["error"] = sd_service.load_error
+    return JSONResponse(
+        status_code=status.HTTP_200_OK if ready else status.HTTP_503_SERVICE_UNAVAILABLE,
+        content=content
+    )
+
 if __name__ == "__main__":
     uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True) 
\ No newline at end of file
@@ -0,0 +1,10 @@
+from sqlalchemy import Column, Integer, String
+from .base import Base, TimestampMixin
+
+class MediaBlob(Base, TimestampMixin):
+    __tablename__ = "media_blobs"
+
+    path = Column(String, primary_key=True)  # storage key, e.g. sketches/ab/cd/<sha256>.png
+    digest = Column(String(64), nullable=False, index=True)
+    size = Column(Integer, nullable=False)
+    ref_count = Column(Integer, nullable=False, default=0)
@@ -0,0 +1,13 @@
+from sqlalchemy import Column, String, Float, Text, JSON
+from .base import Base, TimestampMixin
+
+class RenderJob(Base, TimestampMixin):
+    __tablename__ = "render_jobs"
+
+    id = Column(String(32), primary_key=True, index=True)
+    kind = Column(String, nullable=False)
+    status = Column(String, nullable=False, default="pending")  # pending, processing, completed, failed
+    progress = Column(Float, nullable=False, default=0.0)
+    payload = Column(JSON, nullable=False, default=dict)
+    result = Column(JSON)
+    error = Column(Text)
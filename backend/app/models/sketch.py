@@ -1,6 +1,8 @@
 from sqlalchemy import Column, Integer, String, ForeignKey
 from sqlalchemy.orm import relationship
 from .base import Base, TimestampMixin
+from ..core.config import settings
+from ..core.storage import storage
 
 class Sketch(Base, TimestampMixin):
     __tablename__ = "sketches"
@@ -18,8 +20,8 @@ class Sketch(Base, TimestampMixin):
 
     @property
     def original_url(self) -> str:
-        return f"/media/sketches/{self.original_file_path}"
+        return storage.url(f"{settings.SKETCHES_DIR}/{self.original_file_path}")
 
     @property
     def rendered_url(self) -> str:
-        return f"/media/renders/{self.rendered_file_path}" 
\ No newline at end of file
+        return storage.url(f"{settings.RENDERS_DIR}/{self.rendered_file_path}") 
\ No newline at end of file
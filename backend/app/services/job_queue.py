@@ -0,0 +1,128 @@
+import logging
+from typing import Dict, List, Optional, Tuple
+import redis
+
+logger = logging.getLogger(__name__)
+
+StreamMessage = Tuple[str, Dict[str, str]]
+
+def _decode(value) -> str:
+    return value.decode() if isinstance(value, bytes) else value
+
+def _decode_messages(messages) -> List[StreamMessage]:
+    decoded = []
+    for message_id, fields in messages or []:
+        if fields is None:
+            # Entry was trimmed from the stream while still pending
+            continue
+        decoded.append((
+            _decode(message_id),
+            {_decode(key): _decode(value) for key, value in fields.items()}
+        ))
+    return decoded
+
+class RedisStreamJobQueue:
+    """Job queue on a Redis Stream consumed through a consumer group.
+
+    Messages stay in the group's pending list until acknowledged, so a job whose
+    worker dies is claimed by another worker once it has been idle for
+    ``claim_idle_ms``. Jobs delivered more than ``max_deliveries`` times are
+    moved to ``dead_letter_stream`` instead of being retried again.
+    """
+
+    def __init__(
+        self,
+        redis_client: redis.Redis,
+        stream: str = "render_jobs",
+        group: str = "render_workers",
+        dead_letter_stream: str = "render_jobs:dead",
+        max_deliveries: int = 3,
+        claim_idle_ms: int = 60000,
+        maxlen: int = 10000
+    ):
+        self.redis = redis_client
+        self.stream = stream
+        self.group = group
+        self.dead_letter_stream = dead_letter_stream
+        self.max_deliveries = max_deliveries
+        self.claim_idle_ms = claim_idle_ms
+        self.maxlen = maxlen
+        self._claim_cursor = "0-0"
+
+    def ensure_group(self):
+        """Create the stream and consumer group if they do not exist yet."""
+        try:
+            self.redis.xgroup_create(self.stream, self.group, id="0", mkstream=True)
+        except redis.ResponseError as e:
+            if "BUSYGROUP" not in str(e):
+                raise
+
+    def enqueue(self, job_id: str) -> str:
+        message_id = self.redis.xadd(
+            self.stream,
+            {"job_id": job_id},
+            maxlen=self.maxlen,
+            approximate=True
+        )
+        return _decode(message_id)
+
+    def read(self, consumer: str, count: int = 1, block_ms: int = 5000) -> List[StreamMessage]:
+        """Read new messages for ``consumer``, blocking up to ``block_ms``."""
+        response = self.redis.xreadgroup(
+            self.group,
+            consumer,
+            {self.stream: ">"},
+            count=count,
+            block=block_ms
+        )
+        if not response:
+            return []
+        _, messages = response[0]
+        return _decode_messages(messages)
+
+    def claim_stalled(self, consumer: str, count: int = 1) -> List[StreamMessage]:
+        """Take over messages another consumer has left pending for too long."""
+        response = self.redis.xautoclaim(
+            self.stream,
+            self.group,
+            consumer,
+            min_idle_time=self.claim_idle_ms,
+            start_id=self._claim_cursor,
+            count=count
+        )
+        self._claim_cursor = _decode(response[0])
+        return _decode_messages(response[1])
+
+    def heartbeat(self, consumer: str, message_id: str):
+        """Reset a message's idle time so it is not claimed while still running."""
+        self.redis.xclaim(
+            self.stream,
+            self.group,
+            consumer,
+            min_idle_time=0,
+            message_ids=[message_id],
+            justid=True
+        )
+
+    def delivery_count(self, message_id: str) -> int:
+        pending = self.redis.xpending_range(
+            self.stream,
+            self.group,
+            min=message_id,
+            max=message_id,
+            count=1
+        )
+        return pending[0]["times_delivered"] if pending else 0
+
+    def ack(self, message_id: str):
+        self.redis.xack(self.stream, self.group, message_id)
+
+    def dead_letter(self, message_id: str, fields: Dict[str, str], reason: Optional[str] = None):
+        """Move a message to the dead-letter stream and acknowledge it."""
+        self.redis.xadd(
+            self.dead_letter_stream,
+            {**fields, "message_id": message_id, "reason": reason or ""},
+            maxlen=self.maxlen,
+            approximate=True
+        )
+        self.ack(message_id)
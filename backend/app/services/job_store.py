@@ -0,0 +1,162 @@
+import json
+import threading
+import uuid
+from abc import ABC, abstractmethod
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from typing import Any, Callable, Dict, Optional
+import redis
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.core.redis_client import create_redis_client
+from app.models.render_job import RenderJob
+
+JOB_PENDING = "pending"
+JOB_PROCESSING = "processing"
+JOB_COMPLETED = "completed"
+JOB_FAILED = "failed"
+
+@dataclass
+class Job:
+    id: str
+    kind: str
+    status: str = JOB_PENDING
+    progress: float = 0.0
+    payload: Dict[str, Any] = field(default_factory=dict)
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    created_at: datetime = field(default_factory=datetime.utcnow)
+    updated_at: datetime = field(default_factory=datetime.utcnow)
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = asdict(self)
+        data["created_at"] = self.created_at.isoformat()
+        data["updated_at"] = self.updated_at.isoformat()
+        return data
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Job":
+        data = dict(data)
+        data["created_at"] = datetime.fromisoformat(data["created_at"])
+        data["updated_at"] = datetime.fromisoformat(data["updated_at"])
+        return cls(**data)
+
+class JobStore(ABC):
+    """Persistence for render jobs shared by the API and the workers."""
+
+    def create(self, kind: str, payload: Dict[str, Any]) -> Job:
+        job = Job(id=uuid.uuid4().hex, kind=kind, payload=payload)
+        self._save(job)
+        return job
+
+    def update(self, job_id: str, **fields) -> Optional[Job]:
+        job = self.get(job_id)
+        if job is None:
+            return None
+        for name, value in fields.items():
+            setattr(job, name, value)
+        job.updated_at = datetime.utcnow()
+        self._save(job)
+        return job
+
+    @abstractmethod
+    def get(self, job_id: str) -> Optional[Job]:
+        ...
+
+    @abstractmethod
+    def _save(self, job: Job):
+        ...
+
+class InMemoryJobStore(JobStore):
+    """Process-local job store, for tests and single-process development."""
+
+    def __init__(self):
+        self._jobs: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            data = self._jobs.get(job_id)
+        return Job.from_dict(data) if data else None
+
+    def _save(self, job: Job):
+        with self._lock:
+            self._jobs[job.id] = job.to_dict()
+
+class RedisJobStore(JobStore):
+    """Job store keeping each job as a JSON document with a TTL."""
+
+    def __init__(self, redis_client: redis.Redis, prefix: str = "render_job:", ttl: int = 60 * 60 * 24 * 7):
+        self.redis = redis_client
+        self.prefix = prefix
+        self.ttl = ttl
+
+    def get(self, job_id: str) -> Optional[Job]:
+        data = self.redis.get(f"{self.prefix}{job_id}")
+        return Job.from_dict(json.loads(data)) if data else None
+
+    def _save(self, job: Job):
+        self.redis.setex(f"{self.prefix}{job.id}", self.ttl, json.dumps(job.to_dict()))
+
+class SQLAlchemyJobStore(JobStore):
+    """Job store backed by the ``render_jobs`` table."""
+
+    def __init__(self, session_factory: Callable[[], Session]):
+        self.session_factory = session_factory
+
+    @staticmethod
+    def _to_job(row: RenderJob) -> Job:
+        return Job(
+            id=row.id,
+            kind=row.kind,
+            status=row.status,
+            progress=row.progress,
+            payload=row.payload or {},
+            result=row.result,
+            error=row.error,
+            created_at=row.created_at,
+            updated_at=row.updated_at
+        )
+
+    def get(self, job_id: str) -> Optional[Job]:
+        db = self.session_factory()
+        try:
+            row = db.query(RenderJob).filter(RenderJob.id == job_id).first()
+            return self._to_job(row) if row else None
+        finally:
+            db.close()
+
+    def _save(self, job: Job):
+        db = self.session_factory()
+        try:
+            db.merge(RenderJob(
+                id=job.id,
+                kind=job.kind,
+                status=job.status,
+                progress=job.progress,
+                payload=job.payload,
+                result=job.result,
+                error=job.error,
+                created_at=job.created_at,
+                updated_at=job.updated_at
+            ))
+            db.commit()
+        finally:
+            db.close()
+
+def create_job_store(backend: str) -> JobStore:
+    """Create the job store configured by ``JOB_STORE_BACKEND``."""
+    if backend == "memory":
+        return InMemoryJobStore()
+    if backend == "redis":
+        return RedisJobStore(
+            create_redis_client(settings.JOB_REDIS_URL),
+            ttl=settings.JOB_TTL_SECONDS
+        )
+    if backend == "sqlalchemy":
+        from app.db.session import SessionLocal
+        return SQLAlchemyJobStore(SessionLocal)
+    raise ValueError(f"Unknown job store backend: {backend}")
+
+# Global instance
+job_store = create_job_store(settings.JOB_STORE_BACKEND)
@@ -0,0 +1,136 @@
+import asyncio
+import hashlib
+import logging
+import os
+from typing import BinaryIO, Optional
+from fastapi import UploadFile
+from sqlalchemy.exc import IntegrityError
+from app.core.config import settings
+from app.core.storage import StorageBackend, storage, IMMUTABLE_CACHE_CONTROL
+from app.db.session import SessionLocal
+from app.models.media_blob import MediaBlob
+from app.utils.file_handler import FileHandler, INCOMING_DIR
+
+logger = logging.getLogger(__name__)
+
+class MediaStore:
+    """Content-addressed, reference-counted media files under ``<namespace>/`` in storage.
+
+    Files are stored once per SHA-256 at ``<namespace>/ab/cd/<digest><ext>``,
+    and the ``media_blobs`` table counts the records pointing at each one.
+    Paths returned to callers are relative to the namespace, like the plain
+    filenames stored before.
+    """
+
+    def __init__(self, namespace: str, backend: StorageBackend = None):
+        self.namespace = namespace
+        self.storage = backend or storage
+
+    @staticmethod
+    def blob_path(digest: str, extension: str) -> str:
+        return f"{digest[:2]}/{digest[2:4]}/{digest}{extension}"
+
+    def _key(self, path: str) -> str:
+        return f"{self.namespace}/{path}"
+
+    def open(self, path: str) -> BinaryIO:
+        return self.storage.open(self._key(path))
+
+    def url(self, path: str) -> str:
+        return self.storage.url(self._key(path))
+
+    def _acquire(self, digest: str, path: str, size: int):
+        """Add a reference to the blob row for ``path``, creating it if needed."""
+        for attempt in range(2):
+            db = SessionLocal()
+            try:
+                blob = db.query(MediaBlob).filter(
+                    MediaBlob.path == self._key(path)
+                ).with_for_update().first()
+                if blob is None:
+                    db.add(MediaBlob(path=self._key(path), digest=digest, size=size, ref_count=1))
+                else:
+                    blob.ref_count += 1
+                db.commit()
+                return
+            except IntegrityError:
+                # Another writer created the row first; count against theirs
+                db.rollback()
+                if attempt:
+                    raise
+            finally:
+                db.close()
+
+    def add_file(self, source_path: str, digest: str, extension: str) -> str:
+        """Move a file with known ``digest`` into the store and return its path.
+
+        If the content is already stored, the source file is discarded. The
+        reference is committed before the file is placed, so a concurrent
+        release of the last reference cannot remove it afterwards.
+        """
+        path = self.blob_path(digest, extension)
+        self._acquire(digest, path, os.path.getsize(source_path))
+
+        if self.storage.exists(self._key(path)):
+            logger.info(f"Deduplicated {self._key(path)}")
+            os.remove(source_path)
+        else:
+            self.storage.put_file(self._key(path), source_path, IMMUTABLE_CACHE_CONTROL)
+        return path
+
+    def add_bytes(self, data: bytes, extension: str) -> str:
+        """Store ``data`` and return its path."""
+        digest = hashlib.sha256(data).hexdigest()
+        path = self.blob_path(digest, extension)
+        self._acquire(digest, path, len(data))
+
+        if self.storage.exists(self._key(path)):
+            logger.info(f"Deduplicated {self._key(path)}")
+        else:
+            self.storage.put_bytes(self._key(path), data, IMMUTABLE_CACHE_CONTROL)
+        return path
+
+    async def add_upload(self, upload_file: UploadFile, require_image: bool = True) -> str:
+        """Stream an upload into the store and return its path."""
+        saved = await FileHandler.stream_upload_file(
+            upload_file,
+            INCOMING_DIR,
+            require_image=require_image
+        )
+        extension = os.path.splitext(saved.path)[1]
+        try:
+            return await asyncio.to_thread(self.add_file, saved.path, saved.sha256, extension)
+        except Exception:
+            # add_file consumes the file only once it succeeds
+            await FileHandler.discard(saved.path)
+            raise
+
+    def release(self, path: Optional[str]) -> bool:
+        """Drop one reference to ``path``, deleting the file with the last one.
+
+        Files written before the store existed have no blob row and are
+        deleted directly. Returns whether a file was removed.
+        """
+        if not path:
+            return False
+        db = SessionLocal()
+        try:
+            blob = db.query(MediaBlob).filter(
+                MediaBlob.path == self._key(path)
+            ).with_for_update().first()
+            if blob is not None:
+                blob.ref_count -= 1
+                if blob.ref_count > 0:
+                    db.commit()
+                    return False
+                db.delete(blob)
+            # Removed while the row lock is held, so a concurrent add of the
+            # same content waits and then places the file again
+            removed = self.storage.delete(self._key(path))
+            db.commit()
+            return removed
+        finally:
+            db.close()
+
+sketch_store = MediaStore(settings.SKETCHES_DIR)
+render_store = MediaStore(settings.RENDERS_DIR)
@@ -0,0 +1,222 @@
+import asyncio
+import logging
+from typing import Any, Callable, Dict, Optional, Set
+from app.ai.executor import inference_executor
+from app.ai.model_registry import model_registry
+from app.ai.stable_diffusion import sd_service, GenerationResult
+from app.core.config import settings
+from app.core.redis_client import create_redis_client
+from app.db.session import SessionLocal
+from app.models.sketch import Sketch
+from app.services.media_store import render_store, sketch_store
+from app.services.job_store import (
+    Job,
+    job_store,
+    JOB_PENDING,
+    JOB_PROCESSING,
+    JOB_COMPLETED,
+    JOB_FAILED
+)
+from app.services.job_queue import RedisStreamJobQueue
+from app.services.sketch_processor import sketch_processor
+from app.utils.image_encoding import OutputFormat
+
+logger = logging.getLogger(__name__)
+
+SKETCH_RENDER = "sketch_render"
+# Generation API requests handed to the worker fleet by API-only nodes
+TEXT_TO_IMAGE = "text_to_image"
+SKETCH_TO_IMAGE = "sketch_to_image"
+
+ProgressCallback = Callable[[float], None]
+
+def _set_sketch_status(sketch_id: int, status: str, rendered_file_path: str = None):
+    db = SessionLocal()
+    try:
+        sketch = db.query(Sketch).filter(Sketch.id == sketch_id).first()
+        if sketch is None:
+            return
+        sketch.status = status
+        previous_render = None
+        if rendered_file_path is not None:
+            previous_render = sketch.rendered_file_path
+            sketch.rendered_file_path = rendered_file_path
+        db.commit()
+    finally:
+        db.close()
+    # A redelivered job renders again; drop the reference the earlier run held
+    if previous_render:
+        render_store.release(previous_render)
+
+def run_sketch_render(job: Job, report_progress: ProgressCallback) -> Dict[str, Any]:
+    """Render an uploaded sketch and attach the result to its ``Sketch`` row."""
+    payload = job.payload
+    _set_sketch_status(payload["sketch_id"], "processing")
+    rendered_filename = sketch_processor.process_sketch(
+        payload["sketch_filename"],
+        payload["style"],
+        progress_callback=report_progress
+    )
+    _set_sketch_status(payload["sketch_id"], "completed", rendered_filename)
+    return {"sketch_id": payload["sketch_id"], "rendered_filename": rendered_filename}
+
+def fail_sketch_render(job: Job):
+    _set_sketch_status(job.payload["sketch_id"], "failed")
+
+# Generation jobs only run on queue workers, one at a time, so one long-lived
+# loop drives sd_service's coroutines and its asyncio Redis connections
+_generation_loop: Optional[asyncio.AbstractEventLoop] = None
+
+def _run_generation(coro):
+    global _generation_loop
+    if _generation_loop is None:
+        _generation_loop = asyncio.new_event_loop()
+    return _generation_loop.run_until_complete(coro)
+
+def _sync_model():
+    """Serve the UNet recorded for the fleet, as the API workers do."""
+    if model_registry.is_loaded(settings.SD_MODEL_ID):
+        _run_generation(sd_service.sync_recorded_model())
+    else:
+        _run_generation(sd_service.restore_recorded_model())
+
+def generation_result_key(job_id: str) -> str:
+    """Result cache key holding a finished generation job's image."""
+    return f"job:{job_id}"
+
+def _generation_params(job: Job) -> Dict[str, Any]:
+    params = dict(job.payload)
+    params["output_format"] = OutputFormat(**params["output_format"])
+    return params
+
+def _store_generation_result(job: Job, result: GenerationResult) -> Dict[str, Any]:
+    # Goes through the shared Redis tier, where the API node reads it back
+    sd_service.result_cache.set(generation_result_key(job.id), result.image)
+    return {"seed": result.seed, "media_type": result.media_type}
+
+def run_text_to_image(job: Job, report_progress: ProgressCallback) -> Dict[str, Any]:
+    """Render a queued /generation/text-to-image request."""
+    _sync_model()
+    result = _run_generation(sd_service.generate_from_prompt(**_generation_params(job)))
+    return _store_generation_result(job, result)
+
+def run_sketch_to_image(job: Job, report_progress: ProgressCallback) -> Dict[str, Any]:
+    """Render a queued /generation/sketch-to-image request from its stored upload."""
+    params = _generation_params(job)
+    sketch_filename = params.pop("sketch_filename")
+    _sync_model()
+    with sketch_store.open(sketch_filename) as sketch:
+        result = _run_generation(sd_service.generate_from_sketch(sketch_image=sketch, **params))
+    sketch_store.release(sketch_filename)
+    return _store_generation_result(job, result)
+
+def fail_sketch_to_image(job: Job):
+    sketch_store.release(job.payload["sketch_filename"])
+
+JOB_HANDLERS: Dict[str, Callable[[Job, ProgressCallback], Dict[str, Any]]] = {
+    SKETCH_RENDER: run_sketch_render,
+    TEXT_TO_IMAGE: run_text_to_image,
+    SKETCH_TO_IMAGE: run_sketch_to_image,
+}
+
+# Called once a job has failed for good (no retries left)
+JOB_FAILURE_HANDLERS: Dict[str, Callable[[Job], None]] = {
+    SKETCH_RENDER: fail_sketch_render,
+    SKETCH_TO_IMAGE: fail_sketch_to_image,
+}
+
+def mark_job_failed(job_id: str, error: str):
+    """Record a job as failed for good and let its kind clean up."""
+    job = job_store.update(job_id, status=JOB_FAILED, error=error)
+    on_failure = JOB_FAILURE_HANDLERS.get(job.kind) if job else None
+    if on_failure is not None:
+        try:
+            on_failure(job)
+        except Exception as e:
+            logger.error(f"Failure handler for job {job_id} raised: {str(e)}")
+
+def execute_job(job_id: str, retry: bool = False):
+    """Run a queued job to completion, recording status and progress in the job store.
+
+    With ``retry`` (queue workers) a failing handler's exception propagates
+    and the job goes back to pending, so the queue can redeliver it; it is
+    marked failed once deliveries run out. Otherwise it is marked failed.
+    """
+    job = job_store.get(job_id)
+    if job is None:
+        logger.warning(f"Job {job_id} not found")
+        return
+
+    handler = JOB_HANDLERS.get(job.kind)
+    if handler is None:
+        job_store.update(job_id, status=JOB_FAILED, error=f"Unknown job kind: {job.kind}")
+        return
+
+    def report_progress(progress: float):
+        job_store.update(job_id, progress=round(min(max(progress, 0.0), 1.0), 3))
+
+    job_store.update(job_id, status=JOB_PROCESSING)
+    try:
+        result = handler(job, report_progress)
+    except Exception as e:
+        logger.error(f"Job {job_id} ({job.kind}) failed: {str(e)}")
+        if retry:
+            job_store.update(job_id, status=JOB_PENDING, error=str(e))
+            raise
+        mark_job_failed(job_id, str(e))
+        return
+
+    job_store.update(job_id, status=JOB_COMPLETED, progress=1.0, result=result)
+
+class LocalJobDispatcher:
+    """Run submitted jobs on this process's inference executor."""
+
+    def __init__(self):
+        self._tasks: Set[asyncio.Task] = set()
+
+    async def submit(self, kind: str, payload: Dict[str, Any]) -> Job:
+        job = await asyncio.to_thread(job_store.create, kind, payload)
+        task = asyncio.create_task(inference_executor.run(execute_job, job.id))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return job
+
+class RedisStreamJobDispatcher:
+    """Hand submitted jobs to the worker fleet through a Redis Stream."""
+
+    def __init__(self, queue: RedisStreamJobQueue):
+        self.queue = queue
+        self.queue.ensure_group()
+
+    async def submit(self, kind: str, payload: Dict[str, Any]) -> Job:
+        job = await asyncio.to_thread(job_store.create, kind, payload)
+        await asyncio.to_thread(self.queue.enqueue, job.id)
+        return job
+
+def create_job_queue() -> RedisStreamJobQueue:
+    """Create the render job stream queue from settings."""
+    if settings.JOB_STORE_BACKEND == "memory":
+        # Workers would never find jobs created in the API process
+        raise ValueError(
+            "JOB_QUEUE_BACKEND=redis_stream needs a shared job store; "
+            "set JOB_STORE_BACKEND to sqlalchemy or redis"
+        )
+    return RedisStreamJobQueue(
+        create_redis_client(settings.JOB_REDIS_URL),
+        stream=settings.JOB_STREAM,
+        group=settings.JOB_STREAM_GROUP,
+        dead_letter_stream=settings.JOB_DEAD_LETTER_STREAM,
+        max_deliveries=settings.JOB_MAX_DELIVERIES,
+        claim_idle_ms=settings.JOB_CLAIM_IDLE_MS
+    )
+
+def create_job_dispatcher(backend: str):
+    """Create the dispatcher configured by ``JOB_QUEUE_BACKEND``."""
+    if backend == "local":
+        return LocalJobDispatcher()
+    if backend == "redis_stream":
+        return RedisStreamJobDispatcher(create_job_queue())
+    raise ValueError(f"Unknown job queue backend: {backend}")
+
+# Global instance
+job_dispatcher = create_job_dispatcher(settings.JOB_QUEUE_BACKEND)
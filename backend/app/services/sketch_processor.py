@@ -1,74 +1,101 @@
 import torch
 from diffusers import StableDiffusionXLImg2ImgPipeline
-from PIL import Image
 import os
 from app.core.config import settings
-import uuid
+from app.ai.cpu_profile import apply_cpu_profile, optimize_pipeline
+from app.ai.model_registry import model_registry
+from app.utils.sketch_preprocessing import preprocess_sketch
+from app.utils.image_encoding import get_output_format, encode_image
+from app.services.media_store import sketch_store, render_store
+from fastapi import UploadFile
+from typing import Callable, Optional
+from PIL import Image
 
 class SketchProcessor:
     def __init__(self):
         self.device = settings.DEVICE
         self.model = None
         self._ensure_directories()
+        # Loaded lazily by the registry, which may evict it for other models
+        model_registry.register(settings.MODEL_NAME, self._load_model, self._unload_model)
 
     def _ensure_directories(self):
         """Ensure media directories exist"""
         os.makedirs(os.path.join(settings.MEDIA_ROOT, settings.SKETCHES_DIR), exist_ok=True)
         os.makedirs(os.path.join(settings.MEDIA_ROOT, settings.RENDERS_DIR), exist_ok=True)
 
-    def _load_model(self):
-        """Lazy load the model when needed"""
-        if self.model is None:
-            self.model = StableDiffusionXLImg2ImgPipeline.from_pretrained(
-                settings.MODEL_NAME,
-                torch_dtype=torch.float16 if self.device == "cuda" else torch.float32,
-            )
-            self.model.to(self.device)
+    def _load_model(self) -> StableDiffusionXLImg2ImgPipeline:
+        """Load the model (called by the model registry on first use)"""
+        if self.device == "cpu":
+            apply_cpu_profile()
+        self.model = StableDiffusionXLImg2ImgPipeline.from_pretrained(
+            settings.MODEL_NAME,
+            torch_dtype=torch.float16 if self.device == "cuda" else torch.float32,
+        )
+        self.model.to(self.device)
+        if self.device == "cpu":
+            optimize_pipeline(self.model)
+        return self.model
 
-    def save_sketch(self, file_content: bytes) -> str:
-        """Save uploaded sketch and return filename"""
-        filename = f"{uuid.uuid4()}.png"
-        filepath = os.path.join(settings.MEDIA_ROOT, settings.SKETCHES_DIR, filename)
-        
-        # Save the uploaded file
-        with open(filepath, "wb") as f:
-            f.write(file_content)
-        
-        return filename
+    def _unload_model(self, model: StableDiffusionXLImg2ImgPipeline):
+        self.model = None
+
+    async def save_sketch_upload(self, upload_file: UploadFile) -> str:
+        """Stream an uploaded sketch into the sketch store and return its path"""
+        return await sketch_store.add_upload(upload_file)
 
-    def process_sketch(self, sketch_path: str, style: str) -> str:
+    def process_sketch(
+        self,
+        sketch_path: str,
+        style: str,
+        progress_callback: Optional[Callable[[float], None]] = None
+    ) -> str:
         """Process sketch and return rendered image path"""
-        self._load_model()
+        with model_registry.use(settings.MODEL_NAME) as model:
+            output = self._render(model, sketch_path, style, progress_callback)
 
+        # Save output in the configured render format
+        render_format = get_output_format(settings.RENDER_FORMAT, settings.RENDER_QUALITY)
+        return render_store.add_bytes(
+            encode_image(output, render_format),
+            f".{render_format.extension}"
+        )
+
+    def _render(
+        self,
+        model: StableDiffusionXLImg2ImgPipeline,
+        sketch_path: str,
+        style: str,
+        progress_callback: Optional[Callable[[float], None]]
+    ) -> Image.Image:
         # Load and preprocess image
-        image = Image.open(os.path.join(settings.MEDIA_ROOT, settings.SKETCHES_DIR, sketch_path))
+        with sketch_store.open(sketch_path) as f:
+            image = preprocess_sketch(f, settings.SKETCH_XL_INPUT_SIZE, settings.SKETCH_NORMALIZE_CONTRAST)
         
         # Prepare prompt based on style
         prompt = f"Convert this architectural sketch into a photorealistic {style} style building, " \
                 f"with authentic Indian architectural details, textures, and materials"
         
+        num_inference_steps = 50
+
+        def on_step_end(pipe, step, timestep, callback_kwargs):
+            # img2img only runs the last `strength` fraction of the schedule
+            total_steps = getattr(pipe, "num_timesteps", None) or num_inference_steps
+            progress_callback((step + 1) / total_steps)
+            return callback_kwargs
+
         # Generate image
-        output = self.model(
+        return model(
             prompt=prompt,
             image=image,
-            num_inference_steps=50,
+            num_inference_steps=num_inference_steps,
             strength=0.75,
             guidance_scale=7.5,
+            callback_on_step_end=on_step_end if progress_callback else None,
         ).images[0]
 
-        # Save output
-        output_filename = f"{uuid.uuid4()}.png"
-        output_path = os.path.join(settings.MEDIA_ROOT, settings.RENDERS_DIR, output_filename)
-        output.save(output_path)
-
-        return output_filename
-
     def cleanup(self):
         """Clean up resources"""
-        if self.model is not None:
-            del self.model
-            if torch.cuda.is_available():
-                torch.cuda.empty_cache()
-            self.model = None
+        model_registry.evict(settings.MODEL_NAME)
 
 sketch_processor = SketchProcessor() 
\ No newline at end of file
@@ -1,29 +1,113 @@
+import asyncio
+import hashlib
 import os
 import uuid
-from fastapi import UploadFile
-from typing import List
+from dataclasses import dataclass
+import aiofiles
+import aiofiles.os
+from fastapi import HTTPException, UploadFile
+from typing import List, Optional
 from ..core.config import settings
+from ..core.storage import storage
+
+UPLOAD_CHUNK_SIZE = 1024 * 1024  # 1 MiB
+
+# Leading bytes of the image formats accepted as uploads, with their extension
+IMAGE_SIGNATURES = [
+    (b"\x89PNG\r\n\x1a\n", ".png"),
+    (b"\xff\xd8\xff", ".jpg"),
+    (b"GIF87a", ".gif"),
+    (b"GIF89a", ".gif"),
+    (b"BM", ".bmp"),
+]
+
+def detect_image_extension(header: bytes) -> Optional[str]:
+    """Return the file extension for an image header, or None if it is not a supported image."""
+    if header[:4] == b"RIFF" and header[8:12] == b"WEBP":
+        return ".webp"
+    for signature, extension in IMAGE_SIGNATURES:
+        if header.startswith(signature):
+            return extension
+    return None
+
+@dataclass
+class SavedUpload:
+    path: str
+    size: int
+    sha256: str
+
+# Local scratch space for uploads before they are handed to the storage backend.
+# Not under MEDIA_ROOT, which is served publicly at /media
+INCOMING_DIR = settings.UPLOAD_TMP_DIR
 
 class FileHandler:
     @staticmethod
-    async def save_upload_file(upload_file: UploadFile, folder: str = "uploads") -> str:
+    async def stream_upload_file(
+        upload_file: UploadFile,
+        folder: str = "uploads",
+        max_bytes: Optional[int] = None,
+        require_image: bool = False
+    ) -> SavedUpload:
         """
-        Save an uploaded file and return its path.
+        Copy an upload to disk in fixed-size chunks with async file I/O.
+
+        Memory use is one chunk regardless of the upload size. The size limit
+        and (with ``require_image``) the image signature are checked as the
+        data arrives, and the partial file is removed if either fails. Image
+        uploads are named after their detected type, not the client's filename.
         """
-        # Create folder if it doesn't exist
+        max_bytes = max_bytes or settings.MAX_UPLOAD_BYTES
+        if upload_file.size is not None and upload_file.size > max_bytes:
+            raise HTTPException(status_code=413, detail=f"File exceeds {max_bytes} bytes")
+
         os.makedirs(folder, exist_ok=True)
-        
-        # Generate unique filename
-        file_extension = os.path.splitext(upload_file.filename)[1]
-        unique_filename = f"{uuid.uuid4()}{file_extension}"
-        file_path = os.path.join(folder, unique_filename)
-        
-        # Save file
-        content = await upload_file.read()
-        with open(file_path, "wb") as f:
-            f.write(content)
-        
-        return file_path
+        first_chunk = await upload_file.read(UPLOAD_CHUNK_SIZE)
+        if require_image:
+            file_extension = detect_image_extension(first_chunk)
+            if file_extension is None:
+                raise HTTPException(status_code=415, detail="File is not a supported image")
+        else:
+            file_extension = os.path.splitext(upload_file.filename or "")[1]
+        file_path = os.path.join(folder, f"{uuid.uuid4()}{file_extension}")
+
+        digest = hashlib.sha256()
+        size = 0
+        try:
+            async with aiofiles.open(file_path, "wb") as f:
+                chunk = first_chunk
+                while chunk:
+                    size += len(chunk)
+                    if size > max_bytes:
+                        raise HTTPException(status_code=413, detail=f"File exceeds {max_bytes} bytes")
+                    digest.update(chunk)
+                    await f.write(chunk)
+                    chunk = await upload_file.read(UPLOAD_CHUNK_SIZE)
+        except BaseException:
+            if await aiofiles.os.path.exists(file_path):
+                await aiofiles.os.remove(file_path)
+            raise
+
+        return SavedUpload(path=file_path, size=size, sha256=digest.hexdigest())
+
+    @staticmethod
+    async def save_upload_file(upload_file: UploadFile, folder: str = "uploads") -> str:
+        """
+        Save an uploaded file to storage and return its key.
+        """
+        saved = await FileHandler.stream_upload_file(upload_file, INCOMING_DIR)
+        key = f"{folder}/{os.path.basename(saved.path)}"
+        try:
+            await asyncio.to_thread(storage.put_file, key, saved.path)
+        except Exception:
+            await FileHandler.discard(saved.path)
+            raise
+        return key
+
+    @staticmethod
+    async def discard(path: str):
+        """Remove a scratch file left behind by a failed hand-off."""
+        if await aiofiles.os.path.exists(path):
+            await aiofiles.os.remove(path)
 
     @staticmethod
     async def save_multiple_files(
@@ -31,7 +115,7 @@ class FileHandler:
         folder: str = "uploads"
     ) -> List[str]:
         """
-        Save multiple uploaded files and return their paths.
+        Save multiple uploaded files and return their keys.
         """
         file_paths = []
         for upload_file in upload_files:
@@ -42,24 +126,19 @@ class FileHandler:
     @staticmethod
     def delete_file(file_path: str) -> bool:
         """
-        Delete a file from the filesystem.
+        Delete a file from storage.
         """
         try:
-            if os.path.exists(file_path):
-                os.remove(file_path)
-                return True
-            return False
+            return storage.delete(file_path)
         except Exception:
             return False
 
     @staticmethod
     def get_file_url(file_path: str) -> str:
         """
-        Generate a URL for a file.
-        In production, this would return a CDN or S3 URL.
+        Generate a URL for a file: /media locally, a presigned or CDN URL on S3.
         """
-        # For development, return a local URL
-        return f"/static/{file_path}"
+        return storage.url(file_path)
 
     @staticmethod
     def is_valid_file_type(filename: str, allowed_extensions: List[str]) -> bool:
@@ -73,4 +152,4 @@ class FileHandler:
         """
         Get the size of a file in bytes.
         """
-        return os.path.getsize(file_path) 
\ No newline at end of file
+        return storage.size(file_path) 
\ No newline at end of file
@@ -0,0 +1,105 @@
+import io
+from dataclasses import dataclass
+from typing import Optional
+from PIL import Image
+
+# Format name -> (PIL format, media type, file extension)
+IMAGE_FORMATS = {
+    "png": ("PNG", "image/png", "png"),
+    "webp": ("WEBP", "image/webp", "webp"),
+    "jpeg": ("JPEG", "image/jpeg", "jpg"),
+}
+_ALIASES = {"jpg": "jpeg"}
+_MEDIA_TYPES = {media_type: name for name, (_, media_type, _) in IMAGE_FORMATS.items()}
+
+# PNG stays the default so clients sending */* keep getting what they used to
+DEFAULT_FORMAT = "png"
+DEFAULT_QUALITY = 85
+
+
+@dataclass(frozen=True)
+class OutputFormat:
+    name: str
+    quality: int = DEFAULT_QUALITY
+
+    @property
+    def media_type(self) -> str:
+        return IMAGE_FORMATS[self.name][1]
+
+    @property
+    def extension(self) -> str:
+        return IMAGE_FORMATS[self.name][2]
+
+    @property
+    def lossless(self) -> bool:
+        return self.name == "png"
+
+
+PNG = OutputFormat("png")
+
+
+def get_output_format(name: str, quality: Optional[int] = None) -> OutputFormat:
+    """Return the format called ``name``, raising ValueError for unsupported formats."""
+    name = _ALIASES.get(name.lower(), name.lower())
+    if name not in IMAGE_FORMATS:
+        raise ValueError(
+            f"Unsupported image format '{name}', expected one of: {', '.join(IMAGE_FORMATS)}"
+        )
+    return OutputFormat(name, quality or DEFAULT_QUALITY)
+
+
+def negotiate_format(
+    accept: Optional[str],
+    requested: Optional[str] = None,
+    quality: Optional[int] = None
+) -> OutputFormat:
+    """Pick the response format from an explicit ``format`` field or the Accept header.
+
+    Only specific image media types in Accept count; wildcards fall back to
+    PNG. Among accepted types the highest q-value wins, then header order.
+    """
+    if requested:
+        return get_output_format(requested, quality)
+
+    best_name, best_q = DEFAULT_FORMAT, 0.0
+    for entry in (accept or "").split(","):
+        media_type, _, params = entry.strip().partition(";")
+        name = _MEDIA_TYPES.get(media_type.strip().lower())
+        if name is None:
+            continue
+        q = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        if q > best_q:
+            best_name, best_q = name, q
+    return OutputFormat(best_name, quality or DEFAULT_QUALITY)
+
+
+def encode_image(image: Image.Image, output_format: OutputFormat) -> bytes:
+    """Encode a PIL image in ``output_format``; CPU-bound, call it off the event loop."""
+    buffer = io.BytesIO()
+    if output_format.name == "webp":
+        image.save(buffer, format="WEBP", quality=output_format.quality, method=4)
+    elif output_format.name == "jpeg":
+        image.convert("RGB").save(
+            buffer, format="JPEG", quality=output_format.quality, optimize=True, progressive=True
+        )
+    else:
+        image.save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def transcode(data: bytes, source_format: str, output_format: OutputFormat) -> bytes:
+    """Re-encode ``data`` (stored as ``source_format``) into ``output_format``.
+
+    Bytes are passed through untouched when the formats match and no lossy
+    quality setting applies.
+    """
+    if output_format.lossless and output_format.name == source_format.lower():
+        return data
+    return encode_image(Image.open(io.BytesIO(data)), output_format)
@@ -0,0 +1,28 @@
+import hashlib
+from PIL import Image
+
+def pixel_digest(image: Image.Image) -> str:
+    """SHA-256 of the decoded pixels, independent of the file encoding they came from."""
+    digest = hashlib.sha256()
+    digest.update(f"{image.mode}:{image.width}x{image.height}:".encode())
+    digest.update(image.tobytes())
+    return digest.hexdigest()
+
+def dhash(image: Image.Image, hash_size: int = 8) -> int:
+    """Difference hash: compares adjacent pixels of a tiny grayscale thumbnail.
+
+    Re-encodes, resizes and small edits of the same drawing produce hashes a few
+    bits apart, which makes it usable for near-duplicate lookups.
+    """
+    thumbnail = image.convert("L").resize((hash_size + 1, hash_size), Image.LANCZOS)
+    pixels = list(thumbnail.getdata())
+    value = 0
+    for row in range(hash_size):
+        for col in range(hash_size):
+            left = pixels[row * (hash_size + 1) + col]
+            right = pixels[row * (hash_size + 1) + col + 1]
+            value = (value << 1) | (left > right)
+    return value
+
+def hamming_distance(a: int, b: int) -> int:
+    return bin(a ^ b).count("1")
@@ -0,0 +1,68 @@
+from typing import BinaryIO, Tuple, Union
+import cv2
+import numpy as np
+from PIL import Image, ImageOps
+
+# Diffusion latents are 1/8 of the image size; multiples of 64 keep every UNet
+# downsampling stage evenly divisible
+BUCKET_MULTIPLE = 64
+MIN_BUCKET_SIDE = 256
+
+
+def bucket_size(width: int, height: int, target_side: int) -> Tuple[int, int]:
+    """Scale so the longest side is ``target_side``, rounding both sides to the bucket multiple."""
+    scale = target_side / max(width, height)
+
+    def snap(value: float) -> int:
+        snapped = int(round(value * scale / BUCKET_MULTIPLE)) * BUCKET_MULTIPLE
+        return min(target_side, max(MIN_BUCKET_SIDE, snapped))
+
+    return snap(width), snap(height)
+
+
+def _open(source: BinaryIO, target_side: int) -> Image.Image:
+    image = Image.open(source)
+    # JPEG decoding can downscale by 1/2-1/8 in the DCT domain, so huge phone
+    # photos never materialize at full resolution
+    image.draft("RGB", (target_side, target_side))
+    return ImageOps.exif_transpose(image)
+
+
+def flatten_alpha(image: Image.Image) -> Image.Image:
+    """Composite transparent areas onto white, the paper colour of a sketch."""
+    if image.mode == "P" and "transparency" in image.info:
+        image = image.convert("RGBA")
+    if image.mode in ("RGBA", "LA", "PA"):
+        background = Image.new("RGBA", image.size, (255, 255, 255, 255))
+        return Image.alpha_composite(background, image.convert("RGBA")).convert("RGB")
+    return image.convert("RGB")
+
+
+def normalize_contrast(pixels: np.ndarray, low: float = 1.0, high: float = 99.0) -> np.ndarray:
+    """Stretch luminance percentiles to the full range, darkening faint pencil lines."""
+    gray = cv2.cvtColor(pixels, cv2.COLOR_RGB2GRAY)
+    lo, hi = np.percentile(gray, (low, high))
+    if hi - lo < 1:
+        return pixels
+    alpha = 255.0 / (hi - lo)
+    return cv2.convertScaleAbs(pixels, alpha=alpha, beta=-lo * alpha)
+
+
+def preprocess_sketch(
+    source: Union[Image.Image, BinaryIO],
+    target_side: int,
+    normalize: bool = True
+) -> Image.Image:
+    """Decode, orient, flatten and resize a sketch into a model-friendly RGB image."""
+    image = source if isinstance(source, Image.Image) else _open(source, target_side)
+    pixels = np.asarray(flatten_alpha(image))
+
+    width, height = bucket_size(image.width, image.height, target_side)
+    if (width, height) != (image.width, image.height):
+        # INTER_AREA averages source pixels, keeping thin lines when shrinking
+        interpolation = cv2.INTER_AREA if width < image.width else cv2.INTER_CUBIC
+        pixels = cv2.resize(pixels, (width, height), interpolation=interpolation)
+
+    if normalize:
+        pixels = normalize_contrast(pixels)
+    return Image.fromarray(pixels)
@@ -0,0 +1,134 @@
+import argparse
+import logging
+import os
+import signal
+import socket
+import threading
+from typing import Callable
+from app.services.job_queue import RedisStreamJobQueue, StreamMessage
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+class GenerationWorker:
+    """Consume render jobs from the Redis Stream and run them in this process.
+
+    ``handler(job_id, retry=True)`` runs a job; ``on_abandoned(job_id, error)``
+    is called for jobs dead-lettered after too many deliveries.
+    """
+
+    def __init__(
+        self,
+        queue: RedisStreamJobQueue,
+        consumer: str,
+        handler: Callable[..., None],
+        on_abandoned: Callable[[str, str], None],
+        block_ms: int = 5000,
+        heartbeat_interval: float = 10.0
+    ):
+        self.queue = queue
+        self.consumer = consumer
+        self.handler = handler
+        self.on_abandoned = on_abandoned
+        self.block_ms = block_ms
+        self.heartbeat_interval = heartbeat_interval
+        self._stop = threading.Event()
+
+    def stop(self, *args):
+        logger.info(f"Worker {self.consumer} stopping after the current job")
+        self._stop.set()
+
+    def _process(self, message: StreamMessage):
+        message_id, fields = message
+        job_id = fields.get("job_id")
+
+        deliveries = self.queue.delivery_count(message_id)
+        if not job_id or deliveries > self.queue.max_deliveries:
+            reason = f"delivered {deliveries} times" if job_id else "missing job_id"
+            logger.error(f"Dead-lettering message {message_id} ({reason})")
+            self.queue.dead_letter(message_id, fields, reason)
+            if job_id:
+                self.on_abandoned(job_id, f"Job abandoned: {reason}")
+            return
+
+        # Keep the message claimed while the render runs, so a long job is not
+        # mistaken for a stalled one and picked up by another worker
+        done = threading.Event()
+
+        def heartbeat():
+            while not done.wait(self.heartbeat_interval):
+                try:
+                    self.queue.heartbeat(self.consumer, message_id)
+                except Exception as e:
+                    logger.warning(f"Heartbeat for {message_id} failed: {str(e)}")
+
+        heartbeat_thread = threading.Thread(target=heartbeat, daemon=True)
+        heartbeat_thread.start()
+        try:
+            logger.info(f"Processing job {job_id} (message {message_id}, delivery {deliveries})")
+            self.handler(job_id, retry=True)
+        except Exception as e:
+            # Leave the message pending; it is retried once it goes stale
+            logger.error(f"Job {job_id} raised, leaving it for retry: {str(e)}")
+            return
+        finally:
+            done.set()
+            heartbeat_thread.join()
+
+        self.queue.ack(message_id)
+
+    def run_once(self) -> int:
+        """Process stalled messages first, then new ones. Returns messages handled."""
+        messages = self.queue.claim_stalled(self.consumer)
+        if not messages:
+            messages = self.queue.read(self.consumer, block_ms=self.block_ms)
+        for message in messages:
+            self._process(message)
+        return len(messages)
+
+    def run(self):
+        self.queue.ensure_group()
+        logger.info(f"Worker {self.consumer} consuming {self.queue.stream}/{self.queue.group}")
+        while not self._stop.is_set():
+            try:
+                self.run_once()
+            except Exception as e:
+                logger.error(f"Worker loop error: {str(e)}")
+                self._stop.wait(1.0)
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a render worker consuming the job stream")
+    parser.add_argument(
+        "--consumer",
+        type=str,
+        default=f"{socket.gethostname()}-{os.getpid()}",
+        help="Consumer name within the worker group (must be unique per worker)"
+    )
+    parser.add_argument(
+        "--block_ms",
+        type=int,
+        default=5000,
+        help="How long to block waiting for new jobs"
+    )
+    args = parser.parse_args()
+
+    # The render stack (torch, pipelines, job store) is only needed to run jobs
+    from app.ai.model_registry import model_registry
+    from app.services.render_jobs import create_job_queue, execute_job, mark_job_failed
+
+    worker = GenerationWorker(
+        create_job_queue(),
+        args.consumer,
+        handler=execute_job,
+        on_abandoned=mark_job_failed,
+        block_ms=args.block_ms
+    )
+    signal.signal(signal.SIGTERM, worker.stop)
+    signal.signal(signal.SIGINT, worker.stop)
+    try:
+        worker.run()
+    finally:
+        model_registry.clear()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+Compare fp32 and dynamic int8 CPU inference for the serving model.
+
+Run from the backend directory:
+    python -m scripts.compare_quantization --steps 20 --size 512
+"""
+import argparse
+import gc
+import time
+from pathlib import Path
+import numpy as np
+import torch
+from diffusers import StableDiffusionPipeline
+from app.ai.model_utils import format_bytes, pipeline_component_sizes
+from app.ai.quantization import load_cached_quantized, quantize_pipeline
+from app.core.config import settings
+
+DEFAULT_PROMPTS = [
+    "Indian architectural design, professional architectural visualization, Dravidian temple gopuram",
+    "Indian architectural design, professional architectural visualization, Mughal courtyard with arches",
+    "Indian architectural design, professional architectural visualization, modern Kerala house with sloped roof",
+]
+
+def load_pipeline(quantized: bool) -> StableDiffusionPipeline:
+    cached = load_cached_quantized(settings.SD_MODEL_ID) if quantized else {}
+    pipe = StableDiffusionPipeline.from_pretrained(
+        settings.SD_MODEL_ID,
+        torch_dtype=torch.float32,
+        safety_checker=None,
+        **cached
+    )
+    if quantized:
+        quantize_pipeline(pipe, settings.SD_MODEL_ID, cached=cached)
+    pipe.to("cpu")
+    pipe.enable_attention_slicing(1)
+    pipe.set_progress_bar_config(disable=True)
+    return pipe
+
+def run(pipe, prompts, steps: int, size: int, seed: int):
+    step_times = []
+    last = [0.0]
+
+    def on_step_end(pipeline, step, timestep, callback_kwargs):
+        now = time.perf_counter()
+        step_times.append(now - last[0])
+        last[0] = now
+        return callback_kwargs
+
+    images = []
+    start = time.perf_counter()
+    for prompt in prompts:
+        last[0] = time.perf_counter()
+        images.append(pipe(
+            prompt=prompt,
+            num_inference_steps=steps,
+            width=size,
+            height=size,
+            generator=torch.Generator("cpu").manual_seed(seed),
+            callback_on_step_end=on_step_end,
+        ).images[0])
+    total = time.perf_counter() - start
+    return images, total, step_times
+
+def psnr(a, b) -> float:
+    a = np.asarray(a, dtype=np.float64)
+    b = np.asarray(b, dtype=np.float64)
+    mse = np.mean((a - b) ** 2)
+    return float("inf") if mse == 0 else 10 * np.log10(255.0 ** 2 / mse)
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare fp32 and int8 quantized CPU inference")
+    parser.add_argument("--steps", type=int, default=20, help="Denoising steps per image")
+    parser.add_argument("--size", type=int, default=512, help="Output width and height")
+    parser.add_argument("--seed", type=int, default=1234, help="Seed shared by both runs")
+    parser.add_argument("--output_dir", type=str, help="Save both variants of each image here")
+    args = parser.parse_args()
+
+    results = {}
+    for label, quantized in (("fp32", False), ("int8", True)):
+        pipe = load_pipeline(quantized)
+        model_bytes = sum(pipeline_component_sizes(pipe).values())
+        run(pipe, DEFAULT_PROMPTS[:1], steps=2, size=args.size, seed=args.seed)  # warmup
+        images, total, step_times = run(pipe, DEFAULT_PROMPTS, args.steps, args.size, args.seed)
+        results[label] = images
+        print(
+            f"{label}: weights {format_bytes(model_bytes)}, "
+            f"{total / len(DEFAULT_PROMPTS):.2f}s/image, "
+            f"{1000 * np.median(step_times):.0f}ms/step (median)"
+        )
+        del pipe
+        gc.collect()
+
+    for index, (fp32_image, int8_image) in enumerate(zip(results["fp32"], results["int8"])):
+        print(f"prompt {index}: PSNR int8 vs fp32 = {psnr(fp32_image, int8_image):.2f} dB")
+        if args.output_dir:
+            output_dir = Path(args.output_dir)
+            output_dir.mkdir(parents=True, exist_ok=True)
+            fp32_image.save(output_dir / f"{index}-fp32.png")
+            int8_image.save(output_dir / f"{index}-int8.png")
+
+if __name__ == "__main__":
+    main()
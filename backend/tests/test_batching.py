@@ -0,0 +1,87 @@
+import asyncio
+import pytest
+from app.ai.batching import MicroBatcher
+
+
+def _doubling_batcher(calls, **kwargs):
+    async def run_batch(key, payloads):
+        calls.append((key, list(payloads)))
+        return [payload * 2 for payload in payloads]
+    return MicroBatcher(run_batch, **kwargs)
+
+
+def test_concurrent_requests_share_one_batch():
+    calls = []
+
+    async def main():
+        batcher = _doubling_batcher(calls, max_batch_size=8, window_ms=20)
+        return await asyncio.gather(*(batcher.submit("key", n) for n in range(3)))
+
+    assert asyncio.run(main()) == [0, 2, 4]
+    assert calls == [("key", [0, 1, 2])]
+
+
+def test_full_batch_flushes_without_waiting_for_the_window():
+    calls = []
+
+    async def main():
+        batcher = _doubling_batcher(calls, max_batch_size=2, window_ms=60_000)
+        requests = asyncio.gather(*(batcher.submit("key", n) for n in range(4)))
+        return await asyncio.wait_for(requests, timeout=1)
+
+    assert asyncio.run(main()) == [0, 2, 4, 6]
+    assert calls == [("key", [0, 1]), ("key", [2, 3])]
+
+
+def test_requests_are_batched_per_key():
+    calls = []
+
+    async def main():
+        batcher = _doubling_batcher(calls, max_batch_size=8, window_ms=20)
+        return await asyncio.gather(
+            batcher.submit("a", 1),
+            batcher.submit("b", 2),
+            batcher.submit("a", 3),
+        )
+
+    assert asyncio.run(main()) == [2, 4, 6]
+    assert sorted(calls) == [("a", [1, 3]), ("b", [2])]
+
+
+def test_zero_window_runs_each_request_alone():
+    calls = []
+
+    async def main():
+        batcher = _doubling_batcher(calls, max_batch_size=8, window_ms=0)
+        return await asyncio.gather(*(batcher.submit("key", n) for n in range(2)))
+
+    assert asyncio.run(main()) == [0, 2]
+    assert calls == [("key", [0]), ("key", [1])]
+
+
+def test_batch_error_reaches_every_request():
+    async def run_batch(key, payloads):
+        raise RuntimeError("render failed")
+
+    async def main():
+        batcher = MicroBatcher(run_batch, max_batch_size=8, window_ms=20)
+        return await asyncio.gather(
+            *(batcher.submit("key", n) for n in range(3)),
+            return_exceptions=True
+        )
+
+    results = asyncio.run(main())
+    assert len(results) == 3
+    assert all(isinstance(result, RuntimeError) for result in results)
+
+
+def test_wrong_result_count_fails_the_batch():
+    async def run_batch(key, payloads):
+        return payloads[:1]
+
+    async def main():
+        batcher = MicroBatcher(run_batch, max_batch_size=2, window_ms=20)
+        return await asyncio.gather(batcher.submit("key", 1), batcher.submit("key", 2))
+
+    with pytest.raises(RuntimeError, match="1 results for 2 requests"):
+        asyncio.run(main())
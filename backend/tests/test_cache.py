@@ -0,0 +1,101 @@
+import hashlib
+import os
+import fakeredis
+from app.core.cache import DiskTier, MemoryTier, RedisTier, TieredCache
+
+
+def _blob_path(tier: DiskTier, value: bytes):
+    return tier._blob_path(hashlib.sha256(value).hexdigest())
+
+
+def _age(tier: DiskTier, value: bytes, mtime: int):
+    os.utime(_blob_path(tier, value), (mtime, mtime))
+
+
+def test_hit_in_a_slower_tier_is_promoted_to_faster_tiers(tmp_path):
+    memory = MemoryTier(max_bytes=1024)
+    redis_tier = RedisTier(fakeredis.FakeRedis(), prefix="test_cache:")
+    disk = DiskTier(str(tmp_path), max_bytes=1024)
+    cache = TieredCache([memory, redis_tier, disk])
+
+    disk.set("key", b"value")
+    assert cache.get("key") == b"value"
+    assert memory.get("key") == b"value"
+    assert redis_tier.get("key") == b"value"
+
+    stats = cache.stats()
+    assert stats["disk"]["hits"] == 1
+    assert stats["memory"]["misses"] == 1
+    assert stats["redis"]["misses"] == 1
+
+
+def test_miss_in_every_tier(tmp_path):
+    cache = TieredCache([MemoryTier(max_bytes=1024), DiskTier(str(tmp_path), max_bytes=1024)])
+    assert cache.get("missing") is None
+
+
+def test_memory_tier_evicts_least_recently_used():
+    memory = MemoryTier(max_bytes=10)
+    memory.set("a", b"aaaa")
+    memory.set("b", b"bbbb")
+    memory.get("a")
+    memory.set("c", b"cccc")
+
+    assert memory.get("b") is None
+    assert memory.get("a") == b"aaaa"
+    assert memory.get("c") == b"cccc"
+    assert memory.current_bytes == 8
+    assert memory.evictions == 1
+
+
+def test_disk_tier_stores_identical_values_once(tmp_path):
+    disk = DiskTier(str(tmp_path), max_bytes=1024)
+    disk.set("a", b"same bytes")
+    disk.set("b", b"same bytes")
+
+    assert disk.get("a") == disk.get("b") == b"same bytes"
+    assert len(disk._blob_paths()) == 1
+    assert disk.current_bytes == len(b"same bytes")
+
+
+def test_disk_tier_evicts_oldest_blobs_down_to_low_water(tmp_path):
+    disk = DiskTier(str(tmp_path), max_bytes=100, low_water=0.7)
+    values = {key: key.encode() * 30 for key in ("a", "b", "c", "d")}
+    for mtime, key in enumerate(("a", "b", "c"), start=1):
+        disk.set(key, values[key])
+        _age(disk, values[key], mtime * 1000)
+
+    # 120 bytes is over budget: evicting "a" alone would fit, but eviction
+    # continues to the 70 byte low-water mark
+    disk.set("d", values["d"])
+
+    assert disk.evictions == 2
+    assert disk.current_bytes == 60
+    assert disk.get("a") is None
+    assert disk.get("b") is None
+    assert disk.get("c") == values["c"]
+    assert disk.get("d") == values["d"]
+
+
+def test_disk_tier_lookup_protects_a_blob_from_eviction(tmp_path):
+    disk = DiskTier(str(tmp_path), max_bytes=60, low_water=1.0)
+    old, new = b"o" * 30, b"n" * 30
+    disk.set("old", old)
+    _age(disk, old, 1000)
+    disk.set("new", new)
+    _age(disk, new, 2000)
+
+    # Reading "old" makes it the most recently used blob
+    assert disk.get("old") == old
+    disk.set("newest", b"x" * 30)
+
+    assert disk.get("old") == old
+    assert disk.get("new") is None
+
+
+def test_disk_tier_counts_existing_blobs_on_startup(tmp_path):
+    DiskTier(str(tmp_path), max_bytes=1024).set("key", b"value")
+    reopened = DiskTier(str(tmp_path), max_bytes=1024)
+
+    assert reopened.current_bytes == len(b"value")
+    assert reopened.get("key") == b"value"
@@ -0,0 +1,104 @@
+import fakeredis
+import pytest
+from app.services.job_queue import RedisStreamJobQueue
+from app.workers.generation_worker import GenerationWorker
+
+
+class JobRunner:
+    """Stands in for execute_job, failing the first ``failures`` runs."""
+
+    def __init__(self, failures: int = 0):
+        self.failures = failures
+        self.runs = []
+
+    def __call__(self, job_id: str, retry: bool = False):
+        self.runs.append((job_id, retry))
+        if len(self.runs) <= self.failures:
+            raise RuntimeError("render failed")
+
+
+@pytest.fixture
+def queue():
+    # Stalled messages are claimable at once, so redelivery needs no waiting
+    queue = RedisStreamJobQueue(fakeredis.FakeRedis(), max_deliveries=2, claim_idle_ms=0)
+    queue.ensure_group()
+    return queue
+
+
+def _worker(queue, runner, abandoned):
+    return GenerationWorker(
+        queue,
+        "worker-1",
+        handler=runner,
+        on_abandoned=lambda job_id, error: abandoned.append((job_id, error)),
+        block_ms=1
+    )
+
+
+def _pending(queue) -> int:
+    return queue.redis.xpending(queue.stream, queue.group)["pending"]
+
+
+def test_ensure_group_is_idempotent(queue):
+    queue.ensure_group()
+
+
+def test_completed_job_is_acknowledged(queue):
+    runner, abandoned = JobRunner(), []
+    queue.enqueue("job-1")
+
+    assert _worker(queue, runner, abandoned).run_once() == 1
+    assert runner.runs == [("job-1", True)]
+    assert _pending(queue) == 0
+    assert abandoned == []
+
+
+def test_failed_job_is_redelivered(queue):
+    runner, abandoned = JobRunner(failures=1), []
+    worker = _worker(queue, runner, abandoned)
+    message_id = queue.enqueue("job-1")
+
+    worker.run_once()
+    assert _pending(queue) == 1
+
+    worker.run_once()
+    assert runner.runs == [("job-1", True), ("job-1", True)]
+    assert _pending(queue) == 0
+    assert queue.redis.xlen(queue.dead_letter_stream) == 0
+    assert abandoned == []
+    assert queue.delivery_count(message_id) == 0
+
+
+def test_job_is_dead_lettered_after_max_deliveries(queue):
+    runner, abandoned = JobRunner(failures=10), []
+    worker = _worker(queue, runner, abandoned)
+    message_id = queue.enqueue("job-1")
+
+    for _ in range(3):
+        worker.run_once()
+
+    assert len(runner.runs) == queue.max_deliveries
+    assert abandoned == [("job-1", "Job abandoned: delivered 3 times")]
+    assert _pending(queue) == 0
+    [(_, fields)] = queue.redis.xrange(queue.dead_letter_stream)
+    assert fields[b"job_id"] == b"job-1"
+    assert fields[b"message_id"] == message_id.encode()
+    assert fields[b"reason"] == b"delivered 3 times"
+
+
+def test_message_without_job_id_is_dead_lettered(queue):
+    runner, abandoned = JobRunner(), []
+    queue.redis.xadd(queue.stream, {"unexpected": "field"})
+
+    _worker(queue, runner, abandoned).run_once()
+
+    assert runner.runs == []
+    assert abandoned == []
+    assert _pending(queue) == 0
+    assert queue.redis.xlen(queue.dead_letter_stream) == 1
+
+
+def test_empty_queue_processes_nothing(queue):
+    runner, abandoned = JobRunner(), []
+    assert _worker(queue, runner, abandoned).run_once() == 0
+    assert runner.runs == []
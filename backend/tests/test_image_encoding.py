@@ -0,0 +1,40 @@
+import pytest
+from app.utils.image_encoding import DEFAULT_QUALITY, OutputFormat, negotiate_format
+
+
+@pytest.mark.parametrize("accept", [None, "", "*/*", "image/*", "text/html, */*;q=0.8"])
+def test_wildcards_and_missing_accept_fall_back_to_png(accept):
+    assert negotiate_format(accept) == OutputFormat("png")
+
+
+def test_explicit_format_overrides_accept():
+    assert negotiate_format("image/webp", "jpg", 70) == OutputFormat("jpeg", 70)
+
+
+def test_unsupported_explicit_format_raises():
+    with pytest.raises(ValueError, match="Unsupported image format 'gif'"):
+        negotiate_format(None, "gif")
+
+
+def test_highest_q_value_wins():
+    accept = "image/png;q=0.5, image/webp;q=0.9, image/jpeg;q=0.7"
+    assert negotiate_format(accept).name == "webp"
+
+
+def test_header_order_breaks_ties():
+    assert negotiate_format("image/jpeg, image/webp").name == "jpeg"
+    assert negotiate_format("image/webp, image/jpeg").name == "webp"
+
+
+def test_zero_and_malformed_q_values_are_not_acceptable():
+    assert negotiate_format("image/webp;q=0").name == "png"
+    assert negotiate_format("image/webp;q=high").name == "png"
+
+
+def test_media_types_are_matched_case_insensitively():
+    assert negotiate_format("Image/WebP").name == "webp"
+
+
+def test_quality_defaults_unless_given():
+    assert negotiate_format("image/webp").quality == DEFAULT_QUALITY
+    assert negotiate_format("image/webp", quality=40).quality == 40
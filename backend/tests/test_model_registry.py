@@ -0,0 +1,108 @@
+import pytest
+import torch
+from app.ai.model_registry import ModelRegistry
+
+
+def _register(registry: ModelRegistry, name: str, nbytes: int, events: list):
+    """Register a module holding ``nbytes`` of weights, logging its loads and unloads."""
+    def load():
+        events.append(("load", name))
+        module = torch.nn.Module()
+        module.register_buffer("weights", torch.zeros(nbytes, dtype=torch.uint8))
+        return module
+
+    def unload(model):
+        events.append(("unload", name))
+
+    registry.register(name, load, unload)
+
+
+def test_model_is_loaded_once_and_reused():
+    registry, events = ModelRegistry(max_bytes=100), []
+    _register(registry, "a", 40, events)
+
+    with registry.use("a") as first:
+        pass
+    with registry.use("a") as second:
+        pass
+
+    assert first is second
+    assert events == [("load", "a")]
+    assert registry.resident_bytes == 40
+
+
+def test_least_recently_used_idle_model_is_evicted():
+    registry, events = ModelRegistry(max_bytes=100), []
+    for name in ("a", "b", "c"):
+        _register(registry, name, 40, events)
+
+    for name in ("a", "b", "a", "c"):
+        with registry.use(name):
+            pass
+
+    assert events[-1] == ("unload", "b")
+    assert registry.is_loaded("a") and registry.is_loaded("c")
+    assert not registry.is_loaded("b")
+    assert registry.evictions == 1
+
+
+def test_pinned_model_is_not_evicted():
+    registry, events = ModelRegistry(max_bytes=100), []
+    _register(registry, "a", 60, events)
+    _register(registry, "b", 60, events)
+
+    with registry.use("a"):
+        with registry.use("b"):
+            # Over budget, but both models are in use
+            assert registry.is_loaded("a") and registry.is_loaded("b")
+        assert registry.stats()["loaded"]["a"]["in_use"] == 1
+        assert registry.evict("a") is False
+
+    assert ("unload", "a") not in events
+    assert registry.evict("a") is True
+    assert events[-1] == ("unload", "a")
+
+
+def test_known_size_makes_room_before_loading():
+    registry, events = ModelRegistry(max_bytes=100), []
+    _register(registry, "a", 60, events)
+    _register(registry, "b", 60, events)
+
+    for name in ("a", "b", "a"):
+        with registry.use(name):
+            pass
+
+    # "a"'s size is known from its first load, so "b" goes before "a" reloads
+    assert events == [
+        ("load", "a"),
+        ("load", "b"),
+        ("unload", "a"),
+        ("unload", "b"),
+        ("load", "a"),
+    ]
+
+
+def test_model_larger_than_the_budget_still_loads():
+    registry, events = ModelRegistry(max_bytes=10), []
+    _register(registry, "a", 40, events)
+
+    with registry.use("a"):
+        assert registry.is_loaded("a")
+
+
+def test_unknown_model_raises():
+    with pytest.raises(KeyError):
+        with ModelRegistry(max_bytes=100).use("missing"):
+            pass
+
+
+def test_clear_unloads_idle_models():
+    registry, events = ModelRegistry(max_bytes=100), []
+    _register(registry, "a", 40, events)
+    with registry.use("a"):
+        pass
+
+    registry.clear()
+
+    assert not registry.is_loaded("a")
+    assert registry.resident_bytes == 0
@@ -0,0 +1,111 @@
+import asyncio
+import fakeredis
+import fakeredis.aioredis
+from app.core.single_flight import SingleFlight
+
+
+def _shared_redis():
+    """Blocking and asyncio clients on one fake server, like two handles on one Redis."""
+    server = fakeredis.FakeServer()
+    return fakeredis.FakeRedis(server=server), fakeredis.aioredis.FakeRedis(server=server)
+
+
+def _single_flight(redis_client, async_redis_client, **kwargs):
+    return SingleFlight(
+        redis_client,
+        prefix="test_singleflight:",
+        poll_interval=0.05,
+        async_redis_client=async_redis_client,
+        **kwargs
+    )
+
+
+def test_concurrent_calls_in_one_process_share_the_work():
+    calls = 0
+
+    async def main():
+        flight = SingleFlight()
+        release = asyncio.Event()
+
+        async def work():
+            nonlocal calls
+            calls += 1
+            await release.wait()
+            return "result"
+
+        leader = asyncio.ensure_future(flight.do("key", work, lambda: None))
+        follower = asyncio.ensure_future(flight.do("key", work, lambda: None))
+        await asyncio.sleep(0)
+        release.set()
+        return await asyncio.gather(leader, follower)
+
+    assert asyncio.run(main()) == ["result", "result"]
+    assert calls == 1
+
+
+def test_follower_process_reads_the_leaders_result():
+    redis_client, async_redis_client = _shared_redis()
+    stored = {}
+    calls = []
+
+    async def main():
+        # One SingleFlight per process: they only share Redis
+        leader_flight = _single_flight(redis_client, async_redis_client)
+        follower_flight = _single_flight(redis_client, async_redis_client)
+        leader_started = asyncio.Event()
+        release = asyncio.Event()
+
+        async def leader_work():
+            calls.append("leader")
+            leader_started.set()
+            await release.wait()
+            stored["key"] = "rendered"
+            return "rendered"
+
+        async def follower_work():
+            calls.append("follower")
+            return "rendered again"
+
+        leader = asyncio.ensure_future(leader_flight.do("key", leader_work, lambda: stored.get("key")))
+        await leader_started.wait()
+        follower = asyncio.ensure_future(follower_flight.do("key", follower_work, lambda: stored.get("key")))
+        await asyncio.sleep(0.1)
+        release.set()
+        return await asyncio.wait_for(asyncio.gather(leader, follower), timeout=5)
+
+    assert asyncio.run(main()) == ["rendered", "rendered"]
+    assert calls == ["leader"]
+    assert not redis_client.exists("test_singleflight:lock:key")
+
+
+def test_follower_runs_the_work_when_the_leader_never_finishes():
+    redis_client, async_redis_client = _shared_redis()
+    # A leader that died holding the lock, before it stored anything
+    redis_client.set("test_singleflight:lock:key", "dead-leader", px=60_000)
+
+    async def main():
+        flight = _single_flight(redis_client, async_redis_client, wait_timeout=0.2)
+
+        async def work():
+            return "rendered locally"
+
+        return await asyncio.wait_for(flight.do("key", work, lambda: None), timeout=5)
+
+    assert asyncio.run(main()) == "rendered locally"
+
+
+def test_leader_only_releases_its_own_lock():
+    redis_client, async_redis_client = _shared_redis()
+
+    async def main():
+        flight = _single_flight(redis_client, async_redis_client)
+
+        async def work():
+            # The lock expired and another worker took it over meanwhile
+            redis_client.set("test_singleflight:lock:key", "other-leader")
+            return "rendered"
+
+        return await flight.do("key", work, lambda: None)
+
+    assert asyncio.run(main()) == "rendered"
+    assert redis_client.get("test_singleflight:lock:key") == b"other-leader"
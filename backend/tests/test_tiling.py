@@ -0,0 +1,52 @@
+import pytest
+from app.ai.tiling import tile_boxes
+
+
+def _axis_starts(boxes, axis):
+    return sorted({box[axis] for box in boxes})
+
+
+def test_image_within_one_tile_is_a_single_box():
+    assert tile_boxes(512, 384, tile_size=512, overlap=64) == [(0, 0, 512, 384)]
+
+
+def test_tiles_shrink_to_just_cover_the_image():
+    # Two 512px tiles would cover 768px; two 416px tiles overlapping by 64 do
+    boxes = tile_boxes(768, 768, tile_size=512, overlap=64)
+    assert boxes == [
+        (0, 0, 416, 416),
+        (352, 0, 768, 416),
+        (0, 352, 416, 768),
+        (352, 352, 768, 768),
+    ]
+
+
+@pytest.mark.parametrize("width,height,tile_size,overlap", [
+    (768, 768, 512, 64),
+    (1024, 640, 512, 64),
+    (1536, 1536, 512, 64),
+    (2048, 1152, 640, 96),
+    (1000, 1000, 512, 32),
+])
+def test_boxes_cover_the_image_with_equal_overlapping_tiles(width, height, tile_size, overlap):
+    boxes = tile_boxes(width, height, tile_size, overlap)
+
+    sizes = {(right - left, bottom - top) for left, top, right, bottom in boxes}
+    assert len(sizes) == 1
+    tile_width, tile_height = sizes.pop()
+    assert tile_width <= tile_size and tile_height <= tile_size
+
+    for axis, length, tile in ((0, width, tile_width), (1, height, tile_height)):
+        starts = _axis_starts(boxes, axis)
+        assert starts[0] == 0
+        assert starts[-1] + tile == length
+        for previous, start in zip(starts, starts[1:]):
+            # Neighbouring tiles overlap by at least ``overlap``, leaving no gaps
+            assert previous + tile - start >= overlap
+
+    assert len(boxes) == len(_axis_starts(boxes, 0)) * len(_axis_starts(boxes, 1))
+
+
+def test_tile_sides_are_multiples_of_eight_when_split():
+    left, top, right, bottom = tile_boxes(1000, 1000, tile_size=512, overlap=32)[0]
+    assert (right - left) % 8 == 0 and (bottom - top) % 8 == 0
@@ -13,13 +13,25 @@ export interface ProcessedSketch {
   createdAt: string;
 }
 
+export type SketchJobStatus = 'pending' | 'processing' | 'completed' | 'failed';
+
+export interface SketchJob {
+  jobId: string;
+  status: SketchJobStatus;
+  progress: number;
+  sketchId: number;
+  error: string | null;
+}
+
+const JOB_POLL_INTERVAL_MS = 2000;
+
 class SketchService {
-  static async processSketch(data: ProcessSketchRequest): Promise<ProcessedSketch> {
+  static async submitSketch(data: ProcessSketchRequest): Promise<SketchJob> {
     const formData = new FormData();
-    formData.append('sketch', data.sketch);
+    formData.append('file', data.sketch);
     formData.append('style', data.style);
 
-    const response = await api.post<ProcessedSketch>('/sketches/process', formData, {
+    const response = await api.post<SketchJob>('/sketches/process', formData, {
       headers: {
         'Content-Type': 'multipart/form-data',
       },
@@ -27,6 +39,34 @@ class SketchService {
     return response.data;
   }
 
+  static async getSketchJob(jobId: string): Promise<SketchJob> {
+    const response = await api.get<SketchJob>(`/sketches/jobs/${jobId}`);
+    return response.data;
+  }
+
+  static async getSketchJobResult(jobId: string): Promise<ProcessedSketch> {
+    const response = await api.get<ProcessedSketch>(`/sketches/jobs/${jobId}/result`);
+    return response.data;
+  }
+
+  // Submits the sketch and polls its render job until it finishes
+  static async processSketch(
+    data: ProcessSketchRequest,
+    onProgress?: (job: SketchJob) => void
+  ): Promise<ProcessedSketch> {
+    let job = await SketchService.submitSketch(data);
+    while (job.status !== 'completed') {
+      if (job.status === 'failed') {
+        throw new Error(job.error || 'Rendering failed');
+      }
+      onProgress?.(job);
+      await new Promise(resolve => setTimeout(resolve, JOB_POLL_INTERVAL_MS));
+      job = await SketchService.getSketchJob(job.jobId);
+    }
+    onProgress?.(job);
+    return SketchService.getSketchJobResult(job.jobId);
+  }
+
   static async getProcessedSketch(id: string): Promise<ProcessedSketch> {
     const response = await api.get<ProcessedSketch>(`/sketches/${id}`);
     return response.data;